@@ -0,0 +1,55 @@
+"""Nested guard calls vs. fused access chains.
+
+Run it with:
+
+    python benchmarks/bench_access_path.py
+
+Executes restricted code traversing objects like templates do, compiled
+with and without `fuse_access_chains`, using the guards of
+`PreparedScript`.
+"""
+from __future__ import print_function
+from RestrictedPython import PreparedScript
+from RestrictedPython.transformer import RestrictingNodeTransformer
+
+import timeit
+
+
+ATTRIBUTES = """\
+total = 0
+for item in items:
+    total = total + item.context.parent.size
+"""
+
+MIXED = """\
+total = 0
+for item in items:
+    total = total + item.data['values'][0]
+"""
+
+
+class FusingTransformer(RestrictingNodeTransformer):
+    fuse_access_chains = True
+
+
+class Item(object):
+
+    def __init__(self, **kw):
+        self.__dict__.update(kw)
+
+
+def main(number=200):
+    items = [Item(context=Item(parent=Item(size=i)),
+                  data={'values': [i]}) for i in range(1000)]
+    for name, source in (('attributes', ATTRIBUTES), ('mixed', MIXED)):
+        for label, policy in (('nested', RestrictingNodeTransformer),
+                              ('fused', FusingTransformer)):
+            script = PreparedScript(source, policy=policy)
+            duration = min(timeit.repeat(
+                lambda: script.run(items=items), number=number, repeat=3))
+            print('{0:10} {1:6} {2:8.3f} ms'.format(
+                name, label, duration / number * 1e3))
+
+
+if __name__ == '__main__':
+    main()
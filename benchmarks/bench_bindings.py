@@ -0,0 +1,71 @@
+"""Per execution setup cost of eager vs. lazy globals.
+
+Run it with:
+
+    python benchmarks/bench_bindings.py
+
+A host provides 200 globals, each one created by a factory. The scripts
+only use a few of them. The eager variant creates all globals for each
+execution, the lazy one only the globals the script needs.
+"""
+from __future__ import print_function
+from RestrictedPython import compile_restricted_exec
+from RestrictedPython.bindings import LazyGlobals
+from RestrictedPython.Guards import safe_builtins
+from RestrictedPython.Guards import safer_getattr
+
+import timeit
+
+
+class Service(object):
+
+    def __init__(self, name):
+        self.name = name
+        self.config = dict((str(i), i) for i in range(20))
+
+
+def make_factory(name):
+    return lambda: Service(name)
+
+
+FACTORIES = dict(
+    ('service%d' % i, make_factory('service%d' % i)) for i in range(200))
+VALUES = {'_getattr_': safer_getattr}
+
+SCRIPTS = {
+    'one name': 'result = service1.name',
+    'three names': 'result = [service1.name, service2.name, service3.name]',
+}
+
+
+def eager_globals():
+    glb = {'__builtins__': safe_builtins}
+    glb.update(VALUES)
+    for name, factory in FACTORIES.items():
+        glb[name] = factory()
+    return glb
+
+
+def main(number=2000):
+    lazy = LazyGlobals(FACTORIES, VALUES, builtins=safe_builtins)
+    for title, source in sorted(SCRIPTS.items()):
+        result = compile_restricted_exec(source)
+
+        def run_eager():
+            exec(result.code, eager_globals())
+
+        def run_lazy():
+            exec(result.code, lazy.bind(result))
+
+        eager = min(timeit.repeat(run_eager, number=number, repeat=3))
+        lazy_time = min(timeit.repeat(run_lazy, number=number, repeat=3))
+        print('{0:12} eager: {1:8.2f} us  lazy: {2:8.2f} us  ({3:.1f}x)'
+              .format(
+                  title,
+                  eager / number * 1e6,
+                  lazy_time / number * 1e6,
+                  eager / lazy_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Per execution cost of creating `__builtins__`.
+
+Run it with:
+
+    python benchmarks/bench_bundles.py
+
+Compares merging the predefined builtins sets for each execution with
+using a cached bundle.
+"""
+from __future__ import print_function
+from RestrictedPython.bundles import builtins_bundle
+from RestrictedPython.Guards import safe_builtins
+from RestrictedPython.Limits import limited_builtins
+from RestrictedPython.Utilities import utility_builtins
+
+import timeit
+
+
+def merge():
+    builtins = {}
+    builtins.update(safe_builtins)
+    builtins.update(limited_builtins)
+    builtins.update(utility_builtins)
+    return {'__builtins__': builtins}
+
+
+def bundle_copy():
+    return {'__builtins__': builtins_bundle(
+        'safe', 'limited', 'utility').copy()}
+
+
+def bundle_shared():
+    return {'__builtins__': builtins_bundle(
+        'safe', 'limited', 'utility').builtins}
+
+
+def main(number=100000):
+    results = []
+    for func in (merge, bundle_copy, bundle_shared):
+        results.append(
+            (func.__name__,
+             min(timeit.repeat(func, number=number, repeat=3)) / number))
+    base = results[0][1]
+    for name, duration in results:
+        print('{0:14} {1:8.3f} us  ({2:.1f}x)'.format(
+            name, duration * 1e6, base / duration))
+
+
+if __name__ == '__main__':
+    main()
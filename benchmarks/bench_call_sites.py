@@ -0,0 +1,78 @@
+"""Attribute guards with and without call site IDs.
+
+Run it with:
+
+    python benchmarks/bench_call_sites.py
+
+Executes an attribute heavy restricted loop with `safer_getattr`, with a
+`_getattr_` backed by `GuardDecisionCache` and with the inline caching
+`_getattr_site_` of a policy with `call_site_ids` enabled. The policy of the
+latter two resembles the ones of application servers which look up security
+declarations along the MRO of the class.
+"""
+from __future__ import print_function
+from RestrictedPython import compile_restricted_exec
+from RestrictedPython.Guards import ignore_site
+from RestrictedPython.Guards import make_cached_getattr
+from RestrictedPython.Guards import make_site_getattr
+from RestrictedPython.Guards import safer_getattr
+from RestrictedPython.transformer import RestrictingNodeTransformer
+
+import timeit
+
+
+SOURCE = """\
+total = 0
+for item in items:
+    total = total + item.size + len(item.name) + len(item.title)
+"""
+
+
+class CallSiteTransformer(RestrictingNodeTransformer):
+    call_site_ids = True
+
+
+class Base(object):
+    __allowed__ = frozenset(['name'])
+
+
+class Middle(Base):
+    __allowed__ = frozenset(['title'])
+
+
+class Content(Middle):
+    __allowed__ = frozenset(['size'])
+    name = 'content'
+    title = 'Content'
+    size = 42
+
+
+def mro_policy(object, name):
+    for cls in type(object).__mro__:
+        if name in cls.__dict__.get('__allowed__', ()):
+            return True
+    return False
+
+
+def main(number=200):
+    items = [Content() for i in range(1000)]
+    plain = compile_restricted_exec(SOURCE).code
+    sites = compile_restricted_exec(SOURCE, policy=CallSiteTransformer).code
+    variants = (
+        ('safer_getattr', plain, {'_getattr_': safer_getattr,
+                                  '_getiter_': iter}),
+        ('cached policy', plain, {'_getattr_': make_cached_getattr(
+            mro_policy), '_getiter_': iter}),
+        ('site policy', sites, {'_getattr_site_': make_site_getattr(
+            mro_policy), '_getiter_site_': ignore_site(iter)}),
+    )
+    for label, code, guards in variants:
+        def run():
+            glb = dict(guards, items=items, __builtins__={'len': len})
+            exec(code, glb)
+        duration = min(timeit.repeat(run, number=number, repeat=3))
+        print('{0:14} {1:8.3f} ms'.format(label, duration / number * 1e3))
+
+
+if __name__ == '__main__':
+    main()
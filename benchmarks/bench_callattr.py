@@ -0,0 +1,60 @@
+"""Method calls through `_getattr_` vs. `_callattr_`.
+
+Run it with:
+
+    python benchmarks/bench_callattr.py
+
+Executes method call heavy restricted loops compiled with and without
+`call_attributes`, using the guards of `PreparedScript`.
+"""
+from __future__ import print_function
+from RestrictedPython import PreparedScript
+from RestrictedPython.transformer import RestrictingNodeTransformer
+
+import timeit
+
+
+WORKLOADS = (
+    ('list.append', """\
+result = []
+for item in items:
+    result.append(item)
+"""),
+    ('str methods', """\
+for item in items:
+    text = 'Item'.lower().strip().replace('i', 'I')
+"""),
+    ('own methods', """\
+total = 0
+for item in items:
+    total = total + counter.add(item)
+"""),
+)
+
+
+class CallAttrTransformer(RestrictingNodeTransformer):
+    call_attributes = True
+
+
+class Counter(object):
+
+    def add(self, value):
+        return value
+
+
+def main(number=200):
+    items = list(range(1000))
+    counter = Counter()
+    for name, source in WORKLOADS:
+        for label, policy in (('getattr', RestrictingNodeTransformer),
+                              ('callattr', CallAttrTransformer)):
+            script = PreparedScript(source, policy=policy)
+            duration = min(timeit.repeat(
+                lambda: script.run(items=items, counter=counter),
+                number=number, repeat=3))
+            print('{0:12} {1:8} {2:8.3f} ms'.format(
+                name, label, duration / number * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Cost of the step checkpoints of restricted scripts.
+
+Run it with:
+
+    python benchmarks/bench_checkpoints.py
+
+Runs loop heavy scripts compiled without checkpoints, with checkpoints and
+the no-op default `_tick_`, with checkpoints counted by a `StepBudget`
+checking every 1000 steps and by a `Deadline` reading the clock every 100
+steps.
+"""
+from __future__ import print_function
+from RestrictedPython import PreparedScript
+from RestrictedPython import RestrictingNodeTransformer
+from RestrictedPython.checkpoints import Deadline
+from RestrictedPython.checkpoints import StepBudget
+
+import timeit
+import workloads
+
+
+class CheckpointPolicy(RestrictingNodeTransformer):
+
+    step_checkpoints = True
+
+
+LOOP = ("""\
+def step(n):
+    return n + 1
+total = 0
+while total < 1000:
+    total = step(total)
+""", lambda: {})
+
+
+def main(number=200):
+    scripts = [('loop', LOOP)] + [
+        (name, workloads.SCRIPTS[name])
+        for name in ('attributes', 'unpacking')]
+    for name, (source, bindings) in scripts:
+        plain = PreparedScript(
+            source, name, builtins=workloads.BUILTINS)
+        checked = PreparedScript(
+            source, name, builtins=workloads.BUILTINS,
+            policy=CheckpointPolicy)
+
+        def run_with(budget, checked=checked, bindings=bindings):
+            glb = bindings()
+            glb.update(budget.bindings())
+            checked.run(**glb)
+
+        budget = StepBudget(limit=10 ** 9)
+        deadline = Deadline(timeout=3600)
+        for label, func in (
+                ('no checkpoints', lambda: plain.run(**bindings())),
+                ('no-op _tick_', lambda: checked.run(**bindings())),
+                ('StepBudget', lambda: run_with(budget)),
+                ('Deadline', lambda: run_with(deadline))):
+            duration = min(timeit.repeat(func, number=number, repeat=5))
+            print('{0:12} {1:16} {2:8.3f} ms'.format(
+                name, label, duration / number * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Memory allocated while compiling small expressions.
+
+Run it with (Python 3):
+
+    python benchmarks/bench_compile_alloc.py
+
+Uses `tracemalloc` to measure the peak of the memory allocated during one
+`compile_restricted_eval` call, and the compile rate. `compile_restricted*`
+reuse the instances of the default policy, a subclass not defining `reset`
+itself is not reused and gets a new instance for each compilation.
+"""
+from __future__ import print_function
+from RestrictedPython import compile_restricted_eval
+from RestrictedPython.transformer import RestrictingNodeTransformer
+
+import timeit
+import tracemalloc
+
+
+SOURCES = ('a + b', 'ob.attr[1] * 2', '[x.y for x in items if x]')
+
+
+class NotReusableTransformer(RestrictingNodeTransformer):
+    pass
+
+
+def allocated(source, policy, number=200):
+    """Return the average peak of the allocated bytes per compilation."""
+    compile_restricted_eval(source, policy=policy)  # fill the pool
+    total = 0
+    for i in range(number):
+        tracemalloc.start()
+        compile_restricted_eval(source, policy=policy)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        total += peak
+    return total / number
+
+
+def main(number=5000):
+    for label, policy in (('new instances', NotReusableTransformer),
+                          ('pooled', RestrictingNodeTransformer)):
+        for source in SOURCES:
+            duration = min(timeit.repeat(
+                lambda: compile_restricted_eval(source, policy=policy),
+                number=number, repeat=3)) / number
+            print('{0:14} {1:28} {2:8.0f} bytes {3:8.2f} us'.format(
+                label, source, allocated(source, policy), duration * 1e6))
+
+
+if __name__ == '__main__':
+    main()
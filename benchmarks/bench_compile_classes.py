@@ -0,0 +1,41 @@
+"""Compile throughput of class heavy sources.
+
+Run it with:
+
+    python benchmarks/bench_compile_classes.py
+
+Compiles a module defining many small classes with
+`compile_restricted_exec` and, for comparison, with the built-in `compile`.
+"""
+from __future__ import print_function
+from RestrictedPython import compile_restricted_exec
+
+import timeit
+
+
+CLASS_TEMPLATE = """\
+class Item{0}(object):
+
+    def __init__(self, value):
+        self.value = value
+
+    def double(self):
+        return self.value * 2
+
+"""
+
+
+def main(classes=200, number=20):
+    source = ''.join(CLASS_TEMPLATE.format(i) for i in range(classes))
+    variants = (
+        ('compile', lambda: compile(source, '<string>', 'exec')),
+        ('restricted', lambda: compile_restricted_exec(source)),
+    )
+    for label, func in variants:
+        duration = min(timeit.repeat(func, number=number, repeat=3)) / number
+        print('{0:10} {1:8.3f} ms  {2:8.0f} classes/s'.format(
+            label, duration * 1e3, classes / duration))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Cost of counting the guard calls of a restricted script.
+
+Run it with:
+
+    python benchmarks/bench_counters.py
+
+Runs an attribute heavy script with the plain guards, with counting guards,
+with counting guards sampling every 100th source line and with counting
+every 10th execution.
+"""
+from __future__ import print_function
+from RestrictedPython import PreparedScript
+from RestrictedPython.counters import GuardCounters
+from RestrictedPython.prepared import default_guards
+
+import timeit
+import workloads
+
+
+def main(number=200):
+    source, bindings = workloads.SCRIPTS['attributes']
+    variants = (
+        ('plain guards', None),
+        ('counted', GuardCounters().wrap('script.py', default_guards)),
+        ('counted+lines', GuardCounters(line_sample_rate=100).wrap(
+            'script.py', default_guards)),
+    )
+    for label, guards in variants:
+        script = PreparedScript(
+            source, 'script.py', guards=guards, builtins=workloads.BUILTINS)
+        duration = min(timeit.repeat(
+            lambda: script.run(**bindings()), number=number, repeat=3))
+        print('{0:16} {1:8.3f} ms'.format(label, duration / number * 1e3))
+
+    counters = GuardCounters(execution_sample_rate=10)
+    script = PreparedScript(
+        source, 'script.py', builtins=workloads.BUILTINS)
+
+    def run_sampled():
+        glb = bindings()
+        glb.update(counters.sample('script.py', script.template))
+        script.run(**glb)
+
+    duration = min(timeit.repeat(run_sampled, number=number, repeat=3))
+    print('{0:16} {1:8.3f} ms'.format(
+        'sampled 1/10', duration / number * 1e3))
+
+
+if __name__ == '__main__':
+    main()
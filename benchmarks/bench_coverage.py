@@ -0,0 +1,38 @@
+"""Cost of collecting the line coverage of a restricted script.
+
+Run it with:
+
+    python benchmarks/bench_coverage.py
+
+Runs an attribute heavy script without and with `LineCoverage` running.
+With `sys.monitoring` (Python 3.12+) the lines are disabled after their
+first hit, so the difference should be within noise; the `sys.settrace`
+fallback traces the code objects until all their lines were hit.
+"""
+from __future__ import print_function
+from RestrictedPython import PreparedScript
+from RestrictedPython.linecoverage import LineCoverage
+
+import timeit
+import workloads
+
+
+def main(number=200):
+    source, bindings = workloads.SCRIPTS['attributes']
+    script = PreparedScript(source, 'script.py', builtins=workloads.BUILTINS)
+    duration = min(timeit.repeat(
+        lambda: script.run(**bindings()), number=number, repeat=3))
+    print('{0:20} {1:8.3f} ms'.format('plain', duration / number * 1e3))
+
+    coverage = LineCoverage()
+    coverage.add(script.result)
+    with coverage:
+        duration = min(timeit.repeat(
+            lambda: script.run(**bindings()), number=number, repeat=3))
+    print('{0:20} {1:8.3f} ms'.format(
+        'coverage ' + coverage.mode, duration / number * 1e3))
+    print(coverage.text())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Cost of an attribute access policy with and without `GuardDecisionCache`.
+
+Run it with:
+
+    python benchmarks/bench_guard_cache.py
+
+The policy resembles the ones of application servers which look up security
+declarations along the MRO of the class.
+"""
+from __future__ import print_function
+from RestrictedPython.Guards import make_cached_getattr
+from RestrictedPython.Guards import safer_getattr
+
+import timeit
+
+
+class Base(object):
+    __allowed__ = frozenset(['name'])
+
+
+class Middle(Base):
+    __allowed__ = frozenset(['title'])
+
+
+class Content(Middle):
+    __allowed__ = frozenset(['size'])
+    name = 'content'
+    title = 'Content'
+    size = 42
+
+
+def mro_policy(object, name):
+    for cls in type(object).__mro__:
+        if name in cls.__dict__.get('__allowed__', ()):
+            return True
+    return False
+
+
+def uncached_getattr(object, name, getattr=getattr):
+    if mro_policy(object, name):
+        return getattr(object, name)
+    raise AttributeError(name)
+
+
+def main(number=500000):
+    ob = Content()
+    cached_getattr = make_cached_getattr(mro_policy)
+    guards = (
+        ('safer_getattr', safer_getattr),
+        ('uncached policy', uncached_getattr),
+        ('cached policy', cached_getattr),
+    )
+    for label, guard in guards:
+        duration = min(timeit.repeat(
+            lambda: guard(ob, 'name'), number=number, repeat=3))
+        print('{0:16} {1:8.3f} us'.format(label, duration / number * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Import time of RestrictedPython (needs Python 3.7+ for -X importtime).
+
+Run it with:
+
+    python benchmarks/bench_import.py
+
+Each statement is run in a fresh interpreter several times, the median of
+the cumulative import time of the RestrictedPython modules is printed.
+"""
+from __future__ import print_function
+
+import os
+import subprocess
+import sys
+
+
+STATEMENTS = [
+    'import RestrictedPython',
+    'from RestrictedPython import compile_restricted_eval',
+    'from RestrictedPython import safe_builtins',
+    'from RestrictedPython import utility_builtins',
+    'from RestrictedPython import PreparedScript',
+]
+
+
+def import_time(statement):
+    """Sum of the cumulative times of the top level imports in us."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    # Measure with cached byte code, like in a deployment.
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    startup = subprocess.check_output(
+        [sys.executable, '-X', 'importtime', '-c', 'pass'],
+        stderr=subprocess.STDOUT, env=env).decode('utf-8')
+    output = subprocess.check_output(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        stderr=subprocess.STDOUT, env=env).decode('utf-8')
+    total = 0
+    for line in output.splitlines()[len(startup.splitlines()):]:
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Only count top level imports, nested ones are part of them.
+        if cumulative.strip().isdigit() and not name.startswith('  '):
+            total += int(cumulative)
+    return total
+
+
+def main(repeat=7):
+    for statement in STATEMENTS:
+        times = sorted(import_time(statement) for i in range(repeat))
+        print('{0:55} {1:8.2f} ms'.format(
+            statement, times[len(times) // 2] / 1000.0))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Augmented assignments through `_inplacevar_` vs. in-place hooks.
+
+Run it with:
+
+    python benchmarks/bench_inplace.py
+
+`inplacevar` is modelled after the implementations of application servers:
+it dispatches on the operator string and checks the type of the target.
+With `inplace_fast_path` it is only called if the target is not an
+immutable number or string.
+"""
+from __future__ import print_function
+from RestrictedPython import PreparedScript
+from RestrictedPython.transformer import RestrictingNodeTransformer
+
+import operator
+import timeit
+
+
+SOURCE = """\
+total = 0
+text = ''
+for item in items:
+    total += item
+    total -= 1
+    text += 'x'
+"""
+
+
+class FastPathTransformer(RestrictingNodeTransformer):
+    inplace_fast_path = True
+
+
+inplace_slots = {
+    '+=': operator.iadd,
+    '-=': operator.isub,
+    '*=': operator.imul,
+    '/=': operator.itruediv,
+    '//=': operator.ifloordiv,
+    '%=': operator.imod,
+    '**=': operator.ipow,
+    '<<=': operator.ilshift,
+    '>>=': operator.irshift,
+    '&=': operator.iand,
+    '^=': operator.ixor,
+    '|=': operator.ior,
+}
+
+
+def inplacevar(op, x, y):
+    if op == '+=' and type(x) in (list, dict, set):
+        raise TypeError('Augmented assignment to containers is not allowed.')
+    return inplace_slots[op](x, y)
+
+
+def main(number=200):
+    items = list(range(1000))
+    guards = {'_inplacevar_': inplacevar}
+    for label, policy in (('inplacevar', RestrictingNodeTransformer),
+                          ('fast path', FastPathTransformer)):
+        script = PreparedScript(SOURCE, policy=policy, guards=guards)
+        duration = min(timeit.repeat(
+            lambda: script.run(items=items), number=number, repeat=3))
+        print('{0:10} {1:8.3f} ms'.format(label, duration / number * 1e3))
+
+
+if __name__ == '__main__':
+    main()
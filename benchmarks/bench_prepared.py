@@ -0,0 +1,72 @@
+"""Per execution cost of `PreparedScript.run` vs. building the globals.
+
+Run it with:
+
+    python benchmarks/bench_prepared.py
+
+The manual variant is what hosts typically do for each execution: merge the
+builtins into a new dict and add the guards.
+"""
+from __future__ import print_function
+from RestrictedPython import compile_restricted_exec
+from RestrictedPython import PreparedScript
+from RestrictedPython.bundles import builtins_bundle
+from RestrictedPython.Eval import default_guarded_getitem
+from RestrictedPython.Eval import default_guarded_getiter
+from RestrictedPython.Guards import full_write_guard
+from RestrictedPython.Guards import guarded_iter_unpack_sequence
+from RestrictedPython.Guards import guarded_unpack_sequence
+from RestrictedPython.Guards import safe_builtins
+from RestrictedPython.Guards import safer_getattr
+from RestrictedPython.Limits import limited_builtins
+from RestrictedPython.PrintCollector import PrintCollector
+from RestrictedPython.Utilities import utility_builtins
+
+import timeit
+
+
+SOURCE = """\
+total = 0
+for item in items:
+    total = total + item
+"""
+
+
+def manual_globals(items):
+    builtins = {}
+    builtins.update(safe_builtins)
+    builtins.update(limited_builtins)
+    builtins.update(utility_builtins)
+    return {
+        '__builtins__': builtins,
+        '_getattr_': safer_getattr,
+        '_getitem_': default_guarded_getitem,
+        '_getiter_': default_guarded_getiter,
+        '_write_': full_write_guard,
+        '_print_': PrintCollector,
+        '_unpack_sequence_': guarded_unpack_sequence,
+        '_iter_unpack_sequence_': guarded_iter_unpack_sequence,
+        'items': items,
+    }
+
+
+def main(number=20000):
+    items = list(range(10))
+    bundle = builtins_bundle('safe', 'limited', 'utility')
+    script = PreparedScript(SOURCE, builtins=bundle.builtins)
+    code = compile_restricted_exec(SOURCE).code
+
+    def run_manual():
+        exec(code, manual_globals(items))
+
+    def run_prepared():
+        script.run(items=items)
+
+    manual = min(timeit.repeat(run_manual, number=number, repeat=3))
+    prepared = min(timeit.repeat(run_prepared, number=number, repeat=3))
+    print('manual: {0:.2f} us  prepared: {1:.2f} us  ({2:.1f}x)'.format(
+        manual / number * 1e6, prepared / number * 1e6, manual / prepared))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Constant slices vs. calling `slice` for each subscript.
+
+Run it with:
+
+    python benchmarks/bench_slices.py
+
+A policy enabling `constant_slices` creates the slice objects for literal
+bounds once per module, the default policy calls `slice` on each subscript.
+"""
+from __future__ import print_function
+from RestrictedPython import compile_restricted_exec
+from RestrictedPython.transformer import RestrictingNodeTransformer
+
+import operator
+import timeit
+
+
+SOURCE = """\
+for item in items:
+    head = item[:2]
+    tail = item[-2:]
+    reverse = item[::-1]
+"""
+
+
+class ConstantSlicesPolicy(RestrictingNodeTransformer):
+
+    constant_slices = True
+
+
+def main(number=200):
+    items = ['abcdef'] * 1000
+    variants = (
+        ('slice()', compile_restricted_exec(SOURCE).code),
+        ('constant', compile_restricted_exec(
+            SOURCE, policy=ConstantSlicesPolicy).code),
+    )
+    for label, code in variants:
+        def run():
+            exec(code, {'__builtins__': {'slice': slice},
+                        '_getitem_': operator.getitem,
+                        '_getiter_': iter,
+                        'items': items})
+        duration = min(timeit.repeat(run, number=number, repeat=3))
+        print('{0:9} {1:8.3f} ms'.format(label, duration / number * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""Compare two benchmark runs and flag significant regressions.
+
+Run it with:
+
+    python benchmarks/compare.py old.json new.json
+
+The files are written by `suite.py --save` or `endtoend.py --save`. The
+samples of each benchmark are compared with Welch's t-test. A change is
+only flagged if it is significant (p < `--alpha`) and larger than
+`--threshold`; memory peaks are deterministic enough to compare them by the
+threshold only. The exit status is 1 if there is a regression, so the tool
+can be used as gate.
+
+The defaults are strict as many benchmarks are tested at once, noisy
+machines still need a higher `--threshold`.
+"""
+from __future__ import division
+from __future__ import print_function
+
+import argparse
+import json
+import math
+import sys
+
+
+def mean(values):
+    return sum(values) / len(values)
+
+
+def variance(values):
+    if len(values) < 2:
+        return 0.0
+    avg = mean(values)
+    return sum((value - avg) ** 2 for value in values) / (len(values) - 1)
+
+
+def _betacf(a, b, x, iterations=200, eps=3e-12):
+    # Continued fraction of the incomplete beta function (modified Lentz).
+    tiny = 1e-300
+    c = 1.0
+    d = 1.0 - (a + b) * x / (a + 1.0)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    result = d
+    for m in range(1, iterations + 1):
+        m2 = 2 * m
+        even = m * (b - m) * x / ((a + m2 - 1) * (a + m2))
+        odd = -(a + m) * (a + b + m) * x / ((a + m2) * (a + m2 + 1))
+        for numerator in (even, odd):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            result *= d * c
+        if abs(d * c - 1.0) < eps:
+            break
+    return result
+
+
+def incomplete_beta(a, b, x):
+    """Regularized incomplete beta function I_x(a, b)."""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+                     + a * math.log(x) + b * math.log(1.0 - x))
+    if x < (a + 1.0) / (a + b + 2.0):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1.0 - x) / b
+
+
+def welch_test(old, new):
+    """Return the two-sided p-value of Welch's t-test of the samples."""
+    old_error = variance(old) / len(old)
+    new_error = variance(new) / len(new)
+    error = old_error + new_error
+    if error == 0.0:
+        return 1.0 if mean(old) == mean(new) else 0.0
+    t = (mean(new) - mean(old)) / math.sqrt(error)
+    df = error ** 2 / (
+        old_error ** 2 / max(len(old) - 1, 1)
+        + new_error ** 2 / max(len(new) - 1, 1))
+    return incomplete_beta(df / 2.0, 0.5, df / (df + t * t))
+
+
+def compare(old, new, alpha=0.01, threshold=0.05):
+    """Compare two result dicts as written by `suite.py` or `endtoend.py`.
+
+    Return a list of (name, old mean, new mean, change, p-value, verdict)
+    for the benchmarks in both. `verdict` is 'regression', 'improvement' or
+    '' for an insignificant change. Memory peaks are named 'memory.<name>'
+    and have no p-value.
+    """
+    rows = []
+    old_benchmarks = old.get('benchmarks', {})
+    for name, samples in sorted(new.get('benchmarks', {}).items()):
+        if name not in old_benchmarks:
+            continue
+        old_mean, new_mean = mean(old_benchmarks[name]), mean(samples)
+        change = new_mean / old_mean - 1
+        p_value = welch_test(old_benchmarks[name], samples)
+        rows.append((name, old_mean, new_mean, change, p_value,
+                     verdict(change, p_value < alpha, threshold)))
+    old_memory = old.get('memory') or {}
+    for name, peak in sorted((new.get('memory') or {}).items()):
+        if old_memory.get(name):
+            change = peak / old_memory[name] - 1
+            rows.append(('memory.' + name, old_memory[name], peak, change,
+                         None, verdict(change, True, threshold)))
+    return rows
+
+
+def verdict(change, significant, threshold):
+    if not significant or abs(change) <= threshold:
+        return ''
+    return 'regression' if change > 0 else 'improvement'
+
+
+def print_rows(rows):
+    """Print the result of `compare` as table."""
+    for name, old_mean, new_mean, change, p_value, flag in rows:
+        print('{0:40} {1:>12.6g} -> {2:>12.6g} {3:+7.1f} % {4:>8} {5}'.format(
+            name, old_mean, new_mean, change * 100,
+            '' if p_value is None else 'p={0:.3f}'.format(p_value), flag))
+    regressions = [row for row in rows if row[5] == 'regression']
+    print('{0} regression(s) in {1} benchmarks'.format(
+        len(regressions), len(rows)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--alpha', type=float, default=0.01,
+                        help='significance level of the t-test')
+    parser.add_argument('--threshold', type=float, default=0.05,
+                        help='minimal relative change to flag')
+    args = parser.parse_args(argv)
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    rows = compare(old, new, args.alpha, args.threshold)
+    print_rows(rows)
+    return 1 if any(row[5] == 'regression' for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""Generated corpus of representative restricted scripts, see `endtoend.py`.
+
+The scripts resemble what Zope's PythonScripts and page templates contain:
+rendering templates, munging data, generating reports, defining classes and
+unpacking nested data, plus template expressions compiled in 'eval' mode.
+The corpus is generated from a seed, so every run measures the same scripts.
+"""
+from collections import namedtuple
+
+import random
+
+
+Script = namedtuple('Script', 'name, kind, mode, source, bindings')
+
+WORDS = ('title', 'price', 'amount', 'label', 'owner', 'status', 'region')
+
+
+def records(rng, size, fields):
+    return [dict((field, rng.randint(0, 100)) for field in fields)
+            for i in range(size)]
+
+
+def template(rng, index):
+    fields = rng.sample(WORDS, 3)
+    cells = ''.join('<td>%s</td>' for field in fields)
+    values = ', '.join("item['{0}']".format(field) for field in fields)
+    source = """\
+rows = []
+for item in items:
+    rows.append('<tr>{cells}</tr>' % ({values}))
+html = '<table>%s</table>' % ''.join(rows)
+""".format(cells=cells, values=values)
+    data = records(rng, rng.randint(20, 80), fields)
+    return source, lambda: {'items': data}
+
+
+def munging(rng, index):
+    key, value = rng.sample(WORDS, 2)
+    source = """\
+groups = {{}}
+for record in records:
+    group = record['{key}'] % {modulo}
+    if group not in groups:
+        groups[group] = []
+    groups[group].append(record['{value}'])
+totals = sorted([(group, sum(values)) for group, values in groups.items()])
+largest = max([total for group, total in totals])
+""".format(key=key, value=value, modulo=rng.randint(3, 10))
+    data = records(rng, rng.randint(50, 200), (key, value))
+    return source, lambda: {'records': data}
+
+
+def report(rng, index):
+    field = rng.choice(WORDS)
+    source = """\
+print('Report', title)
+for number, section in enumerate(sections):
+    print(number, section['name'].upper())
+    for entry in section['entries']:
+        print('  -', entry['{field}'], entry.get('missing', ''))
+result = printed
+""".format(field=field)
+    sections = [{'name': 'section %d' % i,
+                 'entries': records(rng, rng.randint(5, 20), (field,))}
+                for i in range(rng.randint(3, 8))]
+    return source, lambda: {'title': 'report %d' % index,
+                            'sections': sections}
+
+
+def classes(rng, index):
+    shapes = rng.sample(
+        (('Square', 4), ('Triangle', 3), ('Hexagon', 6), ('Octagon', 8)), 3)
+    definitions = ''.join("""
+class {0}(Shape):
+    name = '{0}'
+    sides = {1}
+""".format(name, sides) for name, sides in shapes)
+    source = """\
+class Shape:
+    name = 'Shape'
+    sides = 0
+
+    def area(self, size):
+        return size * size * self.sides
+
+    def describe(self):
+        return '%s with %d sides' % (self.name, self.sides)
+{definitions}
+shapes = [{instances}]
+total = sum([shape.area(size) for size in sizes for shape in shapes])
+names = [shape.describe() for shape in shapes]
+""".format(definitions=definitions,
+           instances=', '.join(name + '()' for name, sides in shapes))
+    sizes = list(range(rng.randint(10, 50)))
+    return source, lambda: {'sizes': sizes}
+
+
+def unpacking(rng, index):
+    depth = rng.randint(2, 4)
+    target = 'e0'
+    for level in range(1, depth):
+        target = '(e{0}, {1})'.format(level, target)
+    names = ['e%d' % level for level in range(depth)]
+
+    def nested(number):
+        value = number
+        for level in range(1, depth):
+            value = (number + level, value)
+        return value
+
+    source = """\
+result = []
+for key, {target} in rows:
+    result.append(key + {total})
+first, rest = result[0], result[1:]
+""".format(target=target, total=' + '.join(names))
+    data = [(number, nested(number)) for number in range(rng.randint(50, 150))]
+    return source, lambda: {'rows': data}
+
+
+def expression(rng, index):
+    key = rng.choice(WORDS)
+    source = rng.choice((
+        "'%s: %s' % (item['{0}'], item.get('title', ''))",
+        "[row['{0}'] for row in rows if row['{0}'] > 50]",
+        "item['{0}'] > 10 and 'high' or 'low'",
+    )).format(key)
+    data = records(rng, 30, WORDS)
+    return source, lambda: {'item': data[0], 'rows': data}
+
+
+GENERATORS = (
+    ('template', 'exec', template),
+    ('munging', 'exec', munging),
+    ('report', 'exec', report),
+    ('classes', 'exec', classes),
+    ('unpacking', 'exec', unpacking),
+    ('expression', 'eval', expression),
+)
+
+
+def generate(per_kind=4, seed=0):
+    """Return the list of `Script`s of the corpus."""
+    rng = random.Random(seed)
+    corpus = []
+    for kind, mode, generator in GENERATORS:
+        for index in range(per_kind):
+            source, bindings = generator(rng, index)
+            corpus.append(Script(
+                '{0}-{1}'.format(kind, index), kind, mode, source, bindings))
+    return corpus
@@ -0,0 +1,106 @@
+"""End-to-end compile and execution throughput of the script corpus.
+
+Run it with:
+
+    python benchmarks/endtoend.py --save new.json
+    python benchmarks/compare.py old.json new.json
+
+Each benchmark `e2e.<script>` compiles one script of `corpus.py` with
+`PreparedScript` and runs it, like a host handling a request for a script
+it did not cache. On Python 3 the peak of the memory allocated by compiling
+and running each script is measured with `tracemalloc` as well.
+"""
+from __future__ import division
+from __future__ import print_function
+from RestrictedPython import PreparedScript
+
+import argparse
+import compare
+import corpus
+import json
+import platform
+import suite
+import timeit
+import workloads
+
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+
+def compile_and_run(script):
+    prepared = PreparedScript(
+        script.source, script.name, mode=script.mode,
+        builtins=workloads.BUILTINS)
+    return prepared.run(**script.bindings())
+
+
+def peak_memory(script):
+    """Return the peak of the bytes allocated while compiling and running."""
+    compile_and_run(script)  # warm up caches, e.g. of the guards
+    tracemalloc.start()
+    try:
+        compile_and_run(script)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(scripts, samples=10, min_time=0.05):
+    """Return the results of the `scripts` as dict like `suite.py --save`."""
+    funcs = [(script, lambda script=script: compile_and_run(script))
+             for script in scripts]
+    loops = [suite.calibrate(func, min_time) for script, func in funcs]
+    benchmarks = dict(('e2e.' + script.name, []) for script in scripts)
+    # The samples of the scripts are taken in turns, so a slow down of the
+    # machine affects all of them instead of a few scripts.
+    for sample in range(samples):
+        for (script, func), number in zip(funcs, loops):
+            benchmarks['e2e.' + script.name].append(
+                timeit.timeit(func, number=number) / number)
+    memory = {}
+    if tracemalloc is not None:
+        for script in scripts:
+            memory['e2e.' + script.name] = peak_memory(script)
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'benchmarks': benchmarks,
+        'memory': memory,
+    }
+
+
+def report(results):
+    benchmarks = results['benchmarks']
+    for name, samples in sorted(benchmarks.items()):
+        peak = results['memory'].get(name)
+        print('{0:28} {1:>10} {2:>12}'.format(
+            name, suite.format_time(compare.mean(samples)),
+            '' if peak is None else '{0} KiB'.format(peak // 1024)))
+    total = sum(compare.mean(samples) for samples in benchmarks.values())
+    print('{0} scripts, {1:.0f} scripts/s'.format(
+        len(benchmarks), len(benchmarks) / total))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--per-kind', type=int, default=4,
+                        help='number of scripts per kind')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--samples', type=int, default=10)
+    parser.add_argument('--min-time', type=float, default=0.05)
+    parser.add_argument('--save', help='write the results to this file')
+    args = parser.parse_args(argv)
+
+    results = run(corpus.generate(args.per_kind, args.seed),
+                  args.samples, args.min_time)
+    report(results)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Benchmark suite for the compile and execution overhead of restricted code.
+
+Run it with:
+
+    python benchmarks/suite.py
+    python benchmarks/suite.py --save benchmarks/baselines/py37.json
+    python benchmarks/suite.py --compare benchmarks/baselines/py37.json
+
+It needs no packages besides RestrictedPython. The benchmarks are
+
+compile.<mode>.<workload> -- `compile_restricted_*` for the modes 'exec',
+    'function', 'eval' and 'single' with the sources of `workloads.py`
+exec.plain.<workload> -- executing the normally compiled script
+exec.restricted.<workload> -- executing the restricted script with the
+    globals of `PreparedScript`
+
+Like pyperf each benchmark is calibrated to loops taking at least
+`--min-time` seconds, a sample is the time per loop. `--save` writes the
+samples as JSON, `--compare` prints the change against such a file, see
+`compare.py`. The files in `benchmarks/baselines` are the results of the
+commit which added them.
+"""
+from __future__ import division
+from __future__ import print_function
+from RestrictedPython import compile_restricted_eval
+from RestrictedPython import compile_restricted_exec
+from RestrictedPython import compile_restricted_function
+from RestrictedPython import compile_restricted_single
+from RestrictedPython import PreparedScript
+
+import __future__
+import argparse
+import compare
+import fnmatch
+import io
+import json
+import math
+import platform
+import sys
+import timeit
+import workloads
+
+
+mean = compare.mean
+
+
+def calibrate(func, min_time):
+    """Return the number of loops of `func` taking at least `min_time`."""
+    loops = 1
+    while True:
+        if timeit.timeit(func, number=loops) >= min_time:
+            return loops
+        loops *= 2
+
+
+def measure(func, samples=5, min_time=0.1):
+    """Return `samples` times per loop of `func` in seconds."""
+    loops = calibrate(func, min_time)
+    return [duration / loops
+            for duration in timeit.repeat(func, number=loops, repeat=samples)]
+
+
+def compile_benchmarks():
+    for name, (source, bindings) in sorted(workloads.SCRIPTS.items()):
+        yield 'compile.exec.' + name, (
+            lambda source=source: compile_restricted_exec(source))
+        yield 'compile.function.' + name, (
+            lambda source=source: compile_restricted_function(
+                '', source, 'script'))
+    for name, source in sorted(workloads.EXPRESSIONS.items()):
+        yield 'compile.eval.' + name, (
+            lambda source=source: compile_restricted_eval(source))
+    for name, source in sorted(workloads.STATEMENTS.items()):
+        yield 'compile.single.' + name, (
+            lambda source=source: compile_restricted_single(source))
+
+
+def plain_print(*args, **kw):
+    kw['file'] = io.StringIO() if sys.version_info >= (3,) else io.BytesIO()
+    print(*args, **kw)
+
+
+def exec_benchmarks():
+    flags = __future__.print_function.compiler_flag
+    for name, (source, bindings) in sorted(workloads.SCRIPTS.items()):
+        code = compile(source, name, 'exec', flags, True)
+
+        def run_plain(code=code, bindings=bindings):
+            glb = {'print': plain_print, 'printed': ''}
+            glb.update(bindings())
+            exec(code, glb)
+
+        script = PreparedScript(source, name, builtins=workloads.BUILTINS)
+
+        def run_restricted(script=script, bindings=bindings):
+            script.run(**bindings())
+
+        yield 'exec.plain.' + name, run_plain
+        yield 'exec.restricted.' + name, run_restricted
+
+
+def run(pattern='*', samples=5, min_time=0.1):
+    """Return a dict: benchmark name -> samples, for matching names."""
+    results = {}
+    for benchmarks in (compile_benchmarks(), exec_benchmarks()):
+        for name, func in benchmarks:
+            if fnmatch.fnmatch(name, pattern):
+                results[name] = measure(func, samples, min_time)
+    return results
+
+
+def format_time(seconds):
+    for unit, factor in (('s', 1), ('ms', 1e3), ('us', 1e6)):
+        if seconds * factor >= 1:
+            return '{0:.2f} {1}'.format(seconds * factor, unit)
+    return '{0:.0f} ns'.format(seconds * 1e9)
+
+
+def report(results):
+    for name, values in sorted(results.items()):
+        print('{0:36} {1:>10} +- {2:>10}'.format(
+            name, format_time(mean(values)),
+            format_time(math.sqrt(compare.variance(values)))))
+    for name in sorted(results):
+        if name.startswith('exec.restricted.'):
+            plain = results.get('exec.plain.' + name[16:])
+            if plain:
+                print('restricted/plain {0:20} {1:.2f}x'.format(
+                    name[16:], mean(results[name]) / mean(plain)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--bench', default='*', help='glob pattern of the benchmark names')
+    parser.add_argument('--samples', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.1)
+    parser.add_argument('--save', help='write the results to this file')
+    parser.add_argument('--compare', help='compare with results in file')
+    args = parser.parse_args(argv)
+
+    results = run(args.bench, args.samples, args.min_time)
+    report(results)
+    if args.compare:
+        with open(args.compare) as f:
+            compare.print_rows(
+                compare.compare(json.load(f), {'benchmarks': results}))
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'implementation': platform.python_implementation(),
+                'benchmarks': results,
+            }, f, indent=1, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Workloads of the benchmark suite, see `suite.py`.
+
+Each script workload stresses one kind of code the policy rewrites into
+guard calls. The bindings are created by a factory per execution, so no
+run sees the results of an earlier one.
+"""
+from RestrictedPython.bundles import builtins_bundle
+
+
+class Address(object):
+
+    def __init__(self, city):
+        self.city = city
+
+
+class Customer(object):
+
+    def __init__(self, name, city):
+        self.name = name
+        self.address = Address(city)
+
+
+class Order(object):
+
+    def __init__(self, number):
+        self.price = number % 17
+        self.quantity = number % 5 + 1
+        self.customer = Customer('customer %d' % number, 'city %d' % number)
+
+
+ORDERS = [Order(number) for number in range(200)]
+ROWS = [{'id': number,
+         'values': [number, number * 2, number * 3],
+         'meta': {'key': 'row-%d' % number}}
+        for number in range(200)]
+TRIPLES = [((number, -number), (number, number + 1, number + 2))
+           for number in range(200)]
+NUMBERS = list(range(200))
+
+# Hosts like Zope's PythonScripts add a few harmless builtins to the
+# predefined sets.
+BUILTINS = dict(
+    builtins_bundle('safe', 'limited', 'utility').builtins,
+    sum=sum, min=min, max=max, sorted=sorted, enumerate=enumerate,
+    dict=dict)
+
+
+SCRIPTS = {
+    'attributes': ("""\
+total = 0
+for order in orders:
+    total = total + order.price * order.quantity
+    name = order.customer.name.upper()
+    city = order.customer.address.city
+""", lambda: {'orders': ORDERS}),
+
+    'subscripts': ("""\
+result = []
+for row in rows:
+    result.append(row['id'] + row['values'][0] + row['values'][-1])
+    key = row['meta']['key']
+""", lambda: {'rows': ROWS}),
+
+    'unpacking': ("""\
+pairs = []
+for (a, b), c in triples:
+    x, y = b, a
+    first, second, third = c
+    pairs.append((x, y, first, third))
+""", lambda: {'triples': TRIPLES}),
+
+    'print': ("""\
+for number in numbers:
+    print(number, 'is', number * 2)
+result = printed
+""", lambda: {'numbers': NUMBERS}),
+
+    'comprehensions': ("""\
+squares = [x * x for x in numbers if x % 3]
+pairs = dict((x, y) for x, y in zip(numbers, numbers[1:]))
+nested = [[y for y in range(x % 5)] for x in numbers]
+total = sum(x for x in numbers)
+""", lambda: {'numbers': NUMBERS}),
+}
+
+
+# Sources for compiling in the modes 'eval' and 'single'.
+EXPRESSIONS = {
+    'attributes': 'order.customer.address.city + order.customer.name',
+    'subscripts': 'row["values"][0] + row["meta"]["key"][1:-1]',
+    'comprehensions': '[x.price for x in orders if x.quantity > 2]',
+}
+
+STATEMENTS = {
+    'assignment': 'a, b = order.price, row["id"]',
+}
@@ -17,9 +17,12 @@
 
 from RestrictedPython import _compat
 
+import weakref
+
 
 if _compat.IS_PY2:
     import __builtin__ as builtins
+    from types import InstanceType as _InstanceType
 else:
     # Do not attempt to use this package on Python2.7 as there
     # might be backports for this package such as future.
@@ -272,6 +275,223 @@ def safer_getattr(object, name, getattr=getattr):
 safe_builtins['_getattr_'] = safer_getattr
 
 
+def safer_callattr(*args, **kw):
+    """`_callattr_` implementation with the check of `safer_getattr`.
+
+    It is used for method calls like 'a.b(x)' (see
+    `RestrictingNodeTransformer.call_attributes`) and calls the method
+    without a separate call of the guard. The object and the name are only
+    taken positionally, so the method can have keyword arguments of any
+    name.
+    """
+    object, name = args[0], args[1]
+    if name == 'format' and isinstance(object, _compat.basestring):
+        raise NotImplementedError(
+            'Using format() on a %s is not safe.' % object.__class__.__name__)
+    return getattr(object, name)(*args[2:], **kw)
+
+
+def make_callattr(getattr_):
+    """Create a `_callattr_` calling the method returned by `getattr_`."""
+    def callattr(*args, **kw):
+        return getattr_(args[0], args[1])(*args[2:], **kw)
+    return callattr
+
+
+def safer_getattr_path(object, names, getattr=getattr):
+    """`_getattr_path_` implementation applying `safer_getattr` per step.
+
+    It is used for fused attribute chains like 'a.b.c' (see
+    `RestrictingNodeTransformer.fuse_access_chains`). The check is inlined
+    to need only one call for the whole chain.
+    """
+    for name in names:
+        # Comparing the name first is cheaper for the usual case.
+        if name == 'format' and isinstance(object, _compat.basestring):
+            raise NotImplementedError(
+                'Using format() on a %s is not safe.' %
+                object.__class__.__name__)
+        object = getattr(object, name)
+    return object
+
+
+def safer_getpath(object, kinds, keys, getattr=getattr):
+    """`_getpath_` implementation for mixed access chains like 'a.b[i]'.
+
+    Attribute steps (kind 'a') are checked like in `safer_getattr`, item
+    steps (kind 'i') are not restricted like in
+    `RestrictedPython.Eval.default_guarded_getitem`.
+    """
+    step = 0
+    for key in keys:
+        if kinds[step] == 'i':
+            object = object[key]
+        elif key == 'format' and isinstance(object, _compat.basestring):
+            raise NotImplementedError(
+                'Using format() on a %s is not safe.' %
+                object.__class__.__name__)
+        else:
+            object = getattr(object, key)
+        step += 1
+    return object
+
+
+def make_getattr_path(getattr_):
+    """Create a `_getattr_path_` applying the guard `getattr_` per step."""
+    def getattr_path(object, names):
+        for name in names:
+            object = getattr_(object, name)
+        return object
+    return getattr_path
+
+
+def make_getpath(getattr_, getitem_):
+    """Create a `_getpath_` implementation for mixed access chains.
+
+    `kinds` contains an 'a' for each attribute step, which is guarded by
+    `getattr_`, and an 'i' for each item step guarded by `getitem_`.
+    """
+    def getpath(object, kinds, keys):
+        for kind, key in zip(kinds, keys):
+            if kind == 'a':
+                object = getattr_(object, key)
+            else:
+                object = getitem_(object, key)
+        return object
+    return getpath
+
+
+def safer_getattr_policy(object, name):
+    """The policy of `safer_getattr` for use with `GuardDecisionCache`."""
+    return not (isinstance(object, _compat.basestring) and name == 'format')
+
+
+class GuardDecisionCache(object):
+    """Memoize the allow/deny decisions of an attribute access policy.
+
+    `policy(object, name)` returns a true value if accessing `name` on
+    `object` is allowed. Its decision must only depend on the type of
+    `object` and on `name`, as it is cached per `(type(object), name)`.
+
+    The types are referenced weakly, so the cache does not keep classes
+    alive. When the policy changes `invalidate` has to be called.
+    """
+
+    def __init__(self, policy):
+        self.policy = policy
+        # id(type) -> (weak reference to the type, {name: decision})
+        self._decisions = {}
+
+    def allowed(self, object, name):
+        """Check whether accessing `name` on `object` is allowed."""
+        try:
+            return self._decisions[id(type(object))][1][name]
+        except KeyError:
+            return self._decide(object, name)
+
+    def _decide(self, object, name):
+        decision = bool(self.policy(object, name))
+        cls = type(object)
+        if _compat.IS_PY2 and cls is _InstanceType:
+            # All old-style instances share one type, so their decisions
+            # cannot be cached.
+            return decision
+        key = id(cls)
+        entry = self._decisions.get(key)
+        if entry is None or entry[0]() is not cls:
+            entry = (weakref.ref(cls, self._forget_callback(key)), {})
+            self._decisions[key] = entry
+        entry[1][name] = decision
+        return decision
+
+    def _forget_callback(self, key):
+        decisions = self._decisions
+
+        def forget(ref):
+            entry = decisions.get(key)
+            if entry is not None and entry[0] is ref:
+                del decisions[key]
+        return forget
+
+    def invalidate(self, cls=None):
+        """Forget the decisions for `cls` or for all types."""
+        if cls is None:
+            self._decisions.clear()
+        else:
+            self._decisions.pop(id(cls), None)
+
+
+def make_cached_getattr(policy, error=AttributeError):
+    """Create a `_getattr_` implementation with a cached `policy`.
+
+    A denied access raises `error`. The `GuardDecisionCache` is available
+    as `cache` attribute of the returned function.
+    """
+    cache = GuardDecisionCache(policy)
+    allowed = cache.allowed
+
+    def guarded_getattr(object, name, getattr=getattr):
+        if allowed(object, name):
+            return getattr(object, name)
+        raise error(
+            'Access to "{name}" of {cls} objects is not allowed.'.format(
+                name=name, cls=type(object).__name__))
+
+    guarded_getattr.cache = cache
+    return guarded_getattr
+
+
+def make_site_getattr(policy=safer_getattr_policy, error=AttributeError):
+    """Create a `_getattr_site_` implementation with inline caches.
+
+    It is the guard called by policies with `call_site_ids` enabled. Each
+    call site remembers the last type and attribute name the policy allowed,
+    so `policy` is only asked again if the site sees another type or name.
+    The site IDs are only unique within one compiled code object, comparing
+    the name as well keeps a function shared by several code objects safe,
+    though the sites of different code then evict each other. A denied
+    access raises `error`.
+    """
+    # site ID -> (type, name) the policy allowed the access for
+    sites = {}
+
+    def guarded_getattr(object, name, site, getattr=getattr):
+        cls = type(object)
+        entry = sites.get(site)
+        if entry is None or entry[0] is not cls or entry[1] != name:
+            if not policy(object, name):
+                raise error(
+                    'Access to "{name}" of {cls} objects is not '
+                    'allowed.'.format(name=name, cls=cls.__name__))
+            if not (_compat.IS_PY2 and cls is _InstanceType):
+                sites[site] = (cls, name)
+        return getattr(object, name)
+
+    guarded_getattr.sites = sites
+    return guarded_getattr
+
+
+def ignore_site(guard):
+    """Adapt `guard` to be used as site variant ignoring the call site ID.
+
+    E.g. `ignore_site(default_guarded_getitem)` can be used as
+    `_getitem_site_`.
+    """
+    def site_guard(*args):
+        return guard(*args[:-1])
+    return site_guard
+
+
+# `_inplace_fast_types_` for policies with `inplace_fast_path` enabled:
+# immutable types without in-place methods, the augmented assignment of
+# those is applied directly instead of calling `_inplacevar_`.
+if _compat.IS_PY2:
+    inplace_fast_types = frozenset([
+        bool, int, long, float, complex, str, unicode])  # NOQA: F821
+else:
+    inplace_fast_types = frozenset([bool, int, float, complex, str, bytes])
+
+
 def guarded_iter_unpack_sequence(it, spec, _getiter_):
     """Protect sequence unpacking of targets in a 'for loop'.
 
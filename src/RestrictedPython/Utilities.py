@@ -11,9 +11,13 @@
 #
 ##############################################################################
 
+from RestrictedPython._compat import IS_PY2
+
+import importlib
 import math
 import random
 import string
+import sys
 
 
 utility_builtins = {}
@@ -25,11 +29,60 @@ utility_builtins['whrandom'] = random
 utility_builtins['set'] = set
 utility_builtins['frozenset'] = frozenset
 
-try:
-    import DateTime
-    utility_builtins['DateTime'] = DateTime.DateTime  # pragma: no cover
-except ImportError:
-    pass
+
+class LazyImport(object):
+    """Proxy for an object of a module which is imported on first use.
+
+    It forwards calls, attribute access and `isinstance` checks.
+    """
+
+    def __init__(self, module, name):
+        self.__dict__['_lazy_spec'] = (module, name)
+
+    def _lazy_object(self):
+        try:
+            return self.__dict__['_lazy_value']
+        except KeyError:
+            module, name = self._lazy_spec
+            ob = getattr(importlib.import_module(module), name)
+            self.__dict__['_lazy_value'] = ob
+            return ob
+
+    def __call__(self, *args, **kw):
+        return self._lazy_object()(*args, **kw)
+
+    def __getattr__(self, name):
+        return getattr(self._lazy_object(), name)
+
+    def __instancecheck__(self, instance):
+        return isinstance(instance, self._lazy_object())
+
+    def __subclasscheck__(self, subclass):
+        return issubclass(subclass, self._lazy_object())
+
+    def __repr__(self):
+        return '<LazyImport {0}.{1}>'.format(*self._lazy_spec)
+
+
+def module_available(name):
+    """Check whether the top level module `name` could be imported."""
+    if IS_PY2:
+        import imp
+        try:
+            imp.find_module(name)
+        except ImportError:
+            return False
+        return True
+    import importlib.util
+    return importlib.util.find_spec(name) is not None
+
+
+if module_available('DateTime'):  # pragma: no cover
+    if 'DateTime' in sys.modules:
+        utility_builtins['DateTime'] = sys.modules['DateTime'].DateTime
+    else:
+        # Importing DateTime is expensive, so it is done on first use.
+        utility_builtins['DateTime'] = LazyImport('DateTime', 'DateTime')
 
 
 def same_type(arg1, *args):
@@ -12,30 +12,82 @@
 ##############################################################################
 """RestrictedPython package."""
 
-# flake8: NOQA: E401
-
 # This is a file to define public API in the base namespace of the package.
-# use: isort:skip to supress all isort related warnings / errors,
-# as this file should be logically grouped imports
+# The names are imported lazily on first access (PEP 562), so e.g. using
+# `compile_restricted_eval` does not import the builtins modules.
+# Python versions without module `__getattr__` import them eagerly.
 
-# compile_restricted methods:
-from RestrictedPython.compile import compile_restricted  # isort:skip
-from RestrictedPython.compile import compile_restricted_eval  # isort:skip
-from RestrictedPython.compile import compile_restricted_exec  # isort:skip
-from RestrictedPython.compile import compile_restricted_function  # isort:skip
-from RestrictedPython.compile import compile_restricted_single  # isort:skip
+from RestrictedPython._compat import IS_PY37_OR_GREATER
+# Importing the sub module `PrintCollector` sets it as package attribute,
+# so the class has to be imported eagerly to be not shadowed by the module.
+from RestrictedPython.PrintCollector import PrintCollector  # NOQA: F401
 
-# predefined builtins
-from RestrictedPython.Guards import safe_builtins  # isort:skip
-from RestrictedPython.Limits import limited_builtins  # isort:skip
-from RestrictedPython.Utilities import utility_builtins  # isort:skip
 
-# Helper Methods
-from RestrictedPython.PrintCollector import PrintCollector  # isort:skip
-from RestrictedPython.compile import CompileResult  # isort:skip
+_public_api = {
+    # compile_restricted methods:
+    'compile_restricted': 'RestrictedPython.compile',
+    'compile_restricted_eval': 'RestrictedPython.compile',
+    'compile_restricted_exec': 'RestrictedPython.compile',
+    'compile_restricted_function': 'RestrictedPython.compile',
+    'compile_restricted_single': 'RestrictedPython.compile',
 
-# Policy
-from RestrictedPython.transformer import RestrictingNodeTransformer  # isort:skip
+    # predefined builtins
+    'safe_builtins': 'RestrictedPython.Guards',
+    'limited_builtins': 'RestrictedPython.Limits',
+    'utility_builtins': 'RestrictedPython.Utilities',
 
-#
-from RestrictedPython.Eval import RestrictionCapableEval
+    # Helper Methods
+    'CompileResult': 'RestrictedPython.compile',
+    'PreparedScript': 'RestrictedPython.prepared',
+
+    # Policy
+    'RestrictingNodeTransformer': 'RestrictedPython.transformer',
+
+    #
+    'RestrictionCapableEval': 'RestrictedPython.Eval',
+}
+
+# Sub modules which used to be available as attributes of the package after
+# `import RestrictedPython`.
+_submodules = frozenset([
+    'compile',
+    'transformer',
+    'names',
+    'prepared',
+    'Guards',
+    'Limits',
+    'Utilities',
+    'Eval',
+])
+
+
+def _import(module_name):
+    # `__import__` (in contrast to `importlib`) is seen by -X importtime.
+    return __import__(module_name, None, None, ['__name__'])
+
+
+def _load(name):
+    if name in _public_api:
+        value = getattr(_import(_public_api[name]), name)
+    elif name in _submodules:
+        value = _import('RestrictedPython.' + name)
+    else:
+        raise AttributeError(
+            "module 'RestrictedPython' has no attribute '{0}'".format(name))
+    globals()[name] = value
+    return value
+
+
+# `from RestrictedPython import *` loads the whole public API.
+__all__ = sorted(_public_api) + ['PrintCollector']
+
+
+if IS_PY37_OR_GREATER:
+    def __getattr__(name):
+        return _load(name)
+
+    def __dir__():
+        return sorted(set(globals()) | set(_public_api) | _submodules)
+else:  # pragma: no cover
+    for _name in _public_api:
+        _load(_name)
@@ -1,4 +1,3 @@
-import platform
 import sys
 
 
@@ -15,4 +14,49 @@ if IS_PY2:
 else:
     basestring = str
 
-IS_CPYTHON = platform.python_implementation() == 'CPython'
+if IS_PY2:
+    import platform
+    IS_CPYTHON = platform.python_implementation() == 'CPython'
+else:
+    # Importing `platform` is expensive in Python 3.
+    IS_CPYTHON = sys.implementation.name == 'cpython'
+
+if IS_PY2:
+    from collections import Mapping
+
+    class MappingProxyType(Mapping):
+        """Read-only view of a mapping like `types.MappingProxyType`."""
+
+        def __init__(self, mapping):
+            self._mapping = mapping
+
+        def __getitem__(self, key):
+            return self._mapping[key]
+
+        def __iter__(self):
+            return iter(self._mapping)
+
+        def __len__(self):
+            return len(self._mapping)
+
+        def __contains__(self, key):
+            return key in self._mapping
+
+        def copy(self):
+            return self._mapping.copy()
+
+        def __repr__(self):
+            return 'mappingproxy({0!r})'.format(self._mapping)
+else:
+    from types import MappingProxyType  # NOQA: F401
+
+if IS_PY2:
+    # `time.clock` is the processor time on Unix.
+    from time import clock as process_time  # NOQA: F401
+    from time import time as perf_counter  # NOQA: F401
+    # Python 2 has no monotonic clock in the standard library.
+    from time import time as monotonic  # NOQA: F401
+else:
+    from time import monotonic  # NOQA: F401
+    from time import perf_counter  # NOQA: F401
+    from time import process_time  # NOQA: F401
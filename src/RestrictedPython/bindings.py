@@ -0,0 +1,80 @@
+##############################################################################
+#
+# Copyright (c) 2018 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE
+#
+##############################################################################
+"""Build the globals for restricted code from the names it really uses."""
+
+
+class LazyGlobals(object):
+    """Materialize only the globals a compiled script references.
+
+    Hosts register the globals they are able to provide, either as a plain
+    value or as a factory which is called without arguments. `bind` uses the
+    name analysis of a `CompileResult` (`CompileResult.names`) to build a
+    globals dict which only contains the names the code needs, so expensive
+    objects are only constructed for the scripts using them.
+
+    Each factory is called at most once per `bind` call, even if it is
+    registered for more than one name.
+    """
+
+    def __init__(self, factories=None, values=None, builtins=None):
+        self.factories = dict(factories or {})
+        self.values = dict(values or {})
+        self.builtins = builtins
+
+    def register(self, name, factory):
+        """Register a factory to create the global `name`."""
+        self.factories[name] = factory
+
+    def required_names(self, result):
+        """Return the global names the code of `result` may need.
+
+        Without a name analysis (e.g. compiled without a policy) all names
+        known to this instance are returned.
+        """
+        names = result.names
+        if names is None:
+            return set(self.factories).union(self.values)
+        return names.free_globals | names.guards
+
+    def bind(self, result, bindings=None):
+        """Create a new globals dict for one execution of `result.code`.
+
+        bindings -- mapping of globals which are already known for this
+            execution. They are always added and take precedence over the
+            registered values and factories.
+        """
+        glb = {}
+        if self.builtins is not None:
+            glb['__builtins__'] = self.builtins
+        if bindings:
+            glb.update(bindings)
+
+        created = {}
+        factories = self.factories
+        values = self.values
+        for name in self.required_names(result):
+            if name in glb:
+                continue
+            if name in values:
+                glb[name] = values[name]
+                continue
+            factory = factories.get(name)
+            if factory is None:
+                # Probably a builtin or a name the host does not provide,
+                # executing the code will raise a NameError if needed.
+                continue
+            key = id(factory)
+            if key not in created:
+                created[key] = factory()
+            glb[name] = created[key]
+        return glb
@@ -0,0 +1,87 @@
+##############################################################################
+#
+# Copyright (c) 2018 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE
+#
+##############################################################################
+"""Cached combinations of the predefined builtins.
+
+Hosts often merge `safe_builtins`, `limited_builtins` and `utility_builtins`
+into a new dict for each execution of restricted code. A bundle does this
+merge once and shares the result between all executions:
+
+    >>> from RestrictedPython.bundles import builtins_bundle
+    >>> bundle = builtins_bundle('safe', 'limited', 'utility')
+    >>> glb = {'__builtins__': bundle.builtins}
+
+The shared dict must not be modified. Per execution additions belong into
+the globals, which take precedence over the builtins.
+
+The bundles are computed from the sets at the time of the first request. If
+a set is extended afterwards, `clear_bundles` has to be called.
+"""
+
+from RestrictedPython._compat import MappingProxyType
+from RestrictedPython.Guards import safe_builtins
+from RestrictedPython.Limits import limited_builtins
+from RestrictedPython.Utilities import utility_builtins
+
+
+# Names of the builtins sets which can be combined into a bundle.
+builtins_sets = {
+    'safe': safe_builtins,
+    'limited': limited_builtins,
+    'utility': utility_builtins,
+}
+
+_bundles = {}
+
+
+class BuiltinsBundle(object):
+    """A merged set of builtins.
+
+    names -- the names of the merged sets, later ones take precedence.
+    builtins -- the merged dict, to be used as `__builtins__`.
+    view -- a read-only view of `builtins`.
+    """
+
+    __slots__ = ('names', 'builtins', 'view')
+
+    def __init__(self, names, builtins):
+        self.names = names
+        self.builtins = builtins
+        self.view = MappingProxyType(builtins)
+
+    def copy(self):
+        """Return a private copy of the builtins which may be modified."""
+        return self.builtins.copy()
+
+    def __repr__(self):
+        return '<BuiltinsBundle {0}>'.format(', '.join(self.names))
+
+
+def builtins_bundle(*names):
+    """Return the (cached) `BuiltinsBundle` merging the sets in `names`.
+
+    The names are keys of `builtins_sets`, a `KeyError` is raised for an
+    unknown name.
+    """
+    bundle = _bundles.get(names)
+    if bundle is None:
+        merged = {}
+        for name in names:
+            merged.update(builtins_sets[name])
+        # setdefault keeps the first bundle if threads race here.
+        bundle = _bundles.setdefault(names, BuiltinsBundle(names, merged))
+    return bundle
+
+
+def clear_bundles():
+    """Forget all bundles, e.g. after changing one of the sets."""
+    _bundles.clear()
@@ -0,0 +1,184 @@
+##############################################################################
+#
+# Copyright (c) 2018 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE
+#
+##############################################################################
+"""Limits for restricted code compiled with `step_checkpoints`.
+
+A policy with `step_checkpoints` enabled calls `_tick_()` at the start of
+each iteration of loops and comprehensions and of each function call.
+`StepBudget` provides a `_tick_` which raises `StepBudgetExceeded` after
+`limit` steps:
+
+    >>> from RestrictedPython import PreparedScript
+    >>> from RestrictedPython import RestrictingNodeTransformer
+    >>> from RestrictedPython.checkpoints import StepBudget
+    >>> class CheckpointPolicy(RestrictingNodeTransformer):
+    ...     step_checkpoints = True
+    >>> script = PreparedScript(
+    ...     'while True:\\n    pass', 'loop.py', policy=CheckpointPolicy)
+    >>> budget = StepBudget(limit=10000)
+    >>> script.run(**budget.bindings())  # doctest: +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    StepBudgetExceeded: More than 10000 steps.
+    >>> budget.steps
+    10000
+
+`tick` is no Python function: the steps are counted by C iterators and
+Python code only runs every `check_every` steps to `check` the budget. The
+limit is exact nevertheless. Subclasses can override `check` to enforce
+other limits at the same points.
+
+Once raised, the exception is raised again at every further checkpoint, so
+a script catching it cannot continue to loop. A budget is meant for one
+execution at a time, `reset` starts counting from zero.
+
+`Deadline` is a budget which also stops the code at a wall clock deadline
+or when `cancel` is called, e.g. by another thread:
+
+    >>> from RestrictedPython.checkpoints import Deadline
+    >>> deadline = Deadline(timeout=0.05)
+    >>> script.run(**deadline.bindings())  # doctest: +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    DeadlineExceeded: The deadline of 0.05 seconds passed.
+
+Both are checked every `check_every` steps. So the code stops within
+`check_every` loop iterations or function calls after the deadline or the
+cancellation, plus the time of the longest call between two checkpoints
+(e.g. of `sorted` on a large list), which checkpoints cannot interrupt.
+"""
+
+from functools import partial
+from itertools import chain
+from itertools import repeat
+from RestrictedPython._compat import IS_PY2
+from RestrictedPython._compat import monotonic
+
+
+class StepBudgetExceeded(Exception):
+    """The restricted code ran more steps than its budget allows."""
+
+
+class DeadlineExceeded(Exception):
+    """The restricted code ran past its deadline."""
+
+
+class ExecutionCancelled(Exception):
+    """The execution of the restricted code was cancelled."""
+
+
+def no_checkpoint():
+    """Default `_tick_` of `PreparedScript`, it does not limit anything."""
+
+
+def _raise(error):
+    # Do not let the traceback grow with each raise.
+    error.__traceback__ = None
+    raise error
+
+
+class StepBudget(object):
+    """Count the checkpoints of restricted code and limit them.
+
+    limit -- the maximal number of steps (`_tick_` calls), `None` for no
+        limit
+    check_every -- `check` is called before each chunk of this many steps
+    """
+
+    def __init__(self, limit=None, check_every=1000):
+        self.limit = limit
+        self.check_every = check_every
+        self.reset()
+
+    def reset(self):
+        """Start counting from zero with a new `tick`."""
+        self._granted = 0
+        self._chunk = repeat(None, 0)
+        ticks = chain.from_iterable(self._chunks())
+        self.tick = ticks.next if IS_PY2 else ticks.__next__
+
+    def bindings(self):
+        """Return the globals for an execution using this budget."""
+        return {'_tick_': self.tick}
+
+    @property
+    def steps(self):
+        """The number of steps so far."""
+        return self._granted - self._chunk.__length_hint__()
+
+    def check(self):
+        """Raise an exception to stop the execution.
+
+        Called before the first step and after each `check_every` steps. It
+        raises `StepBudgetExceeded` if the limit is reached.
+        """
+        if self.limit is not None and self._granted >= self.limit:
+            raise StepBudgetExceeded(
+                'More than {0} steps.'.format(self.limit))
+
+    def _chunks(self):
+        # Yield iterators, each of their items is one step.
+        while True:
+            try:
+                self.check()
+            except Exception as error:
+                yield iter(partial(_raise, error), None)
+            size = self.check_every
+            if self.limit is not None:
+                size = min(size, self.limit - self._granted)
+            self._chunk = repeat(None, size)
+            self._granted += size
+            yield self._chunk
+
+
+class Deadline(StepBudget):
+    """Stop restricted code at a deadline or when cancelled.
+
+    timeout -- seconds from the creation (or `reset`) to the deadline,
+        `None` for no deadline
+    limit -- the maximal number of steps like for `StepBudget`
+    check_every -- the deadline and the cancellation are checked every
+        this many steps
+    clock -- a monotonic clock returning seconds
+    """
+
+    def __init__(self, timeout=None, limit=None, check_every=100,
+                 clock=monotonic):
+        self.timeout = timeout
+        self.clock = clock
+        super(Deadline, self).__init__(limit, check_every)
+
+    def reset(self):
+        """Start counting from zero and set the deadline from now."""
+        self.deadline = None
+        if self.timeout is not None:
+            self.deadline = self.clock() + self.timeout
+        self.cancelled = False
+        super(Deadline, self).reset()
+
+    def cancel(self):
+        """Stop the execution at its next check.
+
+        It can be called from any thread: assigning the flag is atomic and
+        the executing thread only reads it.
+        """
+        self.cancelled = True
+
+    def check(self):
+        """Raise `ExecutionCancelled` or `DeadlineExceeded` if applicable.
+
+        Otherwise the step limit is checked.
+        """
+        if self.cancelled:
+            raise ExecutionCancelled('The execution was cancelled.')
+        if self.deadline is not None and self.clock() >= self.deadline:
+            raise DeadlineExceeded(
+                'The deadline of {0} seconds passed.'.format(self.timeout))
+        super(Deadline, self).check()
@@ -1,16 +1,54 @@
 from collections import namedtuple
+from collections import OrderedDict
+from contextlib import contextmanager
 from RestrictedPython._compat import IS_CPYTHON
 from RestrictedPython._compat import IS_PY2
+from RestrictedPython._compat import perf_counter
+from RestrictedPython._compat import process_time
+from RestrictedPython.diagnostics import Diagnostic
+from RestrictedPython.diagnostics import ERROR
+from RestrictedPython.names import analyze_names
 from RestrictedPython.transformer import RestrictingNodeTransformer
 
 import ast
+import threading
 import warnings
 
 
-CompileResult = namedtuple(
-    'CompileResult', 'code, errors, warnings, used_names')
+class CompileResult(namedtuple(
+        'CompileResult', 'code, errors, warnings, used_names')):
+    """The result of `compile_restricted_*`.
+
+    It is the 4-tuple of `code`, `errors`, `warnings` and `used_names` and
+    has further attributes:
+
+    names -- the `NameInfo` of the scope aware name analysis, `None` if there
+        is no code or the code was compiled without a policy
+    diagnostics -- a tuple of the `Diagnostic` records of the errors and the
+        warnings, `errors` and `warnings` contain their texts
+    stats -- the `CompileStats` if the policy enables `compile_stats` and the
+        source could be parsed, else `None`
+    """
+
+    # Defaults for instances created by `_make` or `_replace`.
+    names = None
+    diagnostics = ()
+    stats = None
+
+    def __new__(cls, code, errors, warnings, used_names,
+                names=None, diagnostics=(), stats=None):
+        result = super(CompileResult, cls).__new__(
+            cls, code, errors, warnings, used_names)
+        result.names = names
+        result.diagnostics = diagnostics
+        result.stats = stats
+        return result
+
+
+# `syntax_error_template` is no longer used but kept for existing imports.
 syntax_error_template = (
     'Line {lineno}: {type}: {msg} at statement: {statement!r}')
+syntax_error_message = '{type}: {msg} at statement: {statement!r}'
 
 NOT_CPYTHON_WARNING = (
     'RestrictedPython is only supported on CPython: use on other Python '
@@ -18,6 +56,128 @@ NOT_CPYTHON_WARNING = (
 )
 
 
+PhaseTime = namedtuple('PhaseTime', 'wall, cpu')
+
+
+class CompileStats(namedtuple(
+        'CompileStats',
+        'filename, mode, phases, nodes, transformed_nodes, '
+        'synthesized_nodes')):
+    """Measurements of one compilation, see `compile_stats` of the policy.
+
+    filename, mode -- the arguments of the compilation
+    phases -- dict of the `PhaseTime` (wall and CPU seconds) of the phases
+        which ran: 'parse', 'transform', 'analyze' (the name analysis) and
+        'compile' (CPython's compiler), in this order
+    nodes -- number of nodes of the parsed AST
+    transformed_nodes -- number of nodes of the transformed AST, `None` if
+        there were errors
+    synthesized_nodes -- number of nodes created by the policy, `None` if
+        there were errors
+
+    Expression contexts like `ast.Load` are not counted.
+    """
+
+    __slots__ = ()
+
+    def as_metrics(self):
+        """Return a flat dict of the numbers, e.g. for a metrics sink.
+
+        The keys are like 'parse.wall' or 'nodes'.
+        """
+        metrics = {}
+        for phase, time in self.phases.items():
+            metrics[phase + '.wall'] = time.wall
+            metrics[phase + '.cpu'] = time.cpu
+        metrics['nodes'] = self.nodes
+        if self.transformed_nodes is not None:
+            metrics['transformed_nodes'] = self.transformed_nodes
+            metrics['synthesized_nodes'] = self.synthesized_nodes
+        return metrics
+
+
+class _NoTimer(object):
+    """Stands in for `_PhaseTimer` if `compile_stats` are disabled."""
+
+    phases = None
+
+    def __call__(self, name):
+        return self
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_no_timer = _NoTimer()
+
+
+class _PhaseTimer(object):
+
+    def __init__(self):
+        self.phases = OrderedDict()
+
+    @contextmanager
+    def __call__(self, name):
+        wall = perf_counter()
+        cpu = process_time()
+        yield
+        self.phases[name] = PhaseTime(
+            perf_counter() - wall, process_time() - cpu)
+
+
+def _count_nodes(tree):
+    return [node for node in ast.walk(tree)
+            if not isinstance(node, ast.expr_context)]
+
+
+def _syntax_error_diagnostic(error, statement):
+    return Diagnostic(
+        ERROR,
+        'syntax-error',
+        error.lineno,
+        error.offset,
+        None,
+        syntax_error_message,
+        dict(type=error.__class__.__name__, msg=error.msg,
+             statement=statement))
+
+
+# Per thread: policy class -> idle instance, see `_acquire_policy`.
+_policy_pool = threading.local()
+
+
+def _is_reusable(policy):
+    # Opt-in: subclasses may keep state in their visitors which only an own
+    # `reset` knows of, an inherited one does not count.
+    return 'reset' in vars(policy)
+
+
+def _acquire_policy(policy, errors, warnings, used_names):
+    """Return a reset instance of `policy` from the pool or a new one.
+
+    The instance is removed from the pool while it is in use, so nested
+    compilations get their own one.
+    """
+    instances = getattr(_policy_pool, 'instances', None)
+    if instances is None:
+        instances = _policy_pool.instances = {}
+    instance = instances.pop(policy, None)
+    if instance is None:
+        return policy(errors, warnings, used_names)
+    instance.reset(errors, warnings, used_names)
+    return instance
+
+
+def _release_policy(instance):
+    """Put `instance` back into the pool of the current thread."""
+    policy = type(instance)
+    if _is_reusable(policy):
+        _policy_pool.instances[policy] = instance
+
+
 def _compile_restricted_mode(
         source,
         filename='<string>',
@@ -33,7 +193,10 @@ def _compile_restricted_mode(
     byte_code = None
     collected_errors = []
     collected_warnings = []
+    diagnostics = []
     used_names = {}
+    names = None
+    stats = None
     if policy is None:
         # Unrestricted Source Checks
         byte_code = compile(source, filename, mode=mode, flags=flags,
@@ -47,37 +210,61 @@ def _compile_restricted_mode(
             raise TypeError('Not allowed source type: '
                             '"{0.__class__.__name__}".'.format(source))
         c_ast = None
+        timer = _PhaseTimer() if policy.compile_stats else _no_timer
         # workaround for pypy issue https://bitbucket.org/pypy/pypy/issues/2552
         if isinstance(source, ast.Module):
             c_ast = source
         else:
             try:
-                c_ast = ast.parse(source, filename, mode)
+                with timer('parse'):
+                    c_ast = ast.parse(source, filename, mode)
             except (TypeError, ValueError) as e:
-                collected_errors.append(str(e))
+                diagnostics.append(Diagnostic(
+                    ERROR, 'invalid-source', None, None, None, str(e)))
             except SyntaxError as v:
-                collected_errors.append(syntax_error_template.format(
-                    lineno=v.lineno,
-                    type=v.__class__.__name__,
-                    msg=v.msg,
-                    statement=v.text.strip() if v.text else None
-                ))
+                diagnostics.append(_syntax_error_diagnostic(
+                    v, v.text.strip() if v.text else None))
+            collected_errors.extend(str(error) for error in diagnostics)
         if c_ast:
-            policy_instance = policy(
-                collected_errors, collected_warnings, used_names)
-            policy_instance.visit(c_ast)
+            policy_instance = _acquire_policy(
+                policy, collected_errors, collected_warnings, used_names)
+            if timer is not _no_timer:
+                # The list keeps the nodes alive, so their ids are unique.
+                original_nodes = _count_nodes(c_ast)
+            with timer('transform'):
+                policy_instance.visit(c_ast)
             if not collected_errors:
-                byte_code = compile(c_ast, filename, mode=mode  # ,
-                                    # flags=flags,
-                                    # dont_inherit=dont_inherit
-                                    )
+                with timer('analyze'):
+                    names = analyze_names(c_ast)
+                with timer('compile'):
+                    byte_code = compile(c_ast, filename, mode=mode  # ,
+                                        # flags=flags,
+                                        # dont_inherit=dont_inherit
+                                        )
+            if timer is not _no_timer:
+                transformed_nodes = synthesized_nodes = None
+                if not collected_errors:
+                    original_ids = set(id(node) for node in original_nodes)
+                    nodes = _count_nodes(c_ast)
+                    transformed_nodes = len(nodes)
+                    synthesized_nodes = sum(
+                        1 for node in nodes if id(node) not in original_ids)
+                stats = CompileStats(
+                    filename, mode, timer.phases, len(original_nodes),
+                    transformed_nodes, synthesized_nodes)
+                policy_instance.report_compile_stats(stats)
+            diagnostics.extend(getattr(policy_instance, 'diagnostics', ()))
+            _release_policy(policy_instance)
     else:
         raise TypeError('Unallowed policy provided for RestrictedPython')
     return CompileResult(
         byte_code,
         tuple(collected_errors),
         collected_warnings,
-        used_names)
+        used_names,
+        names,
+        tuple(sorted(diagnostics, key=lambda d: d.severity != ERROR)),
+        stats)
 
 
 def compile_restricted_exec(
@@ -146,13 +333,10 @@ def compile_restricted_function(
     try:
         body_ast = ast.parse(body, '<func code>', 'exec')
     except SyntaxError as v:
-        error = syntax_error_template.format(
-            lineno=v.lineno,
-            type=v.__class__.__name__,
-            msg=v.msg,
-            statement=v.text.strip())
+        error = _syntax_error_diagnostic(v, v.text.strip())
         return CompileResult(
-            code=None, errors=(error,), warnings=(), used_names=())
+            code=None, errors=(str(error),), warnings=(), used_names=(),
+            diagnostics=(error,))
 
     # The compiled code is actually executed inside a function
     # (that is called when the code is called) so reading and assigning to a
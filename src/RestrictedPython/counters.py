@@ -0,0 +1,246 @@
+##############################################################################
+#
+# Copyright (c) 2018 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE
+#
+##############################################################################
+"""Counters for the guard calls of restricted code.
+
+The guards are wrapped per script, so the counters are attributed to its
+filename without inspecting frames:
+
+    >>> from RestrictedPython import PreparedScript
+    >>> from RestrictedPython.counters import GuardCounters
+    >>> from RestrictedPython.prepared import default_guards
+    >>> counters = GuardCounters()
+    >>> script = PreparedScript(
+    ...     'result = [x.real for x in numbers]', 'numbers.py',
+    ...     guards=counters.wrap('numbers.py', default_guards),
+    ...     result_name='result')
+    >>> script.run(numbers=[1, 2])
+    [1, 2]
+    >>> sorted(counters.snapshot()['numbers.py'].items())
+    [('_getattr_', 2), ('_getiter_', 1)]
+
+A counted call costs one more Python function call and an increment. To
+make this cheap enough for production only some executions can be counted:
+`sample` returns the counting guards for every n-th execution of a script
+(see `execution_sample_rate`) and an empty dict otherwise. Passed as
+bindings they replace the guards of the `PreparedScript` for this run, so
+they have to wrap the guards of its `template`:
+
+    >>> script = PreparedScript(
+    ...     'result = [x.real for x in numbers]', 'numbers.py',
+    ...     result_name='result')
+    >>> counters = GuardCounters(execution_sample_rate=10)
+    >>> for i in range(20):
+    ...     guards = counters.sample('numbers.py', script.template)
+    ...     result = script.run(numbers=[1, 2], **guards)
+    >>> counters.snapshot()['numbers.py']['_getattr_']
+    40
+
+The source lines of the calls are only recorded if `line_sample_rate` is
+set: then every n-th call of a guard looks up the line and counts it n
+times.
+
+The counters are not locked, concurrent executions of the same script may
+lose a few increments. `flush` hands the counts collected since the last
+flush to a sink, e.g. periodically from a host thread.
+"""
+
+from RestrictedPython.names import is_guard_name
+
+import sys
+import threading
+
+
+class ScriptCounters(object):
+    """The counters of the guards of one script.
+
+    counts -- list of the number of calls, parallel to `guard_names`
+    lines -- dict: (guard name, line number) -> estimated number of calls
+    """
+
+    def __init__(self, filename, guard_names):
+        self.filename = filename
+        self.guard_names = guard_names
+        self.counts = [0] * len(guard_names)
+        self.lines = {}
+        # For `GuardCounters.sample`: the number of executions and the last
+        # guards with their wrappers.
+        self.executions = 0
+        self.sampled = (None, None)
+
+    def record_line(self, index, weight):
+        # Frame 0 is `record_line`, 1 the counting wrapper, 2 the caller.
+        # Guards like `_iter_unpack_sequence_` call other guards, so the
+        # first frame of the script is looked for.
+        frame = sys._getframe(2)
+        while frame is not None and frame.f_code.co_filename != self.filename:
+            frame = frame.f_back
+        lineno = None if frame is None else frame.f_lineno
+        key = (self.guard_names[index], lineno)
+        self.lines[key] = self.lines.get(key, 0) + weight
+
+    def take(self):
+        """Return the counts and lines and start counting from zero."""
+        counts = {}
+        for index, name in enumerate(self.guard_names):
+            count = self.counts[index]
+            if count:
+                self.counts[index] -= count
+                counts[name] = count
+        lines, self.lines = self.lines, {}
+        return counts, lines
+
+
+# The generated code passes keyword arguments only to these guards.
+KEYWORD_GUARDS = frozenset(['_apply_', '_callattr_'])
+
+
+def _counted(guard, counts, index, keywords):
+    if keywords:
+        def counted_guard(*args, **kw):
+            counts[index] += 1
+            return guard(*args, **kw)
+    else:
+        def counted_guard(*args):
+            counts[index] += 1
+            return guard(*args)
+    return counted_guard
+
+
+def _counted_with_lines(guard, script, index, keywords, rate):
+    counts = script.counts
+    if keywords:
+        def counted_guard(*args, **kw):
+            count = counts[index] = counts[index] + 1
+            if count % rate == 0:
+                script.record_line(index, rate)
+            return guard(*args, **kw)
+    else:
+        def counted_guard(*args):
+            count = counts[index] = counts[index] + 1
+            if count % rate == 0:
+                script.record_line(index, rate)
+            return guard(*args)
+    return counted_guard
+
+
+class GuardCounters(object):
+    """Counters of the guard calls per script filename.
+
+    execution_sample_rate -- `sample` counts every n-th execution of a
+        script, the reported numbers are estimated by multiplying the counts
+        by n.
+    line_sample_rate -- if set, every n-th call of a guard records the
+        source line of the call.
+    """
+
+    def __init__(self, execution_sample_rate=1, line_sample_rate=None):
+        self.execution_sample_rate = execution_sample_rate
+        self.line_sample_rate = line_sample_rate
+        self._scripts = {}
+        self._lock = threading.Lock()
+
+    def sample(self, filename, guards):
+        """Return counting guards for every n-th execution of `filename`.
+
+        For the other executions an empty dict is returned. See `wrap` for
+        `guards`, the wrappers are reused as long as the same `guards` object
+        is passed, e.g. the `template` of a `PreparedScript`.
+        """
+        script = self._scripts.get(filename)
+        if script is not None:
+            script.executions += 1
+            if script.executions % self.execution_sample_rate:
+                return {}
+            sampled_guards, wrapped = script.sampled
+            if sampled_guards is guards and wrapped is not None:
+                return wrapped
+        wrapped = self.wrap(filename, guards)
+        script = self._scripts[filename]
+        script.sampled = (guards, wrapped)
+        return wrapped
+
+    def wrap(self, filename, guards):
+        """Return counting wrappers of `guards` for the script `filename`.
+
+        `guards` is a mapping with the guards the script runs with, e.g. the
+        `template` of a `PreparedScript` or the host's guards. There is no
+        default: the wrappers replace the guards of the script, wrapping
+        others would drop the host's restrictions. Only callable guards are
+        wrapped, `__metaclass__` is left out. The result can be used as
+        `guards` of `PreparedScript` or be put into the globals of the
+        script. Wrapping the guards of the same filename again continues its
+        counters.
+        """
+        names = sorted(
+            name for name, guard in guards.items()
+            if callable(guard) and is_guard_name(name)
+            and name != '__metaclass__')
+        with self._lock:
+            script = self._scripts.get(filename)
+            if script is None or script.guard_names != names:
+                script = ScriptCounters(filename, names)
+                self._scripts[filename] = script
+        wrapped = {}
+        for index, name in enumerate(names):
+            keywords = name in KEYWORD_GUARDS
+            if self.line_sample_rate:
+                wrapped[name] = _counted_with_lines(
+                    guards[name], script, index, keywords,
+                    self.line_sample_rate)
+            else:
+                wrapped[name] = _counted(
+                    guards[name], script.counts, index, keywords)
+        return wrapped
+
+    def snapshot(self):
+        """Return a dict: filename -> {guard name: calls} without reset."""
+        with self._lock:
+            scripts = list(self._scripts.values())
+        rate = self.execution_sample_rate
+        result = {}
+        for script in scripts:
+            counts = dict(
+                (name, count * rate)
+                for name, count in zip(script.guard_names, script.counts)
+                if count)
+            if counts:
+                result[script.filename] = counts
+        return result
+
+    def line_snapshot(self):
+        """Return a dict: filename -> {(guard, line): estimated calls}."""
+        with self._lock:
+            scripts = list(self._scripts.values())
+        rate = self.execution_sample_rate
+        return dict(
+            (script.filename, dict(
+                (key, count * rate) for key, count in script.lines.items()))
+            for script in scripts if script.lines)
+
+    def flush(self, sink):
+        """Pass the counts since the last flush to `sink` and reset them.
+
+        `sink(filename, counts, lines)` is called per script with calls,
+        `counts` and `lines` are like in `snapshot` and `line_snapshot`.
+        """
+        with self._lock:
+            scripts = list(self._scripts.values())
+        rate = self.execution_sample_rate
+        for script in scripts:
+            counts, lines = script.take()
+            if counts or lines:
+                sink(script.filename,
+                     dict((key, count * rate)
+                          for key, count in counts.items()),
+                     dict((key, count * rate)
+                          for key, count in lines.items()))
@@ -0,0 +1,110 @@
+##############################################################################
+#
+# Copyright (c) 2018 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE
+#
+##############################################################################
+"""Records of the errors and warnings found by the policies.
+
+`CompileResult.diagnostics` contains the records, so tools do not have to
+parse the texts in `CompileResult.errors` and `CompileResult.warnings`:
+
+    >>> from RestrictedPython import compile_restricted_exec
+    >>> result = compile_restricted_exec('_x = 1')
+    >>> record = result.diagnostics[0]
+    >>> record.code, record.lineno, record.node_type
+    ('name-underscore', 1, 'Name')
+"""
+
+ERROR = 'error'
+WARNING = 'warning'
+
+# The stable codes of the diagnostics of `compile_restricted*` and
+# `RestrictingNodeTransformer`.
+CODES = {
+    'syntax-error': 'The source is not valid Python.',
+    'invalid-source': 'The source can not be parsed, e.g. null bytes.',
+    'name-underscore': 'A name starts with "_".',
+    'name-roles': 'A name ends with "__roles__".',
+    'name-reserved': 'A name is reserved, like "printed".',
+    'attribute-underscore': 'An attribute name starts with "_".',
+    'attribute-roles': 'An attribute name ends with "__roles__".',
+    'import-star': 'A "*" import.',
+    'exec-call': 'A call of "exec".',
+    'eval-call': 'A call of "eval".',
+    'augassign-attribute': 'An augmented assignment of an attribute.',
+    'augassign-subscript': 'An augmented assignment of an item or slice.',
+    'metaclass-keyword': 'The "metaclass" keyword of a class definition.',
+    'not-allowed': 'A statement or expression which is not allowed.',
+    'unknown-node': 'A node type which is not known to the policy.',
+    'printed-not-read': 'Prints, but never reads "printed".',
+    'printed-without-print': 'Reads "printed", but does not print.',
+    'print-statement': 'A Python 2 print statement.',
+    # Used by policies calling `error` or `warn` without a code.
+    'policy-error': 'An error reported by a custom policy.',
+    'policy-warning': 'A warning reported by a custom policy.',
+}
+
+
+class Diagnostic(object):
+    """An error or warning found while compiling restricted code.
+
+    severity -- `ERROR` or `WARNING`
+    code -- the stable code of the rule, see `CODES`
+    lineno, col_offset -- the location in the source, `None` if unknown
+    node_type -- the class name of the AST node, `None` if there is no node
+    template -- the message, a format string if there are `args`
+    args -- dict of the arguments of the template or `None`
+
+    The text is only built when the record is converted to a string. It is
+    'Line {lineno}: {message}' or just the message if there is neither a
+    location nor a node. For backwards compatibility a record compares equal
+    to its text.
+    """
+
+    __slots__ = (
+        'severity', 'code', 'lineno', 'col_offset', 'node_type', 'template',
+        'args')
+
+    def __init__(self, severity, code, lineno, col_offset, node_type,
+                 template, args=None):
+        self.severity = severity
+        self.code = code
+        self.lineno = lineno
+        self.col_offset = col_offset
+        self.node_type = node_type
+        self.template = template
+        self.args = args
+
+    @property
+    def message(self):
+        """The message without the location."""
+        if not self.args:
+            return self.template
+        return self.template.format(**self.args)
+
+    def __str__(self):
+        if self.lineno is None and self.node_type is None:
+            return self.message
+        return 'Line {lineno}: {message}'.format(
+            lineno=self.lineno, message=self.message)
+
+    def __repr__(self):
+        return repr(str(self))
+
+    def __eq__(self, other):
+        if isinstance(other, Diagnostic):
+            other = str(other)
+        return str(self) == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(str(self))
@@ -0,0 +1,217 @@
+##############################################################################
+#
+# Copyright (c) 2018 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE
+#
+##############################################################################
+"""Line coverage of restricted scripts.
+
+Only the code objects added to the collector are covered, usually the
+results of `compile_restricted_*`:
+
+    >>> from RestrictedPython import compile_restricted_exec
+    >>> from RestrictedPython.linecoverage import LineCoverage
+    >>> result = compile_restricted_exec(
+    ...     'if a:\\n    b = 1\\nelse:\\n    b = 2', 'script.py')
+    >>> coverage = LineCoverage()
+    >>> coverage.add(result)
+    >>> with coverage:
+    ...     exec(result.code, {'a': True})
+    >>> coverage.report()['script.py']
+    FileCoverage(executed=[1, 2], missing=[4])
+
+On Python 3.12+ `sys.monitoring` LINE events are used and each line is
+disabled after its first hit, so the code runs at full speed once its lines
+were seen. This is cheap enough to keep the collector running in production.
+Older versions fall back to `sys.settrace` for the current thread, which
+stops tracing a code object only after all its lines were hit. Code with
+lines never executed stays traced, so this mode is meant for tests.
+
+The reports are per filename, code objects compiled with the same filename
+are merged. `as_dict` exports them as JSON compatible data, `merge` adds
+such data, e.g. of other worker processes.
+"""
+
+from collections import namedtuple
+from RestrictedPython.lineprofile import _code_objects
+
+import dis
+import sys
+import types
+
+
+_monitoring = getattr(sys, 'monitoring', None)
+
+_FileCoverage = namedtuple('FileCoverage', 'executed, missing')
+
+
+class FileCoverage(_FileCoverage):
+    """The coverage of one filename.
+
+    executed -- sorted list of the executed line numbers
+    missing -- sorted list of the line numbers not executed
+    """
+
+    __slots__ = ()
+
+    @property
+    def percent(self):
+        lines = len(self.executed) + len(self.missing)
+        return 100.0 * len(self.executed) / lines if lines else 100.0
+
+
+def _line_numbers(code):
+    return set(lineno for offset, lineno in dis.findlinestarts(code)
+               if lineno is not None and lineno > 0)
+
+
+class LineCoverage(object):
+    """Collect the executed lines of restricted code, see module docstring.
+
+    mode -- 'auto', 'monitoring' or 'settrace'
+    """
+
+    def __init__(self, mode='auto'):
+        if mode == 'auto':
+            mode = 'monitoring' if _monitoring is not None else 'settrace'
+        if mode == 'monitoring' and _monitoring is None:
+            raise ValueError('sys.monitoring needs Python 3.12+.')
+        if mode not in ('monitoring', 'settrace'):
+            raise ValueError('Unknown mode: {0!r}'.format(mode))
+        self.mode = mode
+        # filename -> set of line numbers
+        self._lines = {}
+        self._executed = {}
+        # id of the code object -> (code object, set of the line numbers
+        # not yet executed). Code objects compare by value, the ids keep
+        # several compilations of the same source apart.
+        self._remaining = {}
+        self._running = False
+
+    def add(self, target):
+        """Cover a `CompileResult` or code object and its nested code.
+
+        Code can be added while the collector is running.
+        """
+        code = getattr(target, 'code', target)
+        if not isinstance(code, types.CodeType):
+            raise TypeError('Expected a code object, got {0!r}.'.format(
+                target))
+        for code in _code_objects(code):
+            if id(code) in self._remaining:
+                continue
+            lines = _line_numbers(code)
+            self._remaining[id(code)] = (code, set(lines))
+            self._lines.setdefault(code.co_filename, set()).update(lines)
+            self._executed.setdefault(code.co_filename, set())
+            if self._running:
+                getattr(self, '_add_' + self.mode)(code)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        if self._running:
+            raise RuntimeError('The coverage is already running.')
+        getattr(self, '_start_' + self.mode)()
+        self._running = True
+
+    def stop(self):
+        if self._running:
+            getattr(self, '_stop_' + self.mode)()
+            self._running = False
+
+    def report(self):
+        """Return a dict: filename -> `FileCoverage`."""
+        return dict(
+            (filename, FileCoverage(
+                sorted(self._executed[filename]),
+                sorted(lines - self._executed[filename])))
+            for filename, lines in self._lines.items())
+
+    def as_dict(self):
+        """Return the report as dict: filename -> {'executed', 'missing'}."""
+        return dict(
+            (filename, dict(file_coverage._asdict()))
+            for filename, file_coverage in self.report().items())
+
+    def merge(self, data):
+        """Add a report exported by `as_dict`."""
+        for filename, file_coverage in data.items():
+            executed = set(file_coverage['executed'])
+            self._lines.setdefault(filename, set()).update(
+                executed, file_coverage['missing'])
+            self._executed.setdefault(filename, set()).update(executed)
+
+    def text(self):
+        """Return a table of the coverage per filename."""
+        rows = ['{0:40} {1:>6} {2:>6} {3:>6}  {4}'.format(
+            'filename', 'lines', 'miss', 'cover', 'missing')]
+        for filename, file_coverage in sorted(self.report().items()):
+            rows.append('{0:40} {1:>6} {2:>6} {3:>5.0f}%  {4}'.format(
+                filename,
+                len(file_coverage.executed) + len(file_coverage.missing),
+                len(file_coverage.missing), file_coverage.percent,
+                ', '.join(str(lineno) for lineno in file_coverage.missing)))
+        return '\n'.join(rows)
+
+    # `sys.monitoring`: each line is disabled after its first event.
+
+    def _on_line(self, code, lineno):
+        self._executed[code.co_filename].add(lineno)
+        return _monitoring.DISABLE
+
+    def _add_monitoring(self, code):
+        _monitoring.set_local_events(
+            _monitoring.COVERAGE_ID, code, _monitoring.events.LINE)
+
+    def _start_monitoring(self):
+        tool = _monitoring.COVERAGE_ID
+        if _monitoring.get_tool(tool) is not None:
+            raise RuntimeError('Another tool uses sys.monitoring coverage.')
+        _monitoring.use_tool_id(tool, 'RestrictedPython')
+        _monitoring.register_callback(
+            tool, _monitoring.events.LINE, self._on_line)
+        for code, remaining in self._remaining.values():
+            self._add_monitoring(code)
+
+    def _stop_monitoring(self):
+        tool = _monitoring.COVERAGE_ID
+        for code, remaining in self._remaining.values():
+            _monitoring.set_local_events(tool, code, 0)
+        _monitoring.free_tool_id(tool)
+
+    # `sys.settrace`: code objects are traced until all lines were hit.
+
+    def _trace(self, frame, event, arg):
+        entry = self._remaining.get(id(frame.f_code))
+        if entry is not None and entry[1]:
+            return self._trace_lines
+        return None
+
+    def _trace_lines(self, frame, event, arg):
+        if event == 'line':
+            code = frame.f_code
+            self._executed[code.co_filename].add(frame.f_lineno)
+            self._remaining[id(code)][1].discard(frame.f_lineno)
+        return self._trace_lines
+
+    def _add_settrace(self, code):
+        pass  # `_trace` looks the code up in `_remaining`.
+
+    def _start_settrace(self):
+        self._previous_trace = sys.gettrace()
+        sys.settrace(self._trace)
+
+    def _stop_settrace(self):
+        sys.settrace(self._previous_trace)
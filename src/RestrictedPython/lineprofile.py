@@ -0,0 +1,279 @@
+##############################################################################
+#
+# Copyright (c) 2018 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE
+#
+##############################################################################
+"""Line profiler for restricted scripts.
+
+The time is attributed to the lines of the script, the time spent in the
+guards (and in everything else called by the script) counts for the line
+calling them:
+
+    >>> from RestrictedPython import PreparedScript
+    >>> from RestrictedPython.lineprofile import LineProfiler
+    >>> script = PreparedScript('a = [x.real for x in range(100)]',
+    ...                         'script.py', builtins={'range': range})
+    >>> with LineProfiler(script.result) as profiler:
+    ...     glb = script.run()
+    >>> profiler.lines()[1].time > 0
+    True
+    >>> print(profiler.text())  # doctest: +SKIP
+
+The profiler is created for a `CompileResult` or code object, or for a
+filename, which then matches all code compiled with this filename. The
+modes are
+
+'monitoring' -- (Python 3.12+) `sys.monitoring` events of the lines, calls
+    and returns of the script code only. `hits` are the executions of the
+    line.
+'setprofile' -- `sys.setprofile` of the current thread. Lines without
+    calls are not seen, their time counts for the next line calling
+    something. `hits` are the profile events at the line.
+'sampling' -- a thread looks up the current line of the profiled thread
+    every `interval` seconds. The overhead is small enough for
+    production, the times are estimates and `hits` are the samples.
+
+'auto' is 'monitoring' if available, 'setprofile' otherwise.
+"""
+
+from collections import namedtuple
+from RestrictedPython._compat import perf_counter
+
+import sys
+import threading
+import types
+
+
+LineStats = namedtuple('LineStats', 'hits, time')
+
+_monitoring = getattr(sys, 'monitoring', None)
+
+
+def _code_objects(code):
+    result = [code]
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            result.extend(_code_objects(const))
+    return result
+
+
+class LineProfiler(object):
+    """Profile the lines of restricted code, see the module docstring.
+
+    target -- a `CompileResult`, a code object or a filename
+    mode -- 'auto', 'monitoring', 'setprofile' or 'sampling'
+    interval -- seconds between two samples in the 'sampling' mode
+    """
+
+    def __init__(self, target, mode='auto', interval=0.001):
+        code = getattr(target, 'code', target)
+        if isinstance(code, types.CodeType):
+            self.filename = code.co_filename
+            # Keyed by id, code objects compare and hash by their contents.
+            self.codes = dict(
+                (id(code_object), code_object)
+                for code_object in _code_objects(code))
+        else:
+            self.filename = target
+            self.codes = None
+        if mode == 'auto':
+            mode = 'monitoring' if _monitoring is not None else 'setprofile'
+        if mode == 'monitoring' and _monitoring is None:
+            raise ValueError('sys.monitoring needs Python 3.12+.')
+        if mode not in ('monitoring', 'setprofile', 'sampling'):
+            raise ValueError('Unknown mode: {0!r}'.format(mode))
+        self.mode = mode
+        self.interval = interval
+        self._hits = {}
+        self._times = {}
+        self._state = threading.local()
+        self._running = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        if self._running:
+            raise RuntimeError('The profiler is already running.')
+        self._running = True
+        getattr(self, '_start_' + self.mode)()
+
+    def stop(self):
+        if self._running:
+            getattr(self, '_stop_' + self.mode)()
+            self._running = False
+
+    def _add(self, lineno, elapsed, hits=0):
+        self._times[lineno] = self._times.get(lineno, 0.0) + elapsed
+        if hits:
+            self._hits[lineno] = self._hits.get(lineno, 0) + hits
+
+    def lines(self):
+        """Return a dict: line number -> `LineStats`."""
+        return dict(
+            (lineno, LineStats(self._hits.get(lineno, 0), time))
+            for lineno, time in self._times.items()
+            if lineno is not None)
+
+    def text(self, source=None):
+        """Return a table of the lines, the source lines if given."""
+        source_lines = source.splitlines() if source else []
+        stats = self.lines()
+        total = sum(line.time for line in stats.values()) or 1.0
+        rows = ['{0:>6} {1:>10} {2:>12} {3:>7}  {4}'.format(
+            'line', 'hits', 'time [ms]', '%', self.filename)]
+        for lineno in sorted(stats):
+            line = stats[lineno]
+            text = ''
+            if 0 < lineno <= len(source_lines):
+                text = source_lines[lineno - 1]
+            rows.append('{0:>6} {1:>10} {2:>12.3f} {3:>7.1f}  {4}'.format(
+                lineno, line.hits, line.time * 1e3,
+                line.time / total * 100, text))
+        return '\n'.join(rows)
+
+    # `sys.monitoring`: per thread a stack of [code, line number] of the
+    # active frames of the script and the time of the last event.
+
+    def _stack(self):
+        state = self._state
+        try:
+            return state.stack
+        except AttributeError:
+            state.stack = []
+            state.last = perf_counter()
+            return state.stack
+
+    def _account(self, now):
+        # Attribute the time since the last event to the current line.
+        state = self._state
+        stack = self._stack()
+        if stack:
+            self._add(stack[-1][1], now - state.last)
+        state.last = now
+        return stack
+
+    def _foreign(self, code):
+        return self.codes is None and code.co_filename != self.filename
+
+    def _on_start(self, code, offset):
+        if self._foreign(code):
+            return _monitoring.DISABLE
+        self._account(perf_counter()).append([code, None])
+
+    def _on_line(self, code, lineno):
+        if self._foreign(code):
+            return _monitoring.DISABLE
+        stack = self._account(perf_counter())
+        # Frames left by an exception do not send a return event.
+        while stack and stack[-1][0] is not code:
+            stack.pop()
+        if not stack:
+            stack.append([code, None])
+        stack[-1][1] = lineno
+        self._hits[lineno] = self._hits.get(lineno, 0) + 1
+
+    def _on_return(self, code, offset, value):
+        if self._foreign(code):
+            return _monitoring.DISABLE
+        stack = self._account(perf_counter())
+        if stack and stack[-1][0] is code:
+            stack.pop()
+
+    def _start_monitoring(self):
+        tool = _monitoring.PROFILER_ID
+        if _monitoring.get_tool(tool) is not None:
+            raise RuntimeError('Another profiler uses sys.monitoring.')
+        _monitoring.use_tool_id(tool, 'RestrictedPython')
+        events = _monitoring.events
+        for event, callback in (
+                (events.PY_START, self._on_start),
+                (events.PY_RESUME, self._on_start),
+                (events.LINE, self._on_line),
+                (events.PY_RETURN, self._on_return),
+                (events.PY_YIELD, self._on_return)):
+            _monitoring.register_callback(tool, event, callback)
+        event_set = (events.PY_START | events.PY_RESUME | events.LINE
+                     | events.PY_RETURN | events.PY_YIELD)
+        if self.codes is None:
+            _monitoring.set_events(tool, event_set)
+        else:
+            for code in self.codes.values():
+                _monitoring.set_local_events(tool, code, event_set)
+
+    def _stop_monitoring(self):
+        tool = _monitoring.PROFILER_ID
+        if self.codes is None:
+            _monitoring.set_events(tool, 0)
+        else:
+            for code in self.codes.values():
+                _monitoring.set_local_events(tool, code, 0)
+        _monitoring.free_tool_id(tool)
+
+    # `sys.setprofile`: the time since the last event counts for the line
+    # the innermost frame of the script was at.
+
+    def _script_frame(self, frame):
+        while frame is not None:
+            code = frame.f_code
+            if (code.co_filename == self.filename
+                    and (self.codes is None or id(code) in self.codes)):
+                return frame
+            frame = frame.f_back
+        return None
+
+    def _profile(self, frame, event, arg):
+        now = perf_counter()
+        state = self._state
+        if state.lineno is not None:
+            self._add(state.lineno, now - state.last)
+        script_frame = self._script_frame(frame)
+        state.lineno = None if script_frame is None else script_frame.f_lineno
+        if state.lineno is not None:
+            self._hits[state.lineno] = self._hits.get(state.lineno, 0) + 1
+        state.last = perf_counter()
+
+    def _start_setprofile(self):
+        self._state.lineno = None
+        self._state.last = perf_counter()
+        self._previous_profile = sys.getprofile()
+        sys.setprofile(self._profile)
+
+    def _stop_setprofile(self):
+        sys.setprofile(self._previous_profile)
+
+    # Sampling: a thread looks at the current frame of the profiled thread.
+
+    def _sample(self, thread_id, stopped):
+        current_frames = sys._current_frames
+        while not stopped.wait(self.interval):
+            frame = current_frames().get(thread_id)
+            script_frame = self._script_frame(frame)
+            if script_frame is not None:
+                self._add(script_frame.f_lineno, self.interval, hits=1)
+            del frame, script_frame
+
+    def _start_sampling(self):
+        self._stopped = threading.Event()
+        ident = getattr(threading, 'get_ident', None)
+        if ident is None:  # Python 2
+            ident = threading._get_ident
+        self._sampler = threading.Thread(
+            target=self._sample, args=(ident(), self._stopped))
+        self._sampler.daemon = True
+        self._sampler.start()
+
+    def _stop_sampling(self):
+        self._stopped.set()
+        self._sampler.join()
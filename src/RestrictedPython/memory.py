@@ -0,0 +1,138 @@
+##############################################################################
+#
+# Copyright (c) 2018 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE
+#
+##############################################################################
+"""Memory accounting and limits for restricted code.
+
+`MemoryLimit` is a `Deadline` which also measures the memory allocated
+during the execution with `tracemalloc` at the checkpoints of code compiled
+with `step_checkpoints`, see `RestrictedPython.checkpoints`. The host has
+to start tracing first, best with a few frames per traceback, so that
+allocations of guards called by the script can be attributed to it:
+
+    >>> import tracemalloc
+    >>> from RestrictedPython import PreparedScript
+    >>> from RestrictedPython import RestrictingNodeTransformer
+    >>> from RestrictedPython.memory import MemoryLimit
+    >>> class CheckpointPolicy(RestrictingNodeTransformer):
+    ...     step_checkpoints = True
+    >>> script = PreparedScript(
+    ...     'data = []\\nwhile True:\\n    data.append([0] * 125)',
+    ...     'greedy.py', policy=CheckpointPolicy)
+    >>> tracemalloc.start(5)
+    >>> with MemoryLimit(2 ** 20, filenames=['greedy.py']) as limit:
+    ...     script.run(**limit.bindings())
+    ... # doctest: +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    MemoryLimitExceeded: More than 1048576 bytes allocated.
+    >>> limit.peak > 2 ** 20
+    True
+    >>> tracemalloc.stop()
+
+At each check the growth of the memory traced in the whole process since
+the start of the execution is compared with the limit, which is cheap. If
+other threads allocate as well, the growth overestimates the memory of the
+execution. So if `filenames` are given, a snapshot filtered by them
+confirms the growth before `MemoryLimitExceeded` is raised; snapshots cost
+time proportional to the traced allocations, they are only taken when the
+growth could exceed the limit. Without `filenames` all allocations during
+the execution count.
+
+`peak` is the largest memory seen at the checks (the growth unless a
+snapshot was taken) and at the end of the `with` statement, `allocated` the
+memory still allocated at its end, e.g. for capacity planning. A
+single call between two checkpoints (e.g. `[0] * 10 ** 9`) cannot be
+interrupted, restrict such calls with the builtins.
+"""
+
+from RestrictedPython._compat import monotonic
+from RestrictedPython.checkpoints import Deadline
+
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+
+class MemoryLimitExceeded(Exception):
+    """The restricted code allocated more memory than allowed."""
+
+
+class MemoryLimit(Deadline):
+    """Measure and limit the memory allocated by restricted code.
+
+    max_bytes -- the maximal memory of the execution in bytes, `None` for
+        accounting only
+    filenames -- the filenames of the restricted code, allocations with one
+        of them in their traceback are attributed to the execution
+    timeout, limit, check_every, clock -- see `Deadline`
+    """
+
+    def __init__(self, max_bytes=None, filenames=None, timeout=None,
+                 limit=None, check_every=100, clock=monotonic):
+        self.max_bytes = max_bytes
+        self.filenames = filenames
+        super(MemoryLimit, self).__init__(timeout, limit, check_every, clock)
+
+    def __enter__(self):
+        self.reset()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.allocated = self._measure(final=True)
+
+    def reset(self):
+        """Start measuring from the currently traced memory.
+
+        A `RuntimeError` is raised if `tracemalloc` is not tracing.
+        """
+        if tracemalloc is None or not tracemalloc.is_tracing():
+            raise RuntimeError(
+                'tracemalloc is not tracing, call tracemalloc.start().')
+        self.peak = 0
+        self.allocated = None
+        self.snapshots = 0
+        self._baseline = tracemalloc.get_traced_memory()[0]
+        # The growth up to which no snapshot is needed.
+        self._unconfirmed = self.max_bytes
+        super(MemoryLimit, self).reset()
+
+    def check(self):
+        """Raise `MemoryLimitExceeded` if the memory exceeds `max_bytes`.
+
+        Otherwise the deadline, cancellation and step limit are checked.
+        """
+        super(MemoryLimit, self).check()
+        self._measure()
+
+    def _attributed(self):
+        self.snapshots += 1
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(True, filename, all_frames=True)
+            for filename in self.filenames])
+        return sum(trace.size for trace in snapshot.traces)
+
+    def _measure(self, final=False):
+        growth = tracemalloc.get_traced_memory()[0] - self._baseline
+        memory = growth
+        if self.filenames and (final or (
+                self._unconfirmed is not None and growth > self._unconfirmed)):
+            memory = self._attributed()
+            if self.max_bytes is not None:
+                # The attributed memory cannot grow faster than the growth.
+                self._unconfirmed = growth + self.max_bytes - memory
+        self.peak = max(self.peak, memory)
+        if (not final and self.max_bytes is not None
+                and memory > self.max_bytes):
+            raise MemoryLimitExceeded(
+                'More than {0} bytes allocated.'.format(self.max_bytes))
+        return memory
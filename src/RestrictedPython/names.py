@@ -0,0 +1,246 @@
+##############################################################################
+#
+# Copyright (c) 2018 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE
+#
+##############################################################################
+"""
+names module:
+
+Scope aware analysis of the names a (transformed) AST reads from and writes
+to the global namespace.
+
+In contrast to `used_names`, which contains every loaded name of the source,
+this analysis follows the Python scoping rules, so function locals, arguments,
+closure variables and comprehension variables are not reported as globals.
+"""
+
+from ._compat import IS_PY2
+from collections import namedtuple
+
+import ast
+
+
+_NameInfo = namedtuple('NameInfo', 'free_globals, assigned_globals, guards')
+
+
+class NameInfo(_NameInfo):
+    """Result of the scope aware name analysis.
+
+    free_globals -- names the code reads from the global namespace (or from
+        `__builtins__`). Names the code binds at module level are included:
+        the read may happen before the binding or the binding may be
+        conditional, so a host has to provide them if it can.
+    assigned_globals -- names the code binds at module level, including names
+        declared `global` in a function and bound there.
+    guards -- the guard hooks (like `_getattr_`, `_getiter_`, `_print_`) the
+        generated code references.
+    """
+
+    __slots__ = ()
+
+
+def is_guard_name(name):
+    """Names starting with `_` cannot be used by restricted source code.
+
+    So they are always introduced by the transformer.
+    """
+    return name.startswith('_') and name != '_'
+
+
+class Scope(object):
+    """Names bound and loaded in one scope (module, class or function)."""
+
+    def __init__(self, kind, parent=None):
+        self.kind = kind
+        self.parent = parent
+        self.bound = set()
+        self.declared_global = set()
+        self.loaded = set()
+        self.children = []
+        if parent is not None:
+            parent.children.append(self)
+
+    def resolves_globally(self, name):
+        """Check whether a load of `name` in this scope reads a global."""
+        if name in self.declared_global:
+            return True
+        if self.kind == 'module':
+            return True
+        if name in self.bound:
+            return False
+        # Class scopes are not visible for nested functions.
+        scope = self.parent
+        while scope.kind != 'module':
+            if (scope.kind == 'function'
+                    and name in scope.bound
+                    and name not in scope.declared_global):
+                return False
+            scope = scope.parent
+        return True
+
+
+class ScopeCollector(ast.NodeVisitor):
+    """Collect the bound and loaded names per scope of an AST."""
+
+    def __init__(self):
+        self.module = Scope('module')
+        self.scope = self.module
+        self.has_class = False
+
+    def new_scope(self, kind):
+        return Scope(kind, self.scope)
+
+    def visit_in_scope(self, scope, nodes):
+        old_scope = self.scope
+        self.scope = scope
+        try:
+            for node in nodes:
+                self.visit(node)
+        finally:
+            self.scope = old_scope
+
+    def bind(self, name):
+        self.scope.bound.add(name)
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Load):
+            self.scope.loaded.add(node.id)
+        else:
+            # Store, Del and Param (the later is Python 2 only).
+            self.bind(node.id)
+
+    def visit_arg(self, node):
+        # Annotations are visited in the enclosing scope by `visit_function`.
+        self.bind(node.arg)
+
+    def visit_Global(self, node):
+        self.scope.declared_global.update(node.names)
+
+    def visit_alias(self, node):
+        if node.asname:
+            self.bind(node.asname)
+        elif node.name != '*':
+            self.bind(node.name.split('.')[0])
+
+    def visit_ExceptHandler(self, node):
+        if isinstance(node.name, str):
+            # Python 3 stores the name as a string, Python 2 as ast.Name.
+            self.bind(node.name)
+        self.generic_visit(node)
+
+    def visit_arguments(self, node):
+        # Defaults are visited in the enclosing scope by `visit_function`.
+        for arg in node.args:
+            self.visit(arg)
+        for name in (node.vararg, node.kwarg):
+            if name is None:
+                continue
+            if isinstance(name, ast.AST):
+                self.visit(name)
+            else:
+                self.bind(name)
+        for arg in getattr(node, 'kwonlyargs', ()):
+            self.visit(arg)
+
+    def visit_function(self, node, body):
+        args = node.args
+        outer = list(args.defaults)
+        outer.extend(d for d in getattr(args, 'kw_defaults', ()) if d)
+        outer.extend(getattr(node, 'decorator_list', ()))
+        if not IS_PY2:
+            arg_nodes = list(args.args) + list(args.kwonlyargs)
+            arg_nodes.extend(a for a in (args.vararg, args.kwarg) if a)
+            outer.extend(a.annotation for a in arg_nodes if a.annotation)
+            if getattr(node, 'returns', None):
+                outer.append(node.returns)
+        for child in outer:
+            self.visit(child)
+        self.visit_in_scope(self.new_scope('function'), [args] + body)
+
+    def visit_FunctionDef(self, node):
+        self.bind(node.name)
+        self.visit_function(node, node.body)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node):
+        self.visit_function(node, [node.body])
+
+    def visit_ClassDef(self, node):
+        self.has_class = True
+        self.bind(node.name)
+        for child in node.bases:
+            self.visit(child)
+        for child in getattr(node, 'keywords', ()):
+            self.visit(child)
+        for child in node.decorator_list:
+            self.visit(child)
+        self.visit_in_scope(self.new_scope('class'), node.body)
+
+    def visit_comprehension_scope(self, node, elements):
+        generators = node.generators
+        # The outermost iterable is evaluated in the enclosing scope.
+        self.visit(generators[0].iter)
+        nodes = [generators[0].target] + generators[0].ifs
+        for generator in generators[1:]:
+            nodes.append(generator)
+        nodes.extend(elements)
+        self.visit_in_scope(self.new_scope('function'), nodes)
+
+    def visit_ListComp(self, node):
+        if IS_PY2:
+            # List comprehension variables leak into the enclosing scope.
+            self.generic_visit(node)
+        else:
+            self.visit_comprehension_scope(node, [node.elt])
+
+    def visit_SetComp(self, node):
+        self.visit_comprehension_scope(node, [node.elt])
+
+    visit_GeneratorExp = visit_SetComp
+
+    def visit_DictComp(self, node):
+        self.visit_comprehension_scope(node, [node.key, node.value])
+
+
+def analyze_names(tree):
+    """Compute the `NameInfo` for an AST.
+
+    The AST should be the transformed one, so the guards introduced by the
+    policy are part of the result.
+    """
+    collector = ScopeCollector()
+    collector.visit(tree)
+
+    read_globals = set()
+    assigned = set(collector.module.bound)
+    to_check = [collector.module]
+    while to_check:
+        scope = to_check.pop()
+        to_check.extend(scope.children)
+        for name in scope.loaded:
+            if scope.resolves_globally(name):
+                read_globals.add(name)
+        if scope.kind != 'module':
+            assigned.update(scope.bound & scope.declared_global)
+
+    # Internal names like `_print` are bound by the generated code itself.
+    guards = frozenset(
+        name for name in read_globals
+        if is_guard_name(name) and name not in assigned)
+    free = set(name for name in read_globals if not is_guard_name(name))
+    if collector.has_class and '__name__' not in assigned:
+        # Class bodies implicitly read `__name__` to set `__module__`.
+        free.add('__name__')
+
+    return NameInfo(
+        free_globals=frozenset(free),
+        assigned_globals=frozenset(assigned),
+        guards=guards)
@@ -0,0 +1,251 @@
+##############################################################################
+#
+# Copyright (c) 2018 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE
+#
+##############################################################################
+"""What the policy adds to the byte code of a source.
+
+    >>> from RestrictedPython.overhead import compare_compile
+    >>> report = compare_compile('def f(ob):\\n    return ob.a[0]')
+    >>> function = report.functions[1]
+    >>> function.name, sorted(function.guard_sites.items())
+    ('<module>.f', [('_getattr_', 1), ('_getitem_', 1)])
+    >>> print(report.text())  # doctest: +SKIP
+
+The source is compiled restricted and unrestricted. For each code object
+(module, functions, classes, comprehensions) the number of instructions,
+calls and constants of both variants is counted. The guard call sites are
+the loads of global names which only the restricted variant has.
+
+It can be run as script as well:
+
+    python -m RestrictedPython.overhead [--dis] script.py
+"""
+
+from collections import Counter
+from collections import namedtuple
+from RestrictedPython._compat import IS_PY2
+from RestrictedPython.compile import _compile_restricted_mode
+from RestrictedPython.transformer import RestrictingNodeTransformer
+
+import dis
+import sys
+import types
+
+
+CodeStats = namedtuple('CodeStats', 'instructions, calls, constants')
+
+_FunctionOverhead = namedtuple(
+    'FunctionOverhead', 'name, plain, restricted, guard_sites')
+
+
+class FunctionOverhead(_FunctionOverhead):
+    """The overhead of one code object.
+
+    name -- the dotted path of the code object names, e.g. '<module>.f'
+    plain, restricted -- the `CodeStats` of both variants, `None` if a
+        variant has no such code object
+    guard_sites -- dict: guard name -> number of call sites
+    """
+
+    __slots__ = ()
+
+    def extra(self, field):
+        """Return the number of `field` the restricted variant adds."""
+        return (getattr(self.restricted, field, 0)
+                - getattr(self.plain, field, 0))
+
+
+# Loads of global names, `LOAD_NAME` is used in module and class bodies.
+_GLOBAL_LOADS = frozenset(['LOAD_GLOBAL', 'LOAD_NAME'])
+
+
+def _instructions(code):
+    """Yield (opname, name or argument) for the instructions of `code`."""
+    if IS_PY2:
+        co_code = code.co_code
+        i = 0
+        extended_arg = 0
+        while i < len(co_code):
+            op = ord(co_code[i])
+            if op < dis.HAVE_ARGUMENT:
+                i += 1
+                yield dis.opname[op], None
+                continue
+            arg = ord(co_code[i + 1]) + ord(co_code[i + 2]) * 256
+            arg += extended_arg
+            i += 3
+            extended_arg = 0
+            if op == dis.EXTENDED_ARG:
+                extended_arg = arg * 65536
+                continue
+            if op in dis.hasname:
+                arg = code.co_names[arg]
+            yield dis.opname[op], arg
+    else:
+        for instruction in dis.get_instructions(code):
+            if instruction.opname != 'EXTENDED_ARG':
+                yield instruction.opname, instruction.argval
+
+
+def _code_stats(code):
+    instructions = calls = 0
+    loads = Counter()
+    for opname, arg in _instructions(code):
+        instructions += 1
+        if opname == 'CALL' or opname.startswith('CALL_'):
+            calls += 1
+        elif opname in _GLOBAL_LOADS:
+            loads[arg] += 1
+    return CodeStats(instructions, calls, len(code.co_consts)), loads
+
+
+def _code_objects(code, name=None):
+    """Return an ordered list of (dotted name, code object)."""
+    name = code.co_name if name is None else name
+    result = [(name, code)]
+    seen = Counter()
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            # Make the names of e.g. several list comprehensions unique.
+            seen[const.co_name] += 1
+            nested_name = name + '.' + const.co_name
+            if seen[const.co_name] > 1:
+                nested_name += '#{0}'.format(seen[const.co_name])
+            result.extend(_code_objects(const, nested_name))
+    return result
+
+
+class OverheadReport(object):
+    """Result of `compare_compile`.
+
+    plain, restricted -- the code objects of both variants
+    functions -- list of `FunctionOverhead`, the module first
+    guard_sites -- dict: guard name -> call sites in the whole code
+    """
+
+    def __init__(self, plain, restricted):
+        self.plain = plain
+        self.restricted = restricted
+        plain_codes = dict(_code_objects(plain))
+        self.functions = []
+        self.guard_sites = Counter()
+        for name, code in _code_objects(restricted):
+            stats, loads = _code_stats(code)
+            plain_stats, plain_loads = None, Counter()
+            if name in plain_codes:
+                plain_stats, plain_loads = _code_stats(plain_codes.pop(name))
+            loads.subtract(plain_loads)
+            guard_sites = dict(
+                (guard, count) for guard, count in loads.items() if count > 0)
+            self.guard_sites.update(guard_sites)
+            self.functions.append(
+                FunctionOverhead(name, plain_stats, stats, guard_sites))
+        for name, code in plain_codes.items():
+            self.functions.append(
+                FunctionOverhead(name, _code_stats(code)[0], None, {}))
+        self.guard_sites = dict(self.guard_sites)
+
+    def text(self):
+        """Return a table of the overhead per code object."""
+        lines = ['{0:30} {1:>14} {2:>10} {3:>10}  {4}'.format(
+            'code object', 'instructions', 'calls', 'constants',
+            'guard call sites')]
+        for function in self.functions:
+            columns = [
+                '{0}{1:+d}'.format(
+                    getattr(function.plain, field, 0),
+                    function.extra(field))
+                for field in CodeStats._fields]
+            lines.append('{0:30} {1:>14} {2:>10} {3:>10}  {4}'.format(
+                function.name, *columns + [', '.join(
+                    '{0}: {1}'.format(guard, count)
+                    for guard, count in sorted(
+                        function.guard_sites.items()))]))
+        lines.append('guard call sites: {0}'.format(', '.join(
+            '{0}: {1}'.format(guard, count)
+            for guard, count in sorted(self.guard_sites.items()))))
+        return '\n'.join(lines)
+
+    def disassembly(self, width=60):
+        """Return the plain and restricted disassembly side by side."""
+        plain_codes = dict(_code_objects(self.plain))
+        restricted_codes = dict(_code_objects(self.restricted))
+        lines = []
+        for function in self.functions:
+            lines.append('== {0} '.format(function.name).ljust(
+                2 * width + 3, '='))
+            left = _disassemble(plain_codes.get(function.name))
+            right = _disassemble(restricted_codes.get(function.name))
+            for index in range(max(len(left), len(right))):
+                lines.append('{0} | {1}'.format(
+                    _cell(left, index, width), _cell(right, index, width)))
+        return '\n'.join(lines)
+
+
+def _cell(lines, index, width):
+    line = lines[index] if index < len(lines) else ''
+    return line[:width].ljust(width)
+
+
+def _disassemble(code):
+    if code is None:
+        return []
+    try:
+        from StringIO import StringIO
+    except ImportError:
+        from io import StringIO
+    out = StringIO()
+    if IS_PY2:
+        # `dis.disassemble` of Python 2 prints to `sys.stdout`.
+        stdout, sys.stdout = sys.stdout, out
+        try:
+            dis.disassemble(code)
+        finally:
+            sys.stdout = stdout
+    else:
+        dis.disassemble(code, file=out)
+    return [line.rstrip() for line in out.getvalue().splitlines()
+            if line.strip()]
+
+
+def compare_compile(source, filename='<string>', mode='exec',
+                    policy=RestrictingNodeTransformer):
+    """Compile `source` restricted and unrestricted and compare the code.
+
+    Returns an `OverheadReport`. A `SyntaxError` is raised if the source
+    cannot be compiled restricted.
+    """
+    result = _compile_restricted_mode(
+        source, filename=filename, mode=mode, policy=policy)
+    if result.errors:
+        raise SyntaxError(result.errors)
+    plain = compile(source, filename, mode)
+    return OverheadReport(plain, result.code)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    show_dis = '--dis' in argv
+    paths = [arg for arg in argv if arg != '--dis']
+    if len(paths) != 1:
+        sys.stderr.write(
+            'usage: python -m RestrictedPython.overhead [--dis] script.py\n')
+        return 2
+    with open(paths[0]) as f:
+        report = compare_compile(f.read(), paths[0])
+    sys.stdout.write(report.text() + '\n')
+    if show_dis:
+        sys.stdout.write(report.disassembly() + '\n')
+    return 0
+
+
+if __name__ == '__main__':  # pragma: no cover
+    sys.exit(main())
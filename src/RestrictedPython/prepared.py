@@ -0,0 +1,167 @@
+##############################################################################
+#
+# Copyright (c) 2018 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE
+#
+##############################################################################
+"""Compile restricted code once and run it many times."""
+
+from RestrictedPython._compat import MappingProxyType
+from RestrictedPython.checkpoints import no_checkpoint
+from RestrictedPython.compile import compile_restricted_eval
+from RestrictedPython.compile import compile_restricted_exec
+from RestrictedPython.Eval import default_guarded_getitem
+from RestrictedPython.Eval import default_guarded_getiter
+from RestrictedPython.Guards import full_write_guard
+from RestrictedPython.Guards import guarded_iter_unpack_sequence
+from RestrictedPython.Guards import guarded_unpack_sequence
+from RestrictedPython.Guards import inplace_fast_types
+from RestrictedPython.Guards import make_callattr
+from RestrictedPython.Guards import make_getattr_path
+from RestrictedPython.Guards import make_getpath
+from RestrictedPython.Guards import safe_builtins
+from RestrictedPython.Guards import safer_callattr
+from RestrictedPython.Guards import safer_getattr
+from RestrictedPython.Guards import safer_getattr_path
+from RestrictedPython.Guards import safer_getpath
+from RestrictedPython.PrintCollector import PrintCollector
+from RestrictedPython.transformer import RestrictingNodeTransformer
+
+
+# The guards RestrictedPython ships an implementation for. There are no
+# defaults for `_inplacevar_` and `_apply_`, hosts have to provide them.
+default_guards = {
+    '_getattr_': safer_getattr,
+    '_getitem_': default_guarded_getitem,
+    '_getiter_': default_guarded_getiter,
+    '_getattr_path_': safer_getattr_path,
+    '_getpath_': safer_getpath,
+    '_callattr_': safer_callattr,
+    '_inplace_fast_types_': inplace_fast_types,
+    '_write_': full_write_guard,
+    '_print_': PrintCollector,
+    '_unpack_sequence_': guarded_unpack_sequence,
+    '_iter_unpack_sequence_': guarded_iter_unpack_sequence,
+    '_tick_': no_checkpoint,
+    '__metaclass__': type,
+}
+
+
+def derived_guards(guards):
+    """Return the helpers of `default_guards` which follow `guards`.
+
+    `_getattr_path_`, `_getpath_` and `_callattr_` default to versions of
+    the default `_getattr_` and `_getitem_`. If a host replaces those but
+    not the helpers, helpers applying the host's guards are returned, so the
+    host's checks cannot be bypassed by the opt-in rewrites.
+    """
+    derived = {}
+    getattr_ = guards.get('_getattr_')
+    getitem_ = guards.get('_getitem_')
+    if getattr_ is not None:
+        if '_getattr_path_' not in guards:
+            derived['_getattr_path_'] = make_getattr_path(getattr_)
+        if '_callattr_' not in guards:
+            derived['_callattr_'] = make_callattr(getattr_)
+    if (getattr_ is not None or getitem_ is not None) and (
+            '_getpath_' not in guards):
+        derived['_getpath_'] = make_getpath(
+            getattr_ or default_guards['_getattr_'],
+            getitem_ or default_guards['_getitem_'])
+    return derived
+
+
+_compilers = {
+    'exec': compile_restricted_exec,
+    'eval': compile_restricted_eval,
+}
+
+
+class PreparedScript(object):
+    """Restricted code together with the globals it needs to run.
+
+    The source is compiled once. The globals every execution needs (the
+    builtins, the guards referenced by the code and the static `globals`) are
+    collected once into a template, so each `run` only costs one shallow copy
+    of the template.
+
+    source -- the source code, it is compiled in `mode` ('exec' or 'eval').
+    builtins -- the `__builtins__` for the code, defaults to `safe_builtins`.
+    guards -- mapping of guard implementations which take precedence over
+        `default_guards`. Helpers not given are derived from a given
+        `_getattr_` or `_getitem_`, see `derived_guards`.
+    globals -- further static globals for each execution.
+    result_name -- in 'exec' mode `run` returns the value of this global
+        after the execution instead of the whole globals dict.
+
+    A `SyntaxError` is raised if the source cannot be compiled and a
+    `ValueError` if the code needs a guard there is no implementation for.
+    """
+
+    def __init__(self, source, filename='<string>', mode='exec',
+                 policy=RestrictingNodeTransformer, builtins=None,
+                 guards=None, globals=None, result_name=None):
+        if mode not in _compilers:
+            raise TypeError('unknown mode %s' % mode)
+        self.mode = mode
+        self.result_name = result_name
+        self.result = _compilers[mode](source, filename, policy=policy)
+        if self.result.errors:
+            raise SyntaxError(self.result.errors)
+        self.code = self.result.code
+
+        available_guards = dict(default_guards)
+        if guards:
+            available_guards.update(guards)
+            available_guards.update(derived_guards(guards))
+
+        template = {
+            '__builtins__': safe_builtins if builtins is None else builtins,
+            '__name__': filename,
+        }
+        names = self.result.names
+        if names is None:
+            # Compiled without policy, we do not know which guards are used.
+            template.update(available_guards)
+        else:
+            missing = names.guards.difference(available_guards)
+            if missing:
+                raise ValueError(
+                    'No implementation for the guards: {0}.'.format(
+                        ', '.join(sorted(missing))))
+            for name in names.guards:
+                template[name] = available_guards[name]
+        if globals:
+            template.update(globals)
+        self._template = template
+        self.template = MappingProxyType(template)
+
+    def globals(self, bindings=None):
+        """Return a new globals dict for one execution."""
+        glb = self._template.copy()
+        if bindings:
+            glb.update(bindings)
+        return glb
+
+    def run(self, **bindings):
+        """Run the code with `bindings` as additional globals.
+
+        Returns the value of the expression in 'eval' mode. In 'exec' mode
+        the globals after the execution or the value of `result_name` in them
+        is returned.
+        """
+        glb = self._template.copy()
+        if bindings:
+            glb.update(bindings)
+        if self.mode == 'eval':
+            return eval(self.code, glb)
+        exec(self.code, glb)
+        if self.result_name is None:
+            return glb
+        return glb.get(self.result_name)
@@ -0,0 +1,150 @@
+##############################################################################
+#
+# Copyright (c) 2018 Zope Foundation and Contributors.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE
+#
+##############################################################################
+"""Profiling of the `visit_*` methods of policies.
+
+Mix `ProfilingPolicyMixin` into a policy to find its expensive rules:
+
+    >>> from RestrictedPython import compile_restricted_exec
+    >>> from RestrictedPython.profiling import ProfilingPolicyMixin
+    >>> from RestrictedPython.profiling import VisitorProfile
+    >>> from RestrictedPython.transformer import RestrictingNodeTransformer
+    >>> class ProfiledPolicy(ProfilingPolicyMixin, RestrictingNodeTransformer):
+    ...     profile = VisitorProfile()
+    >>> result = compile_restricted_exec('a = b', policy=ProfiledPolicy)
+    >>> ProfiledPolicy.profile.as_dict()[
+    ...     ('RestrictingNodeTransformer', 'Name', 'visit_Name')]['calls']
+    2
+
+The policy itself is not changed, so there is no overhead for compilations
+using it without the mixin.
+"""
+
+from RestrictedPython._compat import perf_counter
+
+import threading
+
+
+class VisitorProfile(object):
+    """Timings of the visitor methods aggregated over compilations.
+
+    The entries are keyed by (policy, node type, method): the name of the
+    class defining the method, the class name of the visited node and the
+    name of the method. Per key the number of `calls`, the `total` time
+    including the visits of the child nodes and the `own` time excluding
+    them are recorded, in seconds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def merge(self, entries):
+        """Add `entries` (key -> [calls, total, own]) to the profile."""
+        with self._lock:
+            for key, (calls, total, own) in entries.items():
+                entry = self._entries.get(key)
+                if entry is None:
+                    self._entries[key] = [calls, total, own]
+                else:
+                    entry[0] += calls
+                    entry[1] += total
+                    entry[2] += own
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def as_dict(self):
+        """Return a dict: key -> {'calls': ..., 'total': ..., 'own': ...}."""
+        with self._lock:
+            return dict(
+                (key, {'calls': calls, 'total': total, 'own': own})
+                for key, (calls, total, own) in self._entries.items())
+
+    def table(self, sort='own', limit=None):
+        """Return the entries as text table, most expensive first.
+
+        `sort` is one of 'own', 'total' or 'calls'.
+        """
+        rows = sorted(
+            self.as_dict().items(),
+            key=lambda item: item[1][sort],
+            reverse=True)[:limit]
+        lines = ['{0:>10} {1:>12} {2:>12}  {3}'.format(
+            'calls', 'total [ms]', 'own [ms]', 'policy.method (node type)')]
+        for (policy, node_type, method), entry in rows:
+            lines.append('{0:>10} {1:>12.3f} {2:>12.3f}  {3}.{4} ({5})'.format(
+                entry['calls'], entry['total'] * 1e3, entry['own'] * 1e3,
+                policy, method, node_type))
+        return '\n'.join(lines)
+
+
+class ProfilingPolicyMixin(object):
+    """Mixin for policies timing each call of a visitor method.
+
+    The timings of a compilation are added to `profile` when the visit of
+    the root node is done. The default profile is shared by all profiled
+    policies, subclasses can use their own one.
+    """
+
+    profile = VisitorProfile()
+
+    # (policy class, method name) -> name of the class defining the method
+    _method_owners = {}
+
+    def _method_owner(self, method):
+        key = (self.__class__, method)
+        owner = self._method_owners.get(key)
+        if owner is None:
+            owner = self.__class__.__name__
+            for klass in self.__class__.__mro__:
+                if method in vars(klass):
+                    owner = klass.__name__
+                    break
+            self._method_owners[key] = owner
+        return owner
+
+    def visit(self, node):
+        node_type = node.__class__.__name__
+        method = 'visit_' + node_type
+        visitor = getattr(self, method, None)
+        if visitor is None:
+            method = 'generic_visit'
+            visitor = self.generic_visit
+        try:
+            stack = self._profile_stack
+            entries = self._profile_entries
+        except AttributeError:
+            stack = self._profile_stack = []
+            entries = self._profile_entries = {}
+        # The time spent in the visits of the child nodes.
+        stack.append(0.0)
+        start = perf_counter()
+        try:
+            return visitor(node)
+        finally:
+            elapsed = perf_counter() - start
+            own = elapsed - stack.pop()
+            key = (self._method_owner(method), node_type, method)
+            entry = entries.get(key)
+            if entry is None:
+                entries[key] = [1, elapsed, own]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed
+                entry[2] += own
+            if stack:
+                stack[-1] += elapsed
+            else:
+                self.profile.merge(entries)
+                entries.clear()
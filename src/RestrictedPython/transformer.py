@@ -26,10 +26,13 @@ from ._compat import IS_PY2
 from ._compat import IS_PY3
 from ._compat import IS_PY34_OR_GREATER
 from ._compat import IS_PY35_OR_GREATER
+from .diagnostics import Diagnostic
+from .diagnostics import ERROR
+from .diagnostics import WARNING
 
 import ast
 import contextlib
-import textwrap
+import copy
 
 
 # For AugAssign the operator must be converted to a string.
@@ -67,6 +70,30 @@ ALLOWED_FUNC_NAMES = frozenset([
 ])
 
 
+# Guards which get a call site ID as last argument if the policy has
+# `call_site_ids` enabled.
+CALL_SITE_GUARD_NAMES = {
+    '_getattr_': '_getattr_site_',
+    '_getitem_': '_getitem_site_',
+    '_getiter_': '_getiter_site_',
+}
+
+
+# Guards which can be fused into an access path if the policy has
+# `fuse_access_chains` enabled, mapped to the kind of the access step.
+ACCESS_PATH_GUARD_KINDS = {
+    '_getattr_': 'a',
+    '_getitem_': 'i',
+}
+
+# Subscript keys which may be evaluated before the access steps of a path.
+if IS_PY3:
+    ACCESS_PATH_KEY_TYPES = (ast.Name, ast.Num, ast.Str, ast.Bytes,
+                             ast.NameConstant)
+else:
+    ACCESS_PATH_KEY_TYPES = (ast.Name, ast.Num, ast.Str)
+
+
 FORBIDDEN_FUNC_NAMES = frozenset([
     'print',
     'printed',
@@ -84,6 +111,11 @@ def copy_locations(new_node, old_node):
     assert 'col_offset' in new_node._attributes
     new_node.col_offset = old_node.col_offset
 
+    # Python 3.8+: Python 3.12 rejects nodes ending before they start.
+    for name in ('end_lineno', 'end_col_offset'):
+        if hasattr(old_node, name):
+            setattr(new_node, name, getattr(old_node, name))
+
     ast.fix_missing_locations(new_node)
 
 
@@ -109,8 +141,66 @@ class PrintInfo(object):
 
 class RestrictingNodeTransformer(ast.NodeTransformer):
 
+    # Opt-in: call `_getattr_site_(ob, name, site)`,
+    # `_getitem_site_(ob, index, site)` and `_getiter_site_(ob, site)`
+    # instead of `_getattr_`, `_getitem_` and `_getiter_`. `site` is an int
+    # constant which is unique per call site within the compiled code, so
+    # the guards can keep per site caches.
+    call_site_ids = False
+
+    # Opt-in: collapse chains of attribute and subscript loads into one call.
+    # 'a.b.c' becomes '_getattr_path_(a, ("b", "c"))' and 'a.b[i]' becomes
+    # '_getpath_(a, "ai", ("b", i))', see `gen_access_path`. The helpers
+    # have to apply `_getattr_` resp. `_getitem_` for each step.
+    # It is not combined with `call_site_ids`.
+    fuse_access_chains = False
+
+    # Opt-in: call methods using '_callattr_(a, "b", x)' instead of
+    # '_getattr_(a, "b")(x)', see `gen_callattr`. The arguments are
+    # evaluated before the guard is called. Calls with '*args' or
+    # '**kwargs' still use `_apply_`. It is not combined with
+    # `call_site_ids`.
+    call_attributes = False
+
+    # Opt-in: 'n += 1' becomes
+    # 'n = n + 1 if n.__class__ in _inplace_fast_types_ else
+    # _inplacevar_("+=", n, 1)'. `_inplace_fast_types_` has to contain
+    # only immutable types without in-place methods, for those 'n += 1' is
+    # equivalent to 'n = n + 1'.
+    inplace_fast_path = False
+
+    # Opt-in: in modules each slice with literal bounds like 'x[1:-1]' is
+    # created once at the top, '_slice0 = slice(1, -1, None)', and the
+    # subscripts use the hidden name instead of calling 'slice(...)' on each
+    # evaluation. Expressions compiled in 'eval' or 'single' mode keep the
+    # calls.
+    constant_slices = False
+
+    # Opt-in: `compile_restricted*` measure the phases of each compilation
+    # and count the nodes. The `CompileStats` are available as
+    # `CompileResult.stats` and are passed to `report_compile_stats`.
+    compile_stats = False
+
+    # Opt-in: call `_tick_()` at the start of each iteration of `for` and
+    # `while` loops and comprehensions and of each function body, so the
+    # host can limit or abort long running code, see
+    # `RestrictedPython.checkpoints`. In comprehensions the call is the first
+    # condition '(_tick_() or True)', so the return value of `_tick_` does
+    # not matter. Lambdas are not instrumented.
+    step_checkpoints = False
+
     def __init__(self, errors=None, warnings=None, used_names=None):
         super(RestrictingNodeTransformer, self).__init__()
+        self.reset(errors, warnings, used_names)
+
+    def reset(self, errors=None, warnings=None, used_names=None):
+        """Prepare the instance for transforming the next source.
+
+        `compile_restricted*` reuse the instances of a policy only if the
+        policy class defines `reset` itself, an inherited `reset` does not
+        count. Subclasses opt in by overriding it, resetting their own state
+        and calling the base class.
+        """
         self.errors = [] if errors is None else errors
         self.warnings = [] if warnings is None else warnings
 
@@ -121,11 +211,28 @@ class RestrictingNodeTransformer(ast.NodeTransformer):
         # know wich names it has to supply when calling the final code.
         self.used_names = {} if used_names is None else used_names
 
+        # The `Diagnostic` records of `errors` and `warnings`, see `report`.
+        self.diagnostics = []
+        self._reported = None
+
         # Global counter to construct temporary variable names.
         self._tmp_idx = 0
 
+        # Counter for the call site IDs, see `call_site_ids`.
+        self._site_idx = 0
+
+        # Bounds -> name of the constant slices of the module, `None` outside
+        # of modules. See `constant_slices`.
+        self._slice_names = None
+
         self.print_info = PrintInfo()
 
+    def report_compile_stats(self, stats):
+        """Export the `CompileStats` of a compilation, e.g. to a metrics sink.
+
+        Called by `compile_restricted*` if `compile_stats` is enabled.
+        """
+
     def gen_tmp_name(self):
         # 'check_name' ensures that no variable is prefixed with '_'.
         # => Its safe to use '_tmp..' as a temporary variable.
@@ -133,17 +240,157 @@ class RestrictingNodeTransformer(ast.NodeTransformer):
         self._tmp_idx += 1
         return name
 
+    def gen_guard_call(self, guard_name, args):
+        """Create the call of a guard which supports call site IDs.
+
+        If `call_site_ids` is enabled the site variant of the guard is
+        called with the next call site ID as additional last argument.
+        """
+        if self.call_site_ids:
+            guard_name = CALL_SITE_GUARD_NAMES[guard_name]
+            args = args + [ast.Num(self._site_idx)]
+            self._site_idx += 1
+        return ast.Call(
+            func=ast.Name(guard_name, ast.Load()),
+            args=args,
+            keywords=[])
+
+    def gen_access_path(self, node):
+        """Fuse the guard call `node` with the access chain it is applied to.
+
+        `node` is a just generated `_getattr_` or `_getitem_` call. If its
+        object is an access chain, one call of `_getattr_path_` (only
+        attribute steps) or of `_getpath_` (mixed steps with a string of
+        kinds, 'a' for attribute, 'i' for item) is returned. Subscript keys
+        have to be names or constants, as all keys are evaluated before the
+        first step.
+        """
+        if not self.fuse_access_chains:
+            return node
+        kind = ACCESS_PATH_GUARD_KINDS.get(node.func.id)
+        key = node.args[1]
+        if kind is None or not isinstance(key, ACCESS_PATH_KEY_TYPES):
+            return node
+
+        path = self.split_access_path(node.args[0])
+        if path is None:
+            return node
+        base, kinds, keys = path
+        new_node = self.gen_path_call(base, kinds + kind, keys + [key])
+        copy_locations(new_node, node)
+        return new_node
+
+    def split_access_path(self, node):
+        """Return `(base, kinds, keys)` if `node` is a fusable guard call.
+
+        Otherwise return None.
+        """
+        if not (isinstance(node, ast.Call)
+                and isinstance(node.func, ast.Name)):
+            return None
+        func = node.func.id
+        if func == '_getattr_path_':
+            keys = node.args[1].elts
+            return node.args[0], 'a' * len(keys), keys
+        elif func == '_getpath_':
+            return node.args[0], node.args[1].s, node.args[2].elts
+        elif (func in ACCESS_PATH_GUARD_KINDS
+                and isinstance(node.args[1], ACCESS_PATH_KEY_TYPES)):
+            return node.args[0], ACCESS_PATH_GUARD_KINDS[func], [node.args[1]]
+        return None
+
+    def gen_path_call(self, base, kinds, keys):
+        """Create the guard call for an access chain of `kinds` and `keys`."""
+        if len(kinds) == 1:
+            guard_name = '_getattr_' if kinds == 'a' else '_getitem_'
+            args = [base, keys[0]]
+        elif kinds == 'a' * len(kinds):
+            guard_name = '_getattr_path_'
+            args = [base, ast.Tuple(elts=keys, ctx=ast.Load())]
+        else:
+            guard_name = '_getpath_'
+            args = [base, ast.Str(kinds), ast.Tuple(elts=keys, ctx=ast.Load())]
+        return ast.Call(
+            func=ast.Name(guard_name, ast.Load()),
+            args=args,
+            keywords=[])
+
+    def gen_callattr(self, node):
+        """Transform the call of a guarded attribute into `_callattr_`.
+
+        `node` is a call, whose function was an attribute before the
+        transformation. 'a.b(x, y=z)' becomes '_callattr_(a, "b", x, y=z)'.
+        The last step of a fused access chain is split off.
+        """
+        path = self.split_access_path(node.func)
+        if path is None or path[1][-1] != 'a':
+            return node
+        base, kinds, keys = path
+        if len(kinds) > 1:
+            base = self.gen_path_call(base, kinds[:-1], keys[:-1])
+            copy_locations(base, node.func)
+        new_node = ast.Call(
+            func=ast.Name('_callattr_', ast.Load()),
+            args=[base, keys[-1]] + node.args,
+            keywords=node.keywords)
+        copy_locations(new_node, node)
+        return new_node
+
+    def diagnostic(self, severity, node, info, code, args):
+        return Diagnostic(
+            severity,
+            code,
+            getattr(node, 'lineno', None),
+            getattr(node, 'col_offset', None),
+            node.__class__.__name__,
+            info,
+            args)
+
+    def report(self, node, diagnostic):
+        """Record the `Diagnostic` of a rule violated at `node`.
+
+        The built-in rules report their records here. The text is passed on
+        to `error` or `warn`, so policies overriding them see all messages.
+        """
+        self._reported = diagnostic
+        try:
+            if diagnostic.severity == ERROR:
+                self.error(node, diagnostic.message)
+            else:
+                self.warn(node, diagnostic.message)
+        finally:
+            self._reported = None
+
+    def report_error(self, node, template, code, **args):
+        """Report an error with the `code` of the rule, see `report`."""
+        self.report(node, self.diagnostic(ERROR, node, template, code, args))
+
+    def report_warning(self, node, template, code, **args):
+        """Report a warning with the `code` of the rule, see `report`."""
+        self.report(
+            node, self.diagnostic(WARNING, node, template, code, args))
+
+    def _record_diagnostic(self, severity, node, info, code):
+        # The record passed to `report` or one without a specific code.
+        diagnostic = self._reported
+        self._reported = None
+        if diagnostic is None:
+            diagnostic = self.diagnostic(severity, node, info, code, None)
+        self.diagnostics.append(diagnostic)
+
     def error(self, node, info):
         """Record a security error discovered during transformation."""
         lineno = getattr(node, 'lineno', None)
         self.errors.append(
             'Line {lineno}: {info}'.format(lineno=lineno, info=info))
+        self._record_diagnostic(ERROR, node, info, 'policy-error')
 
     def warn(self, node, info):
         """Record a security error discovered during transformation."""
         lineno = getattr(node, 'lineno', None)
         self.warnings.append(
             'Line {lineno}: {info}'.format(lineno=lineno, info=info))
+        self._record_diagnostic(WARNING, node, info, 'policy-warning')
 
     def guard_iter(self, node):
         """
@@ -167,10 +414,7 @@ class RestrictingNodeTransformer(ast.NodeTransformer):
                 args=[node.iter, spec, ast.Name('_getiter_', ast.Load())],
                 keywords=[])
         else:
-            new_iter = ast.Call(
-                func=ast.Name("_getiter_", ast.Load()),
-                args=[node.iter],
-                keywords=[])
+            new_iter = self.gen_guard_call('_getiter_', [node.iter])
 
         copy_locations(new_iter, node.iter)
         node.iter = new_iter
@@ -335,6 +579,13 @@ class RestrictingNodeTransformer(ast.NodeTransformer):
         else:
             return ast.Name(id='None', ctx=ast.Load())
 
+    def gen_true_node(self):
+        if IS_PY34_OR_GREATER:
+            return ast.NameConstant(value=True)
+        else:
+            # `True` is a name in Python 2 which the builtins may not have.
+            return ast.Num(n=1)
+
     def gen_lambda(self, args, body):
         return ast.Lambda(
             args=ast.arguments(
@@ -356,6 +607,11 @@ class RestrictingNodeTransformer(ast.NodeTransformer):
             return slice_.value
 
         elif isinstance(slice_, ast.Slice):
+            if self.constant_slices and self._slice_names is not None:
+                name = self.gen_constant_slice_name(slice_)
+                if name is not None:
+                    return ast.Name(name, ast.Load())
+
             # Create a python slice object.
             args = []
 
@@ -389,6 +645,64 @@ class RestrictingNodeTransformer(ast.NodeTransformer):
             # Index, Slice and ExtSlice are only defined Slice types.
             raise NotImplementedError("Unknown slice type: {0}".format(slice_))
 
+    def constant_slice_bounds(self, slice_):
+        """Return the bounds of `slice_` as constant nodes.
+
+        None is returned if a bound is not a number literal (negative
+        numbers included) or `None`.
+        """
+        bounds = []
+        for bound in (slice_.lower, slice_.upper, slice_.step):
+            if bound is None:
+                bound = self.gen_none_node()
+            elif isinstance(bound, ast.Num):
+                pass
+            elif (isinstance(bound, ast.UnaryOp)
+                    and isinstance(bound.op, ast.USub)
+                    and isinstance(bound.operand, ast.Num)):
+                bound = ast.Num(-bound.operand.n)
+            elif IS_PY34_OR_GREATER and isinstance(bound, ast.NameConstant):
+                if bound.value is not None:
+                    return None
+            elif isinstance(bound, ast.Name) and bound.id == 'None':
+                pass
+            else:
+                return None
+            bounds.append(bound)
+        return bounds
+
+    def gen_constant_slice_name(self, slice_):
+        """Return the hidden name of the constant slice for `slice_`.
+
+        None is returned if the bounds are not constant.
+        """
+        bounds = self.constant_slice_bounds(slice_)
+        if bounds is None:
+            return None
+        key = tuple(
+            (type(bound.n), bound.n) if isinstance(bound, ast.Num) else None
+            for bound in bounds)
+        name = self._slice_names.get(key)
+        if name is None:
+            name = self._slice_names[key] = '_slice%i' % len(
+                self._slice_names)
+            self._slice_bounds.append(bounds)
+        return name
+
+    def inject_constant_slices(self, node, position):
+        """Create the constant slices of the module `node` at `position`."""
+        for index, bounds in reversed(list(enumerate(self._slice_bounds))):
+            assign = ast.Assign(
+                targets=[ast.Name('_slice%i' % index, ast.Store())],
+                value=ast.Call(
+                    func=ast.Name('slice', ast.Load()),
+                    args=bounds,
+                    keywords=[]))
+            assign.lineno = position
+            assign.col_offset = position
+            ast.fix_missing_locations(assign)
+            node.body.insert(position, assign)
+
     def check_name(self, node, name, allow_magic_methods=False):
         """Check names if they are allowed.
 
@@ -404,15 +718,19 @@ class RestrictingNodeTransformer(ast.NodeTransformer):
                 and not (allow_magic_methods
                          and name in ALLOWED_FUNC_NAMES
                          and node.col_offset != 0)):
-            self.error(
+            self.report_error(
                 node,
                 '"{name}" is an invalid variable name because it '
-                'starts with "_"'.format(name=name))
+                'starts with "_"', 'name-underscore', name=name)
         elif name.endswith('__roles__'):
-            self.error(node, '"%s" is an invalid variable name because '
-                       'it ends with "__roles__".' % name)
+            self.report_error(
+                node,
+                '"{name}" is an invalid variable name because it ends '
+                'with "__roles__".', 'name-roles', name=name)
         elif name in FORBIDDEN_FUNC_NAMES:
-            self.error(node, '"{name}" is a reserved name.'.format(name=name))
+            self.report_error(
+                node, '"{name}" is a reserved name.', 'name-reserved',
+                name=name)
 
     def check_function_argument_names(self, node):
         # In python3 arguments are always identifiers.
@@ -459,7 +777,8 @@ class RestrictingNodeTransformer(ast.NodeTransformer):
         """
         for name in node.names:
             if '*' in name.name:
-                self.error(node, '"*" imports are not allowed.')
+                self.report_error(
+                    node, '"*" imports are not allowed.', 'import-star')
             self.check_name(node, name.name)
             if name.asname:
                 self.check_name(node, name.asname)
@@ -490,10 +809,35 @@ class RestrictingNodeTransformer(ast.NodeTransformer):
             node.body.insert(position, _print)
 
             if not printed_used:
-                self.warn(node, "Prints, but never reads 'printed' variable.")
+                self.report_warning(
+                    node,
+                    "Prints, but never reads 'printed' variable.",
+                    'printed-not-read')
 
             elif not print_used:
-                self.warn(node, "Doesn't print, but reads 'printed' variable.")
+                self.report_warning(
+                    node,
+                    "Doesn't print, but reads 'printed' variable.",
+                    'printed-without-print')
+
+    def inject_checkpoint(self, node):
+        """Insert `_tick_()` as first statement of the body of `node`.
+
+        The location of `node` is used. In functions the checkpoint follows
+        the docstring.
+        """
+        if not self.step_checkpoints:
+            return
+        checkpoint = ast.Expr(ast.Call(
+            func=ast.Name('_tick_', ast.Load()),
+            args=[],
+            keywords=[]))
+        copy_locations(checkpoint, node)
+        position = 0
+        if (not isinstance(node, (ast.For, ast.While))
+                and ast.get_docstring(node, clean=False) is not None):
+            position = 1
+        node.body.insert(position, checkpoint)
 
     def gen_attr_check(self, node, attr_name):
         """Check if 'attr_name' is allowed on the object in node.
@@ -518,17 +862,19 @@ class RestrictingNodeTransformer(ast.NodeTransformer):
 
         To access `generic_visit` on the super class use `node_contents_visit`.
         """
-        self.warn(
+        self.report_warning(
             node,
-            '{0.__class__.__name__}'
-            ' statement is not known to RestrictedPython'.format(node)
-        )
+            '{node_type} statement is not known to RestrictedPython',
+            'unknown-node',
+            node_type=node.__class__.__name__)
         self.not_allowed(node)
 
     def not_allowed(self, node):
-        self.error(
+        self.report_error(
             node,
-            '{0.__class__.__name__} statements are not allowed.'.format(node))
+            '{node_type} statements are not allowed.',
+            'not-allowed',
+            node_type=node.__class__.__name__)
 
     def node_contents_visit(self, node):
         """Visit the contents of a node."""
@@ -811,11 +1157,14 @@ class RestrictingNodeTransformer(ast.NodeTransformer):
 
         if isinstance(node.func, ast.Name):
             if node.func.id == 'exec':
-                self.error(node, 'Exec calls are not allowed.')
+                self.report_error(
+                    node, 'Exec calls are not allowed.', 'exec-call')
             elif node.func.id == 'eval':
-                self.error(node, 'Eval calls are not allowed.')
+                self.report_error(
+                    node, 'Eval calls are not allowed.', 'eval-call')
 
         needs_wrap = False
+        is_attribute_call = isinstance(node.func, ast.Attribute)
 
         # In python2.7 till python3.4 '*args', '**kwargs' have dedicated
         # attributes on the ast.Call node.
@@ -839,6 +1188,8 @@ class RestrictingNodeTransformer(ast.NodeTransformer):
         node = self.node_contents_visit(node)
 
         if not needs_wrap:
+            if is_attribute_call and self.call_attributes:
+                return self.gen_callattr(node)
             return node
 
         node.args.insert(0, node.func)
@@ -866,26 +1217,24 @@ class RestrictingNodeTransformer(ast.NodeTransformer):
         The _write_ function should return a security proxy.
         """
         if node.attr.startswith('_') and node.attr != '_':
-            self.error(
+            self.report_error(
                 node,
                 '"{name}" is an invalid attribute name because it starts '
-                'with "_".'.format(name=node.attr))
+                'with "_".', 'attribute-underscore', name=node.attr)
 
         if node.attr.endswith('__roles__'):
-            self.error(
+            self.report_error(
                 node,
                 '"{name}" is an invalid attribute name because it ends '
-                'with "__roles__".'.format(name=node.attr))
+                'with "__roles__".', 'attribute-roles', name=node.attr)
 
         if isinstance(node.ctx, ast.Load):
             node = self.node_contents_visit(node)
-            new_node = ast.Call(
-                func=ast.Name('_getattr_', ast.Load()),
-                args=[node.value, ast.Str(node.attr)],
-                keywords=[])
+            new_node = self.gen_guard_call(
+                '_getattr_', [node.value, ast.Str(node.attr)])
 
             copy_locations(new_node, node)
-            return new_node
+            return self.gen_access_path(new_node)
 
         elif isinstance(node.ctx, (ast.Store, ast.Del)):
             node = self.node_contents_visit(node)
@@ -927,13 +1276,11 @@ class RestrictingNodeTransformer(ast.NodeTransformer):
         # Instead ast.c creates 'AugAssign' nodes, which can be visited.
 
         if isinstance(node.ctx, ast.Load):
-            new_node = ast.Call(
-                func=ast.Name('_getitem_', ast.Load()),
-                args=[node.value, self.transform_slice(node.slice)],
-                keywords=[])
+            new_node = self.gen_guard_call(
+                '_getitem_', [node.value, self.transform_slice(node.slice)])
 
             copy_locations(new_node, node)
-            return new_node
+            return self.gen_access_path(new_node)
 
         elif isinstance(node.ctx, (ast.Del, ast.Store)):
             new_value = ast.Call(
@@ -998,7 +1345,17 @@ class RestrictingNodeTransformer(ast.NodeTransformer):
         """
 
         """
-        return self.guard_iter(node)
+        node = self.guard_iter(node)
+        if self.step_checkpoints:
+            checkpoint = ast.BoolOp(ast.Or(), [
+                ast.Call(
+                    func=ast.Name('_tick_', ast.Load()),
+                    args=[],
+                    keywords=[]),
+                self.gen_true_node()])
+            copy_locations(checkpoint, node.target)
+            node.ifs.insert(0, checkpoint)
+        return node
 
     # Statements
 
@@ -1062,21 +1419,24 @@ class RestrictingNodeTransformer(ast.NodeTransformer):
         subscripts is disallowed, augmented assignment of names (such
         as 'n += 1') is allowed.
         'n += 1' becomes 'n = _inplacevar_("+=", n, 1)'
+        See `inplace_fast_path` for an optimized variant.
         """
 
         node = self.node_contents_visit(node)
 
         if isinstance(node.target, ast.Attribute):
-            self.error(
+            self.report_error(
                 node,
-                "Augmented assignment of attributes is not allowed.")
+                "Augmented assignment of attributes is not allowed.",
+                'augassign-attribute')
             return node
 
         elif isinstance(node.target, ast.Subscript):
-            self.error(
+            self.report_error(
                 node,
                 "Augmented assignment of object items "
-                "and slices is not allowed.")
+                "and slices is not allowed.",
+                'augassign-subscript')
             return node
 
         elif isinstance(node.target, ast.Name):
@@ -1091,6 +1451,10 @@ class RestrictingNodeTransformer(ast.NodeTransformer):
                     ],
                     keywords=[]))
 
+            if self.inplace_fast_path:
+                new_node.value = self.gen_inplace_fast_path(
+                    node, new_node.value)
+
             copy_locations(new_node, node)
             return new_node
         else:  # pragma: no cover
@@ -1102,6 +1466,28 @@ class RestrictingNodeTransformer(ast.NodeTransformer):
             raise NotImplementedError(
                 "Unknown target type: {0}".format(type(node.target)))
 
+    def gen_inplace_fast_path(self, node, inplacevar_call):
+        """Apply the binary operation if the target has an immutable type.
+
+        Only one of the branches is executed, so the value is evaluated
+        once, although it occurs twice in the generated code. Faking
+        `__class__` only leads to the (allowed) binary operation.
+        """
+        name = node.target.id
+        return ast.IfExp(
+            test=ast.Compare(
+                left=ast.Attribute(
+                    value=ast.Name(name, ast.Load()),
+                    attr='__class__',
+                    ctx=ast.Load()),
+                ops=[ast.In()],
+                comparators=[ast.Name('_inplace_fast_types_', ast.Load())]),
+            body=ast.BinOp(
+                left=ast.Name(name, ast.Load()),
+                op=type(node.op)(),
+                right=copy.deepcopy(node.value)),
+            orelse=inplacevar_call)
+
     def visit_Print(self, node):
         """Checks and mutates a print statement.
 
@@ -1119,9 +1505,11 @@ class RestrictingNodeTransformer(ast.NodeTransformer):
         """
 
         self.print_info.print_used = True
-        self.warn(node,
-                  "Print statement is deprecated and "
-                  "not avaliable anymore in Python 3.")
+        self.report_warning(
+            node,
+            "Print statement is deprecated and "
+            "not avaliable anymore in Python 3.",
+            'print-statement')
 
         node = self.node_contents_visit(node)
         if node.dest is None:
@@ -1180,11 +1568,15 @@ class RestrictingNodeTransformer(ast.NodeTransformer):
 
     def visit_For(self, node):
         """Allow `for` statements with some restrictions."""
-        return self.guard_iter(node)
+        node = self.guard_iter(node)
+        self.inject_checkpoint(node)
+        return node
 
     def visit_While(self, node):
         """Allow `while` statements."""
-        return self.node_contents_visit(node)
+        node = self.node_contents_visit(node)
+        self.inject_checkpoint(node)
+        return node
 
     def visit_Break(self, node):
         """Allow `break` statements without restrictions."""
@@ -1280,6 +1672,7 @@ class RestrictingNodeTransformer(ast.NodeTransformer):
         with self.print_info.new_print_scope():
             node = self.node_contents_visit(node)
             self.inject_print_collector(node)
+        self.inject_checkpoint(node)
 
         if IS_PY3:
             return node
@@ -1391,20 +1784,29 @@ class RestrictingNodeTransformer(ast.NodeTransformer):
             new_class_node = node
         else:
             if any(keyword.arg == 'metaclass' for keyword in node.keywords):
-                self.error(
-                    node, 'The keyword argument "metaclass" is not allowed.')
-            CLASS_DEF = textwrap.dedent('''\
-                class {0.name}(metaclass=__metaclass__):
-                    pass
-            '''.format(node))
-            new_class_node = ast.parse(CLASS_DEF).body[0]
-            new_class_node.body = node.body
-            new_class_node.bases = node.bases
-            new_class_node.decorator_list = node.decorator_list
+                self.report_error(
+                    node, 'The keyword argument "metaclass" is not allowed.',
+                    'metaclass-keyword')
+            # 'class Foo(Bar):' becomes
+            # 'class Foo(Bar, metaclass=__metaclass__):'; other keywords are
+            # dropped.
+            metaclass = ast.Name('__metaclass__', ast.Load())
+            copy_locations(metaclass, node)
+            node.keywords = [ast.keyword(arg='metaclass', value=metaclass)]
+            if not IS_PY35_OR_GREATER:
+                node.starargs = None
+                node.kwargs = None
+            new_class_node = node
         return new_class_node
 
     def visit_Module(self, node):
-        """Add the print_collector (only if print is used) at the top."""
+        """Add the print_collector (only if print is used) at the top.
+
+        The constant slices are created there as well.
+        """
+        if self.constant_slices:
+            self._slice_names = {}
+            self._slice_bounds = []
         node = self.node_contents_visit(node)
 
         # Inject the print collector after 'from __future__ import ....'
@@ -1417,6 +1819,8 @@ class RestrictingNodeTransformer(ast.NodeTransformer):
                 break
 
         self.inject_print_collector(node, position)
+        if self._slice_names:
+            self.inject_constant_slices(node, position)
         return node
 
     def visit_Param(self, node):
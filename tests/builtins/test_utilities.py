@@ -147,3 +147,27 @@ def test_reorder_with__not_None():
     without = ['a', 'c', 'e']
     after = reorder(before, with_=with_, without=without)
     assert after == [('d', 'd')]
+
+
+def test_LazyImport__1():
+    """It imports the object on first use and forwards to it."""
+    from RestrictedPython.Utilities import LazyImport
+    from collections import OrderedDict
+    lazy = LazyImport('collections', 'OrderedDict')
+    assert repr(lazy) == '<LazyImport collections.OrderedDict>'
+    assert '_lazy_value' not in lazy.__dict__
+    ob = lazy([('a', 1)])
+    assert ob == OrderedDict([('a', 1)])
+    assert lazy.__dict__['_lazy_value'] is OrderedDict
+    assert lazy.fromkeys('a') == OrderedDict([('a', None)])
+    assert isinstance(ob, lazy)
+    assert not isinstance({}, lazy)
+    assert issubclass(OrderedDict, lazy)
+    assert not issubclass(dict, lazy)
+
+
+def test_module_available__1():
+    """It checks whether a module can be imported."""
+    from RestrictedPython.Utilities import module_available
+    assert module_available('string')
+    assert not module_available('RestrictedPython_not_existing')
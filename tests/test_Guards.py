@@ -1,8 +1,11 @@
 from RestrictedPython._compat import IS_PY2
 from RestrictedPython._compat import IS_PY3
+from RestrictedPython.Guards import GuardDecisionCache
 from RestrictedPython.Guards import guarded_unpack_sequence
+from RestrictedPython.Guards import make_cached_getattr
 from RestrictedPython.Guards import safe_builtins
 from RestrictedPython.Guards import safer_getattr
+from RestrictedPython.Guards import safer_getattr_policy
 from tests import c_exec
 from tests import e_eval
 from tests import e_exec
@@ -241,3 +244,108 @@ def test_call_py2_builtins(c_exec):
     result = c_exec('__builtins__["getattr"]')
     assert result.code is None
     assert result.errors == ('Line 1: "__builtins__" is an invalid variable name because it starts with "_"',)  # NOQA: E501
+
+
+class PolicyRecorder(object):
+    """Policy for `GuardDecisionCache` which records its calls."""
+
+    def __init__(self, denied=()):
+        self.calls = []
+        self.denied = denied
+
+    def __call__(self, ob, name):
+        self.calls.append((type(ob), name))
+        return name not in self.denied
+
+
+class NewStyle(object):
+    foo = 'foo'
+    bar = 'bar'
+
+
+def test_Guards__GuardDecisionCache__1():
+    """It calls the policy only once per type and name."""
+    policy = PolicyRecorder(denied=('bar',))
+    cache = GuardDecisionCache(policy)
+    assert cache.allowed(NewStyle(), 'foo') is True
+    assert cache.allowed(NewStyle(), 'foo') is True
+    assert cache.allowed(NewStyle(), 'bar') is False
+    assert cache.allowed(NewStyle(), 'bar') is False
+    assert cache.allowed([], 'foo') is True
+    assert policy.calls == [
+        (NewStyle, 'foo'), (NewStyle, 'bar'), (list, 'foo')]
+
+
+def test_Guards__GuardDecisionCache__2():
+    """It asks the policy again after invalidation."""
+    policy = PolicyRecorder()
+    cache = GuardDecisionCache(policy)
+    cache.allowed(NewStyle(), 'foo')
+    cache.allowed([], 'foo')
+    cache.invalidate(NewStyle)
+    cache.allowed(NewStyle(), 'foo')
+    cache.allowed([], 'foo')
+    assert policy.calls == [
+        (NewStyle, 'foo'), (list, 'foo'), (NewStyle, 'foo')]
+    cache.invalidate()
+    cache.allowed([], 'foo')
+    assert policy.calls[-1] == (list, 'foo')
+    assert len(policy.calls) == 4
+
+
+def test_Guards__GuardDecisionCache__3():
+    """It does not keep the types alive."""
+    import gc
+    import weakref
+
+    class Temporary(object):
+        pass
+
+    cache = GuardDecisionCache(safer_getattr_policy)
+    cache.allowed(Temporary(), 'foo')
+    assert len(cache._decisions) == 1
+    ref = weakref.ref(Temporary)
+    del Temporary
+    gc.collect()
+    assert ref() is None
+    assert cache._decisions == {}
+
+
+@pytest.mark.skipif(IS_PY3, reason='Old-style classes only exist in Python 2')
+def test_Guards__GuardDecisionCache__4():
+    """It does not cache decisions for old-style instances."""
+    class OldStyle:
+        pass
+
+    policy = PolicyRecorder()
+    cache = GuardDecisionCache(policy)
+    cache.allowed(OldStyle(), 'foo')
+    cache.allowed(OldStyle(), 'foo')
+    assert len(policy.calls) == 2
+
+
+def test_Guards__make_cached_getattr__1():
+    """It creates a `_getattr_` with a cached policy."""
+    guard = make_cached_getattr(safer_getattr_policy)
+    assert guard(NewStyle(), 'foo') == 'foo'
+    assert guard('abc', 'upper')() == 'ABC'
+    with pytest.raises(AttributeError) as err:
+        guard('abc', 'format')
+    assert str(err.value) == (
+        'Access to "format" of str objects is not allowed.')
+    assert guard.cache.allowed('abc', 'format') is False
+
+
+@pytest.mark.parametrize(*e_exec)
+def test_Guards__make_cached_getattr__2(e_exec):
+    """It can be used as `_getattr_` in restricted code."""
+    policy = PolicyRecorder(denied=('bar',))
+    glb = {'_getattr_': make_cached_getattr(policy, NotImplementedError),
+           '_getiter_': iter,
+           'obs': [NewStyle(), NewStyle()],
+           'ob': NewStyle()}
+    e_exec('result = [ob.foo for ob in obs]', glb)
+    assert glb['result'] == ['foo', 'foo']
+    assert policy.calls == [(NewStyle, 'foo')]
+    with pytest.raises(NotImplementedError):
+        e_exec('ob.bar', glb)
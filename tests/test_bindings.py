@@ -0,0 +1,81 @@
+from RestrictedPython import compile_restricted_exec
+from RestrictedPython.bindings import LazyGlobals
+from RestrictedPython.Guards import safe_builtins
+from RestrictedPython.Guards import safer_getattr
+
+
+FACTORY_CALLS = []
+
+
+def factory(name):
+    def factory():
+        FACTORY_CALLS.append(name)
+        return name.upper()
+    return factory
+
+
+def test_LazyGlobals__bind__1():
+    """It only creates the globals used by the code."""
+    FACTORY_CALLS[:] = []
+    lazy = LazyGlobals(
+        factories={'context': factory('context'),
+                   'request': factory('request')},
+        values={'_getattr_': safer_getattr, 'unused': 42},
+        builtins=safe_builtins)
+    result = compile_restricted_exec('result = context.lower()')
+    glb = lazy.bind(result)
+    assert FACTORY_CALLS == ['context']
+    assert sorted(glb) == ['__builtins__', '_getattr_', 'context']
+    exec(result.code, glb)
+    assert glb['result'] == 'context'
+
+
+def test_LazyGlobals__bind__2():
+    """It calls a factory registered for several names only once."""
+    FACTORY_CALLS[:] = []
+    shared = factory('shared')
+    lazy = LazyGlobals(factories={'a': shared, 'b': shared})
+    result = compile_restricted_exec('c = a + b')
+    glb = lazy.bind(result)
+    assert FACTORY_CALLS == ['shared']
+    assert glb == {'a': 'SHARED', 'b': 'SHARED'}
+
+
+def test_LazyGlobals__bind__3():
+    """It calls the factories again for each execution."""
+    FACTORY_CALLS[:] = []
+    lazy = LazyGlobals()
+    lazy.register('a', factory('a'))
+    result = compile_restricted_exec('b = a')
+    lazy.bind(result)
+    lazy.bind(result)
+    assert FACTORY_CALLS == ['a', 'a']
+
+
+def test_LazyGlobals__bind__4():
+    """It prefers explicit bindings over values and factories."""
+    FACTORY_CALLS[:] = []
+    lazy = LazyGlobals(factories={'a': factory('a')}, values={'b': 1})
+    result = compile_restricted_exec('c = a + b')
+    glb = lazy.bind(result, {'a': 'x', 'b': 'y', 'd': 'z'})
+    assert FACTORY_CALLS == []
+    assert glb == {'a': 'x', 'b': 'y', 'd': 'z'}
+
+
+def test_LazyGlobals__bind__5():
+    """It binds all known names if there is no name analysis."""
+    FACTORY_CALLS[:] = []
+    lazy = LazyGlobals(factories={'a': factory('a')}, values={'b': 1})
+    result = compile_restricted_exec('c = 1', policy=None)
+    assert lazy.bind(result) == {'a': 'A', 'b': 1}
+
+
+def test_LazyGlobals__bind__6():
+    """It binds names the code reads before assigning them."""
+    lazy = LazyGlobals(
+        values={'title': ' Title ', '_getattr_': safer_getattr},
+        builtins=safe_builtins)
+    result = compile_restricted_exec('title = title.strip()')
+    glb = lazy.bind(result)
+    exec(result.code, glb)
+    assert glb['title'] == 'Title'
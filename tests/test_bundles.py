@@ -0,0 +1,76 @@
+from RestrictedPython import PreparedScript
+from RestrictedPython.bundles import builtins_bundle
+from RestrictedPython.bundles import builtins_sets
+from RestrictedPython.bundles import clear_bundles
+from RestrictedPython.Guards import safe_builtins
+from RestrictedPython.Limits import limited_builtins
+from RestrictedPython.Utilities import utility_builtins
+
+import pytest
+
+
+def test_builtins_bundle__1():
+    """It merges the builtins, later sets take precedence."""
+    bundle = builtins_bundle('safe', 'limited', 'utility')
+    assert bundle.names == ('safe', 'limited', 'utility')
+    assert len(bundle.builtins) == len(
+        set(safe_builtins) | set(limited_builtins) | set(utility_builtins))
+    assert bundle.builtins['range'] is limited_builtins['range']
+    assert bundle.builtins['same_type'] is utility_builtins['same_type']
+    bundle = builtins_bundle('limited', 'safe')
+    assert bundle.builtins['range'] is safe_builtins['range']
+
+
+def test_builtins_bundle__2():
+    """It caches the bundle per combination of sets."""
+    bundle = builtins_bundle('safe', 'limited')
+    assert builtins_bundle('safe', 'limited') is bundle
+    assert builtins_bundle('limited', 'safe') is not bundle
+
+
+def test_builtins_bundle__3():
+    """It has a read-only view of the builtins."""
+    bundle = builtins_bundle('safe')
+    assert bundle.view['len'] is len
+    with pytest.raises(TypeError):
+        bundle.view['len'] = None
+    assert repr(bundle) == '<BuiltinsBundle safe>'
+
+
+def test_builtins_bundle__4():
+    """It returns a private copy on `copy`."""
+    bundle = builtins_bundle('safe')
+    builtins = bundle.copy()
+    builtins['foo'] = 42
+    assert builtins is not bundle.builtins
+    assert 'foo' not in bundle.builtins
+
+
+def test_builtins_bundle__5():
+    """It raises a KeyError on an unknown set."""
+    with pytest.raises(KeyError):
+        builtins_bundle('safe', 'unknown')
+
+
+def test_builtins_bundle__6():
+    """It can be used as builtins for restricted code."""
+    script = PreparedScript(
+        'result = same_type(list([1]), [])',
+        builtins=builtins_bundle('safe', 'limited', 'utility').builtins,
+        result_name='result')
+    assert script.run() is True
+
+
+def test_clear_bundles__1():
+    """It recomputes the bundles after `clear_bundles`."""
+    builtins_sets['test'] = {'a': 1}
+    try:
+        bundle = builtins_bundle('test')
+        builtins_sets['test']['b'] = 2
+        assert builtins_bundle('test') is bundle
+        assert 'b' not in bundle.builtins
+        clear_bundles()
+        assert builtins_bundle('test').builtins == {'a': 1, 'b': 2}
+    finally:
+        del builtins_sets['test']
+        clear_bundles()
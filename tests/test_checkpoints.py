@@ -0,0 +1,175 @@
+from RestrictedPython import PreparedScript
+from RestrictedPython.checkpoints import Deadline
+from RestrictedPython.checkpoints import DeadlineExceeded
+from RestrictedPython.checkpoints import ExecutionCancelled
+from RestrictedPython.checkpoints import StepBudget
+from RestrictedPython.checkpoints import StepBudgetExceeded
+from RestrictedPython.transformer import RestrictingNodeTransformer
+
+import itertools
+import pytest
+import threading
+import time
+
+
+class CheckpointPolicy(RestrictingNodeTransformer):
+
+    step_checkpoints = True
+
+
+def make_script(source, policy=CheckpointPolicy):
+    return PreparedScript(source, 'script.py', policy=policy)
+
+
+LOOP = """\
+n = 0
+while True:
+    n = n + 1
+"""
+
+
+def test_StepBudget__1():
+    """It raises `StepBudgetExceeded` after exactly `limit` steps."""
+    script = make_script(LOOP)
+    budget = StepBudget(limit=2500, check_every=1000)
+    glb = script.globals(budget.bindings())
+    with pytest.raises(StepBudgetExceeded) as exc_info:
+        exec(script.code, glb)
+    assert str(exc_info.value) == 'More than 2500 steps.'
+    assert glb['n'] == 2500
+    assert budget.steps == 2500
+
+
+def test_StepBudget__2():
+    """It counts the steps of scripts within the limit."""
+    script = make_script("""\
+def double(x):
+    return 2 * x
+result = [double(i) for i in range(10)]
+""")
+    budget = StepBudget(limit=20, check_every=3)
+    script.run(**budget.bindings())
+    # Each iteration of the comprehension and each call of `double`:
+    assert budget.steps == 20
+    budget.reset()
+    assert budget.steps == 0
+    script.run(**budget.bindings())
+    with pytest.raises(StepBudgetExceeded):
+        budget.tick()
+
+
+def test_StepBudget__3():
+    """It raises again at each checkpoint after the limit."""
+    script = make_script("""\
+caught = 0
+while True:
+    try:
+        while True:
+            pass
+    except Exception:
+        caught = caught + 1
+""")
+    budget = StepBudget(limit=100)
+    glb = script.globals(budget.bindings())
+    with pytest.raises(StepBudgetExceeded):
+        exec(script.code, glb)
+    assert glb['caught'] == 1
+
+
+def test_StepBudget__4():
+    """It calls `check` every `check_every` steps."""
+
+    class Cancelled(Exception):
+        pass
+
+    class CheckingBudget(StepBudget):
+        checks = 0
+
+        def check(self):
+            self.checks += 1
+            if self.checks == 4:
+                raise Cancelled()
+            super(CheckingBudget, self).check()
+
+    budget = CheckingBudget(check_every=10)
+    with pytest.raises(Cancelled):
+        make_script(LOOP).run(**budget.bindings())
+    assert budget.steps == 30
+
+
+def test_StepBudget__5():
+    """The default `_tick_` of `PreparedScript` does not limit anything."""
+    script = make_script('for i in range(5000):\n    pass')
+    assert script.run() is not None
+
+
+class FakeClock(object):
+    """Clock advancing one second per call."""
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        self.now += 1
+        return self.now
+
+
+def test_Deadline__1():
+    """It raises `DeadlineExceeded` at the first check after the deadline."""
+    clock = FakeClock()
+    deadline = Deadline(timeout=3, check_every=10, clock=clock)
+    assert deadline.deadline == 4
+    script = make_script(LOOP)
+    glb = script.globals(deadline.bindings())
+    with pytest.raises(DeadlineExceeded) as exc_info:
+        exec(script.code, glb)
+    assert str(exc_info.value) == 'The deadline of 3 seconds passed.'
+    # The clock is read at the checks before the steps 0, 10, 20.
+    assert glb['n'] == 20
+
+
+def test_Deadline__2():
+    """It can be cancelled from another thread."""
+    deadline = Deadline(check_every=100)
+    script = make_script(LOOP)
+    timer = threading.Timer(0.05, deadline.cancel)
+    start = time.time()
+    timer.start()
+    try:
+        with pytest.raises(ExecutionCancelled):
+            script.run(**deadline.bindings())
+    finally:
+        timer.cancel()
+    assert time.time() - start < 1
+    assert deadline.cancelled
+
+
+def test_Deadline__3():
+    """It stops at a real deadline and still limits the steps."""
+    script = make_script(LOOP)
+    deadline = Deadline(timeout=0.05)
+    start = time.time()
+    with pytest.raises(DeadlineExceeded):
+        script.run(**deadline.bindings())
+    assert 0.05 <= time.time() - start < 1
+
+    deadline = Deadline(timeout=10, limit=500)
+    with pytest.raises(StepBudgetExceeded):
+        script.run(**deadline.bindings())
+    assert deadline.steps == 500
+    deadline.cancel()
+    deadline.reset()
+    assert not deadline.cancelled
+    assert deadline.steps == 0
+
+
+def test_Deadline__4():
+    """It stops a long running generator expression."""
+    script = PreparedScript(
+        'result = sum(x for x in items)', 'script.py',
+        builtins={'sum': sum}, policy=CheckpointPolicy)
+    deadline = Deadline(timeout=0.01)
+    start = time.time()
+    with pytest.raises(DeadlineExceeded):
+        script.run(items=itertools.count(), **deadline.bindings())
+    assert time.time() - start < 1
@@ -1,7 +1,9 @@
 from RestrictedPython import compile_restricted
+from RestrictedPython import compile_restricted_exec
 from RestrictedPython import CompileResult
 from RestrictedPython._compat import IS_PY2
 from RestrictedPython._compat import IS_PY3
+from RestrictedPython.transformer import RestrictingNodeTransformer
 from tests import c_eval
 from tests import c_exec
 from tests import c_single
@@ -9,6 +11,7 @@ from tests import e_eval
 
 import platform
 import pytest
+import threading
 import types
 
 
@@ -238,3 +241,108 @@ def test_compile_CPython_warning(recwarn, mocker):
         'RestrictedPython is only supported on CPython: use on other Python '
         'implementations may create security issues.'
     )
+
+
+def pooled_policy(policy):
+    from RestrictedPython.compile import _policy_pool
+    return getattr(_policy_pool, 'instances', {}).get(policy)
+
+
+def test_compile___compile_restricted_mode__2():
+    """It reuses the policy instances per thread."""
+    from RestrictedPython.transformer import RestrictingNodeTransformer
+    compile_restricted_exec('a = 1')
+    instance = pooled_policy(RestrictingNodeTransformer)
+    assert instance is not None
+    result = compile_restricted_exec('_a = 1')
+    assert pooled_policy(RestrictingNodeTransformer) is instance
+    assert result.errors == (
+        'Line 1: "_a" is an invalid variable name because it starts with '
+        '"_"',)
+    result = compile_restricted_exec('a = 1')
+    assert result.errors == ()
+    assert result.warnings == []
+
+    other_thread = []
+    thread = threading.Thread(target=lambda: other_thread.append(
+        (compile_restricted_exec('a = 1'),
+         pooled_policy(RestrictingNodeTransformer))))
+    thread.start()
+    thread.join()
+    assert other_thread[0][0].errors == ()
+    assert other_thread[0][1] is not instance
+
+
+def test_compile___compile_restricted_mode__3():
+    """It only reuses policies which define `reset` themselves."""
+    from RestrictedPython.transformer import RestrictingNodeTransformer
+
+    class StatefulPolicy(RestrictingNodeTransformer):
+
+        def visit_Import(self, node):
+            if getattr(self, 'imported', False):
+                self.error(node, 'Only one import.')
+            self.imported = True
+            return super(StatefulPolicy, self).visit_Import(node)
+
+    class ResettingPolicy(StatefulPolicy):
+
+        def reset(self, *args):
+            super(ResettingPolicy, self).reset(*args)
+            self.imported = False
+
+    class InheritingPolicy(ResettingPolicy):
+        pass
+
+    compile_restricted_exec('import a', policy=StatefulPolicy)
+    assert pooled_policy(StatefulPolicy) is None
+    assert compile_restricted_exec(
+        'import b', policy=StatefulPolicy).errors == ()
+    compile_restricted_exec('import a', policy=ResettingPolicy)
+    assert pooled_policy(ResettingPolicy) is not None
+    assert compile_restricted_exec(
+        'import b', policy=ResettingPolicy).errors == ()
+    compile_restricted_exec('import a', policy=InheritingPolicy)
+    assert pooled_policy(InheritingPolicy) is None
+
+
+class StatsPolicy(RestrictingNodeTransformer):
+
+    compile_stats = True
+    reported = []
+
+    def report_compile_stats(self, stats):
+        self.reported.append(stats)
+
+
+def test_compile___compile_restricted_mode__4():
+    """It measures the phases of the compilation if the policy opts in."""
+    assert compile_restricted_exec('a = 1').stats is None
+    result = compile_restricted_exec(
+        'a = b.c', filename='script.py', policy=StatsPolicy)
+    stats = result.stats
+    assert StatsPolicy.reported == [stats]
+    del StatsPolicy.reported[:]
+    assert (stats.filename, stats.mode) == ('script.py', 'exec')
+    assert list(stats.phases) == ['parse', 'transform', 'analyze', 'compile']
+    assert all(time.wall >= 0 and time.cpu >= 0
+               for time in stats.phases.values())
+    # Module, Assign, Name, Attribute, Name
+    assert stats.nodes == 5
+    # `_getattr_(b, 'c')`: Call, Name, Str
+    assert stats.synthesized_nodes == 3
+    assert stats.transformed_nodes == 7
+    metrics = stats.as_metrics()
+    assert metrics['nodes'] == 5
+    assert metrics['compile.cpu'] == stats.phases['compile'].cpu
+
+
+def test_compile___compile_restricted_mode__5():
+    """It reports no transformed nodes if there are errors."""
+    result = compile_restricted_exec('_a = 1', policy=StatsPolicy)
+    del StatsPolicy.reported[:]
+    assert list(result.stats.phases) == ['parse', 'transform']
+    assert result.stats.transformed_nodes is None
+    assert 'synthesized_nodes' not in result.stats.as_metrics()
+    assert compile_restricted_exec('a b', policy=StatsPolicy).stats is None
+    assert StatsPolicy.reported == []
@@ -0,0 +1,112 @@
+from RestrictedPython import PreparedScript
+from RestrictedPython.counters import GuardCounters
+from RestrictedPython.prepared import default_guards
+
+import pytest
+
+
+SOURCE = """\
+result = []
+for a, b in pairs:
+    result.append(a.real)
+"""
+
+
+def run_script(counters, filename='script.py', pairs=((1, 2), (3, 4))):
+    script = PreparedScript(
+        SOURCE, filename, guards=counters.wrap(filename, default_guards),
+        result_name='result')
+    return script.run(pairs=list(pairs))
+
+
+def test_GuardCounters__1():
+    """It counts the guard calls per script filename."""
+    counters = GuardCounters()
+    assert run_script(counters) == [1, 3]
+    run_script(counters)
+    run_script(counters, 'other.py')
+    snapshot = counters.snapshot()
+    assert snapshot['script.py'] == {
+        '_getattr_': 8,  # `result.append` and `a.real`
+        # `_iter_unpack_sequence_` calls it for `pairs` and each pair
+        '_getiter_': 6,
+        '_iter_unpack_sequence_': 2,
+    }
+    assert snapshot['other.py']['_getattr_'] == 4
+    assert counters.line_snapshot() == {}
+
+
+def test_GuardCounters__2():
+    """It records sampled source lines of the calls if enabled."""
+    counters = GuardCounters(line_sample_rate=2)
+    run_script(counters, pairs=[(1, 2)] * 10)
+    lines = counters.line_snapshot()['script.py']
+    assert lines[('_getattr_', 3)] == 20
+    # 11 calls by `_iter_unpack_sequence_` in line 2, 5 are sampled
+    assert lines[('_getiter_', 2)] == 10
+    assert sum(lines.values()) <= sum(
+        counters.snapshot()['script.py'].values())
+
+
+def test_GuardCounters__3():
+    """It hands the counts to a sink on flush and resets them."""
+    counters = GuardCounters(line_sample_rate=1)
+    run_script(counters)
+    flushed = []
+    counters.flush(lambda *args: flushed.append(args))
+    (filename, counts, lines), = flushed
+    assert filename == 'script.py'
+    assert counts['_getattr_'] == 4
+    assert lines[('_getattr_', 3)] == 4
+    assert lines[('_iter_unpack_sequence_', 2)] == 1
+    assert counters.snapshot() == {}
+    del flushed[:]
+    counters.flush(lambda *args: flushed.append(args))
+    assert flushed == []
+
+
+def test_GuardCounters__wrap__1():
+    """It only wraps callable guards."""
+    counters = GuardCounters()
+    wrapped = counters.wrap(
+        'script.py', {'_getattr_': getattr, '_types_': frozenset(),
+                      '__metaclass__': type})
+    assert list(wrapped) == ['_getattr_']
+    assert wrapped['_getattr_'](1, 'real') == 1
+    assert counters.snapshot() == {'script.py': {'_getattr_': 1}}
+
+
+def test_GuardCounters__sample__1():
+    """It counts every n-th execution and estimates the total."""
+    counters = GuardCounters(execution_sample_rate=5)
+    script = PreparedScript(SOURCE, 'script.py', result_name='result')
+    sampled = [
+        counters.sample('script.py', script.template) for i in range(10)]
+    assert [bool(guards) for guards in sampled] == [
+        True, False, False, False, False, True, False, False, False, False]
+    assert sampled[5] is sampled[0]
+    for guards in sampled:
+        assert script.run(pairs=[(1, 2)], **guards) == [1]
+    assert counters.snapshot()['script.py']['_getattr_'] == 20
+    flushed = []
+    counters.flush(lambda *args: flushed.append(args))
+    assert flushed[0][1]['_getattr_'] == 20
+
+
+def test_GuardCounters__sample__2():
+    """It wraps the guards it gets, so they keep restricting the code."""
+
+    class Secret(object):
+        secret = 42
+
+    def deny(ob, name, default=None):
+        raise AttributeError(name)
+
+    counters = GuardCounters()
+    script = PreparedScript(
+        'result = obj.secret', 'script.py', guards={'_getattr_': deny},
+        result_name='result')
+    guards = counters.sample('script.py', script.template)
+    with pytest.raises(AttributeError):
+        script.run(obj=Secret(), **guards)
+    assert counters.snapshot() == {'script.py': {'_getattr_': 1}}
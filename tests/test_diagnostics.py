@@ -0,0 +1,119 @@
+from RestrictedPython import compile_restricted_exec
+from RestrictedPython import compile_restricted_function
+from RestrictedPython.diagnostics import CODES
+from RestrictedPython.diagnostics import Diagnostic
+from RestrictedPython.diagnostics import ERROR
+from RestrictedPython.diagnostics import WARNING
+from RestrictedPython.transformer import RestrictingNodeTransformer
+
+import ast
+
+
+def test_Diagnostic__1():
+    """It is converted to the text of the message."""
+    diagnostic = Diagnostic(
+        ERROR, 'name-reserved', 3, 0, 'Name', '"{name}" is a reserved name.',
+        {'name': 'printed'})
+    assert diagnostic.message == '"printed" is a reserved name.'
+    assert str(diagnostic) == 'Line 3: "printed" is a reserved name.'
+    assert repr(diagnostic) == repr('Line 3: "printed" is a reserved name.')
+
+
+def test_Diagnostic__2():
+    """It compares equal to its text."""
+    diagnostic = Diagnostic(
+        ERROR, 'policy-error', None, None, 'Name', 'Something {is} wrong.')
+    assert diagnostic == 'Line None: Something {is} wrong.'
+    assert diagnostic != 'Line 1: Something {is} wrong.'
+    assert diagnostic == Diagnostic(
+        WARNING, 'policy-warning', None, None, 'Expr',
+        'Something {is} wrong.')
+    assert hash(diagnostic) == hash('Line None: Something {is} wrong.')
+
+
+def test_Diagnostic__3():
+    """Its text is only the message if it has neither location nor node."""
+    diagnostic = Diagnostic(
+        ERROR, 'invalid-source', None, None, None, 'null bytes')
+    assert str(diagnostic) == 'null bytes'
+
+
+def test_compile_restricted_exec__diagnostics__1():
+    """It contains the records of the errors and warnings."""
+    result = compile_restricted_exec('x = 1\nprint(_y.z)')
+    assert result.errors == (
+        'Line 2: "_y" is an invalid variable name because it starts with "_"',)
+    assert result.diagnostics[0] == result.errors[0]
+    # Python 2 warns about the print statement as well.
+    error, warning = result.diagnostics[0], result.diagnostics[-1]
+    assert (error.severity, error.code, error.lineno, error.col_offset,
+            error.node_type) == (ERROR, 'name-underscore', 2, 6, 'Name')
+    assert error.args == {'name': '_y'}
+    assert warning.severity == WARNING
+    assert warning.code == 'printed-not-read'
+    assert str(warning) == result.warnings[-1]
+
+
+def test_compile_restricted_exec__diagnostics__2():
+    """It contains a record for syntax errors."""
+    result = compile_restricted_exec('a b')
+    diagnostic, = result.diagnostics
+    assert diagnostic.code == 'syntax-error'
+    assert diagnostic.lineno == 1
+    assert diagnostic.node_type is None
+    assert result.errors == (str(diagnostic),)
+    result = compile_restricted_function('', 'a b', 'f')
+    assert result.diagnostics[0].code == 'syntax-error'
+    assert result.errors == (str(result.diagnostics[0]),)
+
+
+def test_compile_restricted_exec__diagnostics__3():
+    """Only known codes are used."""
+    sources = (
+        '_a = 1', 'a__roles__ = 1', 'printed = 1', 'a._b', 'a.b__roles__',
+        'from a import *', 'eval("1")', 'a.b += 1', 'a[1] += 1')
+    for source in sources:
+        for diagnostic in compile_restricted_exec(source).diagnostics:
+            assert diagnostic.code in CODES, source
+
+
+class CustomPolicy(RestrictingNodeTransformer):
+
+    def visit_Num(self, node):
+        self.warn(node, 'Numbers {are} boring.')
+        return node
+
+
+def test_compile_restricted_exec__diagnostics__4():
+    """Policies may report diagnostics without a code."""
+    result = compile_restricted_exec('a = 42', policy=CustomPolicy)
+    diagnostic, = result.diagnostics
+    assert diagnostic.code == 'policy-warning'
+    assert result.warnings == ['Line 1: Numbers {are} boring.']
+
+
+class OverridingPolicy(RestrictingNodeTransformer):
+
+    def error(self, node, info):
+        self.errors.append('Forbidden: {}'.format(info))
+
+
+def test_compile_restricted_exec__diagnostics__5():
+    """Overrides of `error(node, info)` get the messages of all rules."""
+    result = compile_restricted_exec('_a = 1', policy=OverridingPolicy)
+    assert result.errors == (
+        'Forbidden: "_a" is an invalid variable name because it starts '
+        'with "_"',)
+    assert result.diagnostics == ()
+
+
+def test_RestrictingNodeTransformer__report__1():
+    """It keeps the texts in `errors` and the records in `diagnostics`."""
+    policy = RestrictingNodeTransformer()
+    policy.visit(ast.parse('_a = 1\na.b += 1'))
+    assert policy.errors == [
+        'Line 1: "_a" is an invalid variable name because it starts with "_"',
+        'Line 2: Augmented assignment of attributes is not allowed.']
+    assert all(isinstance(error, str) for error in policy.errors)
+    assert [diagnostic.code for diagnostic in policy.diagnostics] == [
+        'name-underscore', 'augassign-attribute']
@@ -0,0 +1,94 @@
+"""
+Tests about the modules imported by `import RestrictedPython`
+
+They use `python -X importtime` (Python 3.7+) in a subprocess.
+"""
+
+from RestrictedPython._compat import IS_PY37_OR_GREATER
+
+import os
+import pytest
+import subprocess
+import sys
+
+
+pytestmark = pytest.mark.skipif(
+    not IS_PY37_OR_GREATER,
+    reason='-X importtime was introduced in Python 3.7')
+
+EXPENSIVE_MODULES = frozenset([
+    'DateTime',
+    'platform',
+    'random',
+    'RestrictedPython.Guards',
+    'RestrictedPython.Utilities',
+])
+
+
+def import_times(code):
+    """Return a dict of the modules imported by `code`.
+
+    The values are the cumulative import times in microseconds.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    output = subprocess.check_output(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        stderr=subprocess.STDOUT,
+        env=env)
+    times = {}
+    for line in output.decode('utf-8').splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def newly_imported(code):
+    """Modules imported by `code` but not by the interpreter startup."""
+    return set(import_times(code)) - set(import_times('pass'))
+
+
+def test_import_time__1():
+    """It does not import expensive modules on `import RestrictedPython`."""
+    modules = newly_imported('import RestrictedPython')
+    assert 'RestrictedPython' in modules
+    assert modules & EXPENSIVE_MODULES == set()
+    assert 'RestrictedPython.compile' not in modules
+
+
+def test_import_time__2():
+    """It only imports the modules needed to compile restricted code."""
+    modules = newly_imported(
+        'from RestrictedPython import compile_restricted_eval')
+    assert 'RestrictedPython.compile' in modules
+    assert 'RestrictedPython.transformer' in modules
+    assert modules & EXPENSIVE_MODULES == set()
+
+
+def test_import_time__3():
+    """It imports the builtins modules on first access."""
+    modules = newly_imported(
+        'import RestrictedPython; RestrictedPython.utility_builtins')
+    assert 'RestrictedPython.Utilities' in modules
+    assert 'DateTime' not in modules
+
+
+def test_import_time__4():
+    """It provides the submodules as attributes of the package."""
+    import RestrictedPython
+    assert RestrictedPython.compile.__name__ == 'RestrictedPython.compile'
+    assert RestrictedPython.PrintCollector.__name__ == 'PrintCollector'
+    assert 'safe_builtins' in dir(RestrictedPython)
+    with pytest.raises(AttributeError):
+        RestrictedPython.not_existing
+
+
+def test_import_time__5():
+    """It exports the public API with `import *`."""
+    namespace = {}
+    exec('from RestrictedPython import *', namespace)
+    for name in ('compile_restricted', 'safe_builtins', 'PreparedScript',
+                 'RestrictingNodeTransformer', 'PrintCollector'):
+        assert name in namespace
@@ -0,0 +1,168 @@
+from RestrictedPython import compile_restricted_exec
+from RestrictedPython.linecoverage import LineCoverage
+
+import pytest
+import sys
+
+
+SOURCE = """\
+def check(n):
+    if n < 0:
+        return 'negative'
+    return 'positive'
+result = check(number)
+"""
+
+
+def test_LineCoverage__1():
+    """It reports the executed and missing lines per filename."""
+    result = compile_restricted_exec(SOURCE, 'script.py')
+    other = compile_restricted_exec('a = 1', 'other.py')
+    coverage = LineCoverage()
+    coverage.add(result)
+    with coverage:
+        exec(result.code, {'number': 1})
+        exec(other.code, {})
+    report = coverage.report()
+    assert list(report) == ['script.py']
+    assert report['script.py'].executed == [1, 2, 4, 5]
+    assert report['script.py'].missing == [3]
+    assert report['script.py'].percent == 80.0
+
+
+def test_LineCoverage__2():
+    """It collects the lines over several executions and starts."""
+    result = compile_restricted_exec(SOURCE, 'script.py')
+    coverage = LineCoverage()
+    coverage.add(result)
+    previous = sys.gettrace()
+    with coverage:
+        exec(result.code, {'number': 1})
+    with coverage:
+        exec(result.code, {'number': -1})
+    assert coverage.report()['script.py'].missing == []
+    # The tracer of a coverage tool running the tests is restored:
+    assert sys.gettrace() is previous
+
+
+def test_LineCoverage__3():
+    """It merges the code objects and exported reports of a filename."""
+    negative = compile_restricted_exec(SOURCE, 'script.py')
+    positive = compile_restricted_exec(SOURCE, 'script.py')
+    coverage = LineCoverage()
+    coverage.add(negative)
+    with coverage:
+        exec(negative.code, {'number': -1})
+        coverage.add(positive)
+        exec(positive.code, {'number': 1})
+    assert coverage.report()['script.py'].missing == []
+
+    first = LineCoverage()
+    first.add(negative)
+    with first:
+        exec(negative.code, {'number': -1})
+    second = LineCoverage()
+    second.add(positive)
+    with second:
+        exec(positive.code, {'number': 1})
+    assert first.as_dict() == {
+        'script.py': {'executed': [1, 2, 3, 5], 'missing': [4]}}
+    merged = LineCoverage()
+    merged.merge(first.as_dict())
+    merged.merge(second.as_dict())
+    assert merged.report()['script.py'].missing == []
+
+
+def test_LineCoverage__4():
+    """It renders a table with the missing lines."""
+    result = compile_restricted_exec(SOURCE, 'script.py')
+    coverage = LineCoverage()
+    coverage.add(result)
+    with coverage:
+        exec(result.code, {'number': 1})
+    assert coverage.text().splitlines()[1].split() == [
+        'script.py', '5', '1', '80%', '3']
+
+
+def test_LineCoverage__5():
+    """It rejects unknown modes, non code targets and a second start."""
+    with pytest.raises(ValueError):
+        LineCoverage(mode='tracing')
+    coverage = LineCoverage()
+    with pytest.raises(TypeError):
+        coverage.add('script.py')
+    with coverage:
+        with pytest.raises(RuntimeError):
+            coverage.start()
+
+
+@pytest.mark.skipif(
+    hasattr(sys, 'monitoring'), reason='sys.monitoring is available')
+def test_LineCoverage__6():
+    """It needs Python 3.12+ for `sys.monitoring`."""
+    with pytest.raises(ValueError):
+        LineCoverage(mode='monitoring')
+    assert LineCoverage().mode == 'settrace'
+
+
+class Number(object):
+    """A number remembering the frames comparing it."""
+
+    def __init__(self, frames):
+        self.frames = frames
+
+    def __lt__(self, other):
+        self.frames.append(sys._getframe(1))
+        return False
+
+
+def test_LineCoverage__7(mocker):
+    """It installs its trace function and restores the previous one.
+
+    `sys.settrace` is mocked and the events are sent directly, so a
+    coverage tool running the tests measures the collector.
+    """
+    settrace = mocker.patch('sys.settrace')
+    result = compile_restricted_exec(SOURCE, 'script.py')
+    coverage = LineCoverage(mode='settrace')
+    with coverage:
+        settrace.assert_called_once_with(coverage._trace)
+        coverage.add(result)
+        coverage.add(result)
+        with pytest.raises(RuntimeError):
+            coverage.start()
+    settrace.assert_called_with(sys.gettrace())
+    coverage.stop()
+    assert settrace.call_count == 2
+    assert coverage.report()['script.py'].missing == [1, 2, 3, 4, 5]
+
+    frames = []
+    exec(result.code, {'number': Number(frames)})
+    [frame] = frames
+    assert coverage._trace(sys._getframe(), 'call', None) is None
+    trace_lines = coverage._trace(frame, 'call', None)
+    assert trace_lines == coverage._trace_lines
+    assert trace_lines(frame, 'line', None) == trace_lines
+    assert trace_lines(frame, 'return', None) == trace_lines
+    # (The line number of a finished frame depends on the Python version.)
+    assert len(coverage.report()['script.py'].executed) == 1
+
+
+@pytest.mark.skipif(
+    not hasattr(sys, 'monitoring'), reason='needs sys.monitoring')
+def test_LineCoverage__8():  # pragma: no cover
+    """It disables the `sys.monitoring` line events after their first hit.
+
+    `_on_line` is called directly as well: it runs as a `sys.monitoring`
+    callback, which a tracing coverage tool does not measure.
+    """
+    result = compile_restricted_exec(SOURCE, 'script.py')
+    coverage = LineCoverage(mode='monitoring')
+    coverage.add(result)
+    with coverage:
+        with pytest.raises(RuntimeError):
+            LineCoverage(mode='monitoring').start()
+        exec(result.code, {'number': 1})
+    assert coverage.report()['script.py'].missing == [3]
+    assert coverage._on_line(result.code, 3) is sys.monitoring.DISABLE
+    assert coverage.report()['script.py'].missing == []
@@ -0,0 +1,175 @@
+from RestrictedPython import PreparedScript
+from RestrictedPython.lineprofile import LineProfiler
+
+import pytest
+import sys
+import threading
+import time
+import types
+
+
+SOURCE = """\
+def check(n):
+    for i in range(n):
+        guard(i)
+result = check(5)
+"""
+
+
+def slow_guard(value):
+    time.sleep(0.002)
+    return value
+
+
+def make_script(filename='script.py'):
+    return PreparedScript(
+        SOURCE, filename, builtins={'range': range}, result_name='result')
+
+
+def test_LineProfiler__1():
+    """It attributes the time spent in guards to the calling line."""
+    script = make_script()
+    with LineProfiler(script.result, mode='setprofile') as profiler:
+        script.run(guard=slow_guard)
+    lines = profiler.lines()
+    assert lines[3].time >= 0.01
+    assert lines[3].time > sum(
+        line.time for lineno, line in lines.items() if lineno != 3)
+    assert lines[3].hits > 0
+
+
+def test_LineProfiler__2():
+    """It profiles all code of a filename if a filename is given."""
+    script = make_script()
+    other = make_script('other.py')
+    with LineProfiler('script.py', mode='setprofile') as profiler:
+        other.run(guard=slow_guard)
+        script.run(guard=slow_guard)
+    assert profiler.filename == 'script.py'
+    assert profiler.lines()[3].time >= 0.01
+
+
+def test_LineProfiler__3():
+    """It samples the current line of the profiled thread."""
+    script = make_script()
+    with LineProfiler(script.result, mode='sampling',
+                      interval=0.001) as profiler:
+        script.run(guard=slow_guard)
+    lines = profiler.lines()
+    assert lines[3].hits > 0
+    assert lines[3].time == lines[3].hits * 0.001
+
+
+def test_LineProfiler__4():
+    """It renders the lines with their source."""
+    script = make_script()
+    with LineProfiler(script.result, mode='setprofile') as profiler:
+        script.run(guard=slow_guard)
+    text = profiler.text(SOURCE).splitlines()
+    assert text[0].split() == ['line', 'hits', 'time', '[ms]', '%',
+                               'script.py']
+    assert [row for row in text if row.endswith('        guard(i)')]
+    # Without the source only the numbers are rendered:
+    assert [len(row.split()) for row in profiler.text().splitlines()[1:]] == [
+        4] * len(profiler.lines())
+
+
+def test_LineProfiler__5():
+    """It rejects unknown modes and a second start."""
+    with pytest.raises(ValueError):
+        LineProfiler('script.py', mode='tracing')
+    profiler = LineProfiler('script.py', mode='setprofile')
+    with profiler:
+        with pytest.raises(RuntimeError):
+            profiler.start()
+    assert sys.getprofile() is None
+
+
+@pytest.mark.skipif(
+    not hasattr(sys, 'monitoring'), reason='needs sys.monitoring')
+def test_LineProfiler__6():  # pragma: no cover
+    """It counts the executions of lines with `sys.monitoring`."""
+    script = make_script()
+    with LineProfiler(script.result, mode='monitoring') as profiler:
+        script.run(guard=slow_guard)
+    lines = profiler.lines()
+    assert lines[3].hits == 5
+    assert lines[3].time >= 0.01
+
+
+@pytest.mark.skipif(
+    hasattr(sys, 'monitoring'), reason='sys.monitoring is available')
+def test_LineProfiler__7():
+    """It needs Python 3.12+ for `sys.monitoring`."""
+    with pytest.raises(ValueError):
+        LineProfiler('script.py', mode='monitoring')
+    assert LineProfiler('script.py').mode == 'setprofile'
+
+
+def test_LineProfiler__8(mocker):
+    """It attributes the profile events to the innermost script frame.
+
+    `sys.setprofile` is mocked and the events are sent directly, so a
+    coverage tool running the tests measures the profile function.
+    """
+    script = make_script()
+    frames = []
+    script.run(guard=lambda value: frames.append(sys._getframe()))
+    profiler = LineProfiler(script.result, mode='setprofile')
+    assert profiler._script_frame(frames[0]).f_code.co_name == 'check'
+    assert profiler._script_frame(sys._getframe()) is None
+    setprofile = mocker.patch('sys.setprofile')
+    with profiler:
+        setprofile.assert_called_once_with(profiler._profile)
+        profiler._profile(frames[0], 'call', None)
+        profiler._profile(frames[1], 'return', None)
+        profiler._profile(sys._getframe(), 'call', None)
+    profiler.stop()
+    assert setprofile.call_count == 2
+    # (The line numbers of finished frames depend on the Python version.)
+    [(lineno, line)] = profiler.lines().items()
+    assert line.hits == 2
+    # A sample outside of the script is ignored:
+    stopped = mocker.Mock()
+    stopped.wait.side_effect = [False, True]
+    profiler._sample(threading.current_thread().ident, stopped)
+    assert profiler.lines() == {lineno: line}
+
+
+@pytest.mark.skipif(
+    not hasattr(sys, 'monitoring'), reason='needs sys.monitoring')
+def test_LineProfiler__9():  # pragma: no cover
+    """It keeps a stack of the script frames with `sys.monitoring`.
+
+    The callbacks are also called directly, a tracing coverage tool does not
+    see the lines `sys.monitoring` runs them on.
+    """
+    script = make_script()
+    with LineProfiler('script.py', mode='monitoring') as profiler:
+        script.run(guard=slow_guard)
+        with pytest.raises(RuntimeError):
+            LineProfiler('script.py', mode='monitoring').start()
+    assert profiler.lines()[3].hits == 5
+
+    module = script.result.code
+    check, = [const for const in module.co_consts
+              if isinstance(const, types.CodeType)]
+    foreign = sys._getframe().f_code
+    disable = sys.monitoring.DISABLE
+    profiler = LineProfiler('script.py', mode='monitoring')
+    assert profiler._on_start(foreign, 0) is disable
+    assert profiler._on_line(foreign, 1) is disable
+    assert profiler._on_return(foreign, 0, None) is disable
+    # The profiler may start in the middle of a frame:
+    profiler._on_line(module, 4)
+    profiler._on_start(check, 0)
+    profiler._on_line(check, 3)
+    profiler._on_line(check, 3)
+    # `check` was left by an exception:
+    profiler._on_line(module, 5)
+    profiler._on_return(module, 0, None)
+    profiler._on_return(module, 0, None)
+    assert profiler._stack() == []
+    assert dict((lineno, line.hits)
+                for lineno, line in profiler.lines().items()) == {
+        3: 2, 4: 1, 5: 1}
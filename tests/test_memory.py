@@ -0,0 +1,99 @@
+from RestrictedPython import PreparedScript
+from RestrictedPython.checkpoints import DeadlineExceeded
+from RestrictedPython.memory import MemoryLimit
+from RestrictedPython.memory import MemoryLimitExceeded
+from RestrictedPython.memory import tracemalloc
+from RestrictedPython.transformer import RestrictingNodeTransformer
+
+import pytest
+
+
+pytestmark = pytest.mark.skipif(
+    tracemalloc is None, reason='tracemalloc needs Python 3.4+')
+
+
+class CheckpointPolicy(RestrictingNodeTransformer):
+
+    step_checkpoints = True
+
+
+GREEDY = """\
+data = []
+while True:
+    data.append([0] * 125)
+"""
+
+MODEST = """\
+data = []
+for i in range(count):
+    data.append([i] * 125)
+"""
+
+
+@pytest.fixture
+def tracing():
+    tracemalloc.start(5)
+    yield
+    tracemalloc.stop()
+
+
+def make_script(source, filename='script.py'):
+    return PreparedScript(source, filename, policy=CheckpointPolicy)
+
+
+def test_MemoryLimit__1(tracing):
+    """It raises `MemoryLimitExceeded` if the script allocates too much."""
+    script = make_script(GREEDY)
+    with pytest.raises(MemoryLimitExceeded) as exc_info:
+        with MemoryLimit(10 ** 6, filenames=['script.py']) as limit:
+            script.run(**limit.bindings())
+    assert str(exc_info.value) == 'More than 1000000 bytes allocated.'
+    assert limit.peak > 10 ** 6
+    # The growth is only confirmed by a snapshot if it exceeds the limit.
+    assert limit.snapshots <= 3
+
+
+def test_MemoryLimit__2(tracing):
+    """It reports the peak and allocated memory of an execution."""
+    script = make_script(MODEST)
+    with MemoryLimit(filenames=['script.py']) as limit:
+        glb = script.run(count=1000, **limit.bindings())
+    assert limit.allocated > 10 ** 6
+    assert limit.peak >= limit.allocated
+    assert limit.snapshots == 1
+    del glb
+    with MemoryLimit(filenames=['script.py']) as limit:
+        script.run(count=1000, **limit.bindings())
+    assert limit.allocated < 10 ** 5
+
+
+def test_MemoryLimit__3(tracing):
+    """It does not count the allocations of other code with `filenames`."""
+    script = make_script(MODEST)
+    with MemoryLimit(10 ** 6, filenames=['script.py']) as limit:
+        blob = bytearray(2 * 10 ** 6)
+        script.run(count=100, **limit.bindings())
+    assert limit.snapshots >= 1
+    assert limit.peak < 10 ** 6
+    del blob
+
+    with pytest.raises(MemoryLimitExceeded):
+        with MemoryLimit(10 ** 6) as limit:
+            blob = bytearray(2 * 10 ** 6)
+            script.run(count=100, **limit.bindings())
+    assert limit.snapshots == 0
+    del blob
+
+
+def test_MemoryLimit__4(tracing):
+    """It enforces the deadline as well."""
+    script = make_script('while True:\n    pass')
+    with pytest.raises(DeadlineExceeded):
+        with MemoryLimit(10 ** 6, timeout=0.01) as limit:
+            script.run(**limit.bindings())
+
+
+def test_MemoryLimit__5():
+    """It needs `tracemalloc` to trace."""
+    with pytest.raises(RuntimeError):
+        MemoryLimit(10 ** 6)
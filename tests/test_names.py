@@ -0,0 +1,200 @@
+from RestrictedPython import compile_restricted_exec
+from RestrictedPython import compile_restricted_function
+from RestrictedPython._compat import IS_PY2
+from RestrictedPython.names import analyze_names
+from RestrictedPython.names import NameInfo
+from tests import c_eval
+from tests import c_exec
+
+import ast
+import pytest
+
+
+@pytest.mark.parametrize(*c_exec)
+def test_names__1(c_exec):
+    """It returns a `NameInfo` on the `CompileResult`."""
+    result = c_exec('a = b')
+    assert isinstance(result.names, NameInfo)
+    assert result.names.free_globals == frozenset(['b'])
+    assert result.names.assigned_globals == frozenset(['a'])
+    assert result.names.guards == frozenset()
+
+
+@pytest.mark.parametrize(*c_exec)
+def test_names__2(c_exec):
+    """It has no `NameInfo` if there are errors."""
+    result = c_exec('_a = b')
+    assert result.names is None
+
+
+@pytest.mark.parametrize(*c_exec)
+def test_names__3(c_exec):
+    """It has no `NameInfo` if compiled without a policy."""
+    result = c_exec('a = b', policy=None)
+    assert result.names is None
+
+
+FUNCTION_LOCALS = """\
+def foo(arg, *args, **kw):
+    local = arg + len(args)
+    for item in items:
+        local += item
+    return local
+"""
+
+
+@pytest.mark.parametrize(*c_exec)
+def test_names__4(c_exec):
+    """It does not report function locals, arguments and loop variables."""
+    result = c_exec(FUNCTION_LOCALS)
+    assert result.names.free_globals == frozenset(['len', 'items'])
+    assert result.names.assigned_globals == frozenset(['foo'])
+    assert result.names.guards == frozenset(['_getiter_', '_inplacevar_'])
+
+
+CLOSURE = """\
+def outer(a):
+    b = 1
+    def inner():
+        return a + b + c
+    return inner
+"""
+
+
+@pytest.mark.parametrize(*c_exec)
+def test_names__5(c_exec):
+    """It resolves closure variables to the enclosing function."""
+    result = c_exec(CLOSURE)
+    assert result.names.free_globals == frozenset(['c'])
+
+
+GLOBAL_STMT = """\
+def foo():
+    global counter
+    counter = counter + 1
+"""
+
+
+@pytest.mark.parametrize(*c_exec)
+def test_names__6(c_exec):
+    """It reports names bound in a function via `global` as assigned."""
+    result = c_exec(GLOBAL_STMT)
+    assert result.names.free_globals == frozenset(['counter'])
+    assert result.names.assigned_globals == frozenset(['foo', 'counter'])
+
+
+@pytest.mark.skipif(IS_PY2, reason='List comprehensions leak in Python 2.')
+@pytest.mark.parametrize(*c_eval)
+def test_names__7(c_eval):
+    """It does not report comprehension variables."""
+    result = c_eval('[x * y for x in xs if x for y in ys]')
+    assert result.names.free_globals == frozenset(['xs', 'ys'])
+    assert result.names.guards == frozenset(['_getiter_'])
+    # `used_names` contains all loaded names.
+    assert set(result.used_names) == set(['x', 'y', 'xs', 'ys'])
+
+
+@pytest.mark.parametrize(*c_eval)
+def test_names__8(c_eval):
+    """It does not report generator expression and lambda variables."""
+    result = c_eval('(lambda a, b=default: sum(a + b + i for i in seq))')
+    assert result.names.free_globals == frozenset(['default', 'sum', 'seq'])
+
+
+CLASS_SCOPE = """\
+class Foo:
+    bar = 1
+
+    def baz(self):
+        return bar
+"""
+
+
+@pytest.mark.parametrize(*c_exec)
+def test_names__9(c_exec):
+    """It does not resolve names of a method in the class scope."""
+    result = c_exec(CLASS_SCOPE)
+    assert 'bar' in result.names.free_globals
+    # Class definitions need `__name__` to set `__module__`.
+    assert '__name__' in result.names.free_globals
+    assert result.names.assigned_globals == frozenset(['Foo'])
+    if not IS_PY2:
+        assert result.names.guards == frozenset(['__metaclass__'])
+
+
+PRINT_AND_ATTRIBUTES = """\
+import math
+print(math.pi)
+a, b = c[0]
+result = printed
+"""
+
+
+@pytest.mark.parametrize(*c_exec)
+def test_names__10(c_exec):
+    """It reports the guards used by the generated code."""
+    result = c_exec(PRINT_AND_ATTRIBUTES)
+    assert result.names.free_globals == frozenset(['c', 'math'])
+    assert result.names.assigned_globals == frozenset(
+        ['math', 'a', 'b', 'result', '_print'])
+    assert result.names.guards == frozenset([
+        '_print_', '_getattr_', '_getitem_', '_getiter_',
+        '_unpack_sequence_'])
+
+
+EXCEPT_AND_IMPORT = """\
+def foo():
+    import os.path
+    from a import b as c
+    try:
+        pass
+    except Exception as exc:
+        return exc, os, c
+"""
+
+
+@pytest.mark.parametrize(*c_exec)
+def test_names__11(c_exec):
+    """It treats imports and exception handler names as local bindings."""
+    result = c_exec(EXCEPT_AND_IMPORT)
+    assert result.names.free_globals == frozenset(['Exception'])
+
+
+def test_names__compile_restricted_function__1():
+    """It reports the global names used by a function body."""
+    result = compile_restricted_function(
+        'a', 'return a + b', 'func', globalize=['c'])
+    assert result.names.free_globals == frozenset(['b'])
+    assert result.names.assigned_globals == frozenset(['func'])
+
+
+def test_names__analyze_names__1():
+    """It can be used on an untransformed AST."""
+    names = analyze_names(ast.parse('a = b.c'))
+    assert names == NameInfo(
+        free_globals=frozenset(['b']),
+        assigned_globals=frozenset(['a']),
+        guards=frozenset())
+
+
+def test_names__analyze_names__2():
+    """It reports module level reads of assigned names as free as well."""
+    result = compile_restricted_exec('a = 1\nb = a')
+    assert result.names.free_globals == frozenset(['a'])
+    assert result.names.assigned_globals == frozenset(['a', 'b'])
+
+
+def test_names__analyze_names__3():
+    """It reports names read before or after a conditional binding."""
+    result = compile_restricted_exec(
+        'title = title.strip()\nif flag:\n    size = 1\nresult = size')
+    assert result.names.free_globals == frozenset(['title', 'flag', 'size'])
+
+
+def test_names__CompileResult__1():
+    """It keeps `CompileResult` a 4-tuple, `names` is an attribute."""
+    result = compile_restricted_exec('a = b')
+    code, errors, warnings, used_names = result
+    assert result.names.free_globals == frozenset(['b'])
+    assert list(result._asdict()) == [
+        'code', 'errors', 'warnings', 'used_names']
@@ -0,0 +1,74 @@
+from RestrictedPython.overhead import compare_compile
+from RestrictedPython.overhead import main
+
+import pytest
+
+
+SOURCE = """\
+def render(items):
+    rows = list(item.title for item in items)
+    for a, b in items:
+        rows.append(a[0])
+    return rows
+"""
+
+
+def test_compare_compile__1():
+    """It reports the overhead per code object."""
+    report = compare_compile(SOURCE)
+    names = [function.name for function in report.functions]
+    assert names[:2] == ['<module>', '<module>.render']
+    assert names[2].startswith('<module>.render.')  # the generator expression
+    render = report.functions[1]
+    assert render.guard_sites == {
+        '_getattr_': 1,  # rows.append
+        '_getitem_': 1,
+        '_getiter_': 2,  # also passed to `_iter_unpack_sequence_`
+        '_iter_unpack_sequence_': 1,
+    }
+    assert render.extra('instructions') > 0
+    assert render.extra('calls') == 4
+    assert report.functions[0].guard_sites == {}
+    assert report.guard_sites == {
+        '_getattr_': 2,
+        '_getitem_': 1,
+        '_getiter_': 2,
+        '_iter_unpack_sequence_': 1,
+    }
+
+
+def test_compare_compile__2():
+    """It raises a SyntaxError if the source cannot be compiled restricted."""
+    with pytest.raises(SyntaxError):
+        compare_compile('_a = 1')
+
+
+def test_OverheadReport__text__1():
+    """It renders a table of the code objects."""
+    lines = compare_compile(SOURCE).text().splitlines()
+    assert lines[0].split()[:2] == ['code', 'object']
+    assert lines[2].startswith('<module>.render ')
+    assert lines[-1] == (
+        'guard call sites: _getattr_: 2, _getitem_: 1, _getiter_: 2, '
+        '_iter_unpack_sequence_: 1')
+
+
+def test_OverheadReport__disassembly__1():
+    """It shows the disassembly of both variants side by side."""
+    text = compare_compile('a = b.c').disassembly(width=70)
+    lines = text.splitlines()
+    assert lines[0].startswith('== <module> ==')
+    assert all(line[70:73] == ' | ' for line in lines[1:])
+    assert '_getattr_' in text
+    assert '_getattr_' not in ''.join(line[:70] for line in lines)
+
+
+def test_main__1(tmpdir, capsys):
+    """It prints the report for a script file."""
+    script = tmpdir.join('script.py')
+    script.write(SOURCE)
+    assert main(['--dis', str(script)]) == 0
+    out = capsys.readouterr()[0]
+    assert 'guard call sites:' in out
+    assert '== <module>.render =' in out
+    assert main([]) == 2
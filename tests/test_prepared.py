@@ -0,0 +1,153 @@
+from RestrictedPython import PreparedScript
+from RestrictedPython.Guards import safe_builtins
+from RestrictedPython.Guards import safer_getattr
+from RestrictedPython.Limits import limited_builtins
+from RestrictedPython.transformer import RestrictingNodeTransformer
+
+import pytest
+
+
+def test_PreparedScript__1():
+    """It runs the code with the given bindings and returns the globals."""
+    script = PreparedScript('result = a + b')
+    glb = script.run(a=1, b=2)
+    assert glb['result'] == 3
+
+
+def test_PreparedScript__2():
+    """It returns the value of `result_name` if given."""
+    script = PreparedScript('result = a * 2', result_name='result')
+    assert script.run(a=21) == 42
+    assert script.run(a='x') == 'xx'
+
+
+def test_PreparedScript__3():
+    """It returns the value of the expression in `eval` mode."""
+    script = PreparedScript('[x.upper() for x in items]', mode='eval')
+    assert script.run(items=['a', 'b']) == ['A', 'B']
+
+
+def test_PreparedScript__4():
+    """It only puts the guards used by the code into the template."""
+    script = PreparedScript('print(a.b)\nresult = printed')
+    assert sorted(script.template) == [
+        '__builtins__', '__name__', '_getattr_', '_print_']
+    assert script.template['_getattr_'] is safer_getattr
+    assert script.template['__builtins__'] is safe_builtins
+
+
+def test_PreparedScript__5():
+    """It has a read-only template."""
+    script = PreparedScript('a = 1')
+    with pytest.raises(TypeError):
+        script.template['a'] = 2
+
+
+def test_PreparedScript__6():
+    """It does not leak globals between runs."""
+    script = PreparedScript('b = a')
+    glb = script.run(a=1)
+    assert glb['b'] == 1
+    assert 'b' not in script.template
+    assert 'a' not in script.globals()
+    assert script.globals({'a': 2})['a'] == 2
+
+
+def test_PreparedScript__7():
+    """It allows to override guards, builtins and to add globals."""
+    script = PreparedScript(
+        'result = list(a.b) + list(c)',
+        guards={'_getattr_': lambda ob, name: [name]},
+        builtins=limited_builtins,
+        globals={'a': object()},
+        result_name='result')
+    assert script.run(c=(1, 2)) == ['b', 1, 2]
+
+
+def test_PreparedScript__8():
+    """It raises a ValueError if there is no implementation for a guard."""
+    with pytest.raises(ValueError) as err:
+        PreparedScript('a += 1\nb(*c)')
+    assert str(err.value) == (
+        'No implementation for the guards: _apply_, _inplacevar_.')
+
+
+def test_PreparedScript__9():
+    """It raises a SyntaxError if the code is not allowed."""
+    with pytest.raises(SyntaxError):
+        PreparedScript('_a = 1')
+
+
+def test_PreparedScript__10():
+    """It raises a TypeError for an unknown mode."""
+    with pytest.raises(TypeError):
+        PreparedScript('a = 1', mode='single')
+
+
+def test_PreparedScript__11():
+    """It adds all guards if compiled without a policy."""
+    script = PreparedScript('_a = 1', policy=None)
+    assert '_getiter_' in script.template
+    assert script.run()['_a'] == 1
+
+
+CLASS_DEF = """\
+class Foo:
+    pass
+
+result = Foo.__module__
+"""
+
+
+def test_PreparedScript__12():
+    """It allows to define classes."""
+    script = PreparedScript(
+        CLASS_DEF, filename='my_script', policy=None, result_name='result')
+    assert script.run() == 'my_script'
+    script = PreparedScript('class Foo:\n    pass\n')
+    assert script.run()['Foo'].__module__ == '<string>'
+
+
+class Node(object):
+    secret = 'secret'
+
+    def reveal(self):
+        return self.secret
+
+
+class Parent(object):
+    child = Node()
+    children = [Node()]
+
+
+def host_getattr(ob, name):
+    if name in ('secret', 'reveal'):
+        raise AttributeError('Access to {0} denied.'.format(name))
+    return getattr(ob, name)
+
+
+class RewritingPolicy(RestrictingNodeTransformer):
+
+    fuse_access_chains = True
+    call_attributes = True
+
+
+@pytest.mark.parametrize('source', [
+    'o.child.secret', 'o.children[0].secret', 'o.child.reveal()'])
+def test_PreparedScript__13(source):
+    """It derives the helpers of the rewrites from the host's guards."""
+    script = PreparedScript(source, mode='eval', policy=RewritingPolicy,
+                            guards={'_getattr_': host_getattr})
+    with pytest.raises(AttributeError):
+        script.run(o=Parent())
+
+
+def test_PreparedScript__14():
+    """It keeps helpers the host provides."""
+    def getattr_path(ob, names):
+        return 'path'
+
+    script = PreparedScript(
+        'o.child.secret', mode='eval', policy=RewritingPolicy,
+        guards={'_getattr_': host_getattr, '_getattr_path_': getattr_path})
+    assert script.run(o=Parent()) == 'path'
@@ -0,0 +1,59 @@
+from RestrictedPython import compile_restricted_exec
+from RestrictedPython.profiling import ProfilingPolicyMixin
+from RestrictedPython.profiling import VisitorProfile
+from RestrictedPython.transformer import RestrictingNodeTransformer
+
+
+class CheckingPolicy(RestrictingNodeTransformer):
+
+    def visit_Name(self, node):
+        return super(CheckingPolicy, self).visit_Name(node)
+
+
+class ProfiledPolicy(ProfilingPolicyMixin, CheckingPolicy):
+
+    profile = VisitorProfile()
+
+
+def test_ProfilingPolicyMixin__1():
+    """It aggregates the visits per policy, node type and method."""
+    ProfiledPolicy.profile.clear()
+    compile_restricted_exec('a = b', policy=ProfiledPolicy)
+    compile_restricted_exec('c = d.e', policy=ProfiledPolicy)
+    profile = ProfiledPolicy.profile.as_dict()
+    assert profile[('CheckingPolicy', 'Name', 'visit_Name')]['calls'] == 4
+    assert profile[
+        ('RestrictingNodeTransformer', 'Module', 'visit_Module')]['calls'] == 2
+    module = profile[('RestrictingNodeTransformer', 'Module', 'visit_Module')]
+    assign = profile[('RestrictingNodeTransformer', 'Assign', 'visit_Assign')]
+    assert module['total'] >= assign['total']
+    assert module['own'] <= module['total']
+
+
+def test_ProfilingPolicyMixin__2():
+    """It records the visits of nodes without visitor method."""
+    class UnknownNode(object):
+        _fields = ()
+
+    policy = ProfiledPolicy()
+    ProfiledPolicy.profile.clear()
+    policy.visit(UnknownNode())
+    assert list(ProfiledPolicy.profile.as_dict()) == [
+        ('RestrictingNodeTransformer', 'UnknownNode', 'generic_visit')]
+    assert policy.errors == [
+        'Line None: UnknownNode statements are not allowed.']
+
+
+def test_VisitorProfile__1():
+    """It renders the profile as table sorted by the given column."""
+    profile = VisitorProfile()
+    profile.merge({('P', 'Name', 'visit_Name'): [3, 0.003, 0.002],
+                   ('P', 'Call', 'visit_Call'): [1, 0.004, 0.001]})
+    profile.merge({('P', 'Name', 'visit_Name'): [1, 0.001, 0.001]})
+    lines = profile.table().splitlines()
+    assert lines[1].split() == [
+        '4', '4.000', '3.000', 'P.visit_Name', '(Name)']
+    assert lines[2].split()[0] == '1'
+    assert profile.table(sort='calls', limit=1).splitlines()[1:] == [lines[1]]
+    profile.clear()
+    assert profile.as_dict() == {}
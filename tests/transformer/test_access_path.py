@@ -0,0 +1,153 @@
+from RestrictedPython import compile_restricted_eval
+from RestrictedPython import compile_restricted_exec
+from RestrictedPython import PreparedScript
+from RestrictedPython.Guards import make_getattr_path
+from RestrictedPython.Guards import make_getpath
+from RestrictedPython.Guards import safer_getattr_path
+from RestrictedPython.Guards import safer_getpath
+from RestrictedPython.transformer import RestrictingNodeTransformer
+
+import pytest
+
+
+class FusingTransformer(RestrictingNodeTransformer):
+    """Transformer which fuses access chains."""
+
+    fuse_access_chains = True
+
+
+class Symbol(object):
+    """Value representing the expression it was computed by."""
+
+    def __init__(self, text):
+        self.text = text
+
+    def __repr__(self):
+        return self.text
+
+    def __call__(self):
+        return Symbol(self.text + '()')
+
+
+def symbolic_guard(name):
+    def guard(*args):
+        return Symbol('{0}({1})'.format(name, ', '.join(map(repr, args))))
+    return guard
+
+
+def symbolic_eval(source, policy=FusingTransformer):
+    result = compile_restricted_eval(source, policy=policy)
+    assert result.errors == ()
+    glb = {name: symbolic_guard(name) for name in (
+        '_getattr_', '_getitem_', '_getattr_path_', '_getpath_')}
+    glb.update(a=Symbol('a'), i=Symbol('i'), f=Symbol('f'))
+    return repr(eval(result.code, glb))
+
+
+@pytest.mark.parametrize('source, result', [
+    ('a.b', "_getattr_(a, 'b')"),
+    ('a.b.c.d', "_getattr_path_(a, ('b', 'c', 'd'))"),
+    ('a[i][1]["k"]', "_getpath_(a, 'iii', (i, 1, 'k'))"),
+    ('a.b[i].c', "_getpath_(a, 'aia', ('b', i, 'c'))"),
+    # Keys with possible side effects stop the fusion:
+    ('a.b[f()].c.d', "_getattr_path_(_getitem_(_getattr_(a, 'b'), f()),"
+                     " ('c', 'd'))"),
+    ('a.b[1:2].c', "_getattr_(_getitem_(_getattr_(a, 'b'),"
+                   " slice(1, 2, None)), 'c')"),
+    ('a.b().c.d', "_getattr_path_(_getattr_(a, 'b')(), ('c', 'd'))"),
+])
+def test_fuse_access_chains__1(source, result):
+    """It collapses chains of loads into one call."""
+    assert symbolic_eval(source) == result
+
+
+def test_fuse_access_chains__2():
+    """It does not fuse stores."""
+    result = compile_restricted_exec('a.b.c = 1', policy=FusingTransformer)
+    assert result.names.guards == frozenset(['_getattr_', '_write_'])
+
+
+def test_fuse_access_chains__3():
+    """It is disabled by default."""
+    result = compile_restricted_exec('x = a.b.c')
+    assert result.names.guards == frozenset(['_getattr_'])
+
+
+def test_fuse_access_chains__4():
+    """It still reports invalid attribute names."""
+    result = compile_restricted_exec(
+        'x = a.b._c.d', policy=FusingTransformer)
+    assert result.errors == (
+        'Line 1: "_c" is an invalid attribute name because it starts '
+        'with "_".',)
+
+
+class Item(object):
+
+    def __init__(self, **kw):
+        self.__dict__.update(kw)
+
+
+def test_safer_getattr_path__1():
+    """It applies the checks of `safer_getattr` to each step."""
+    ob = Item(a=Item(b='text'))
+    assert safer_getattr_path(ob, ('a', 'b', 'upper'))() == 'TEXT'
+    with pytest.raises(NotImplementedError) as err:
+        safer_getattr_path(ob, ('a', 'b', 'format'))
+    assert str(err.value) == 'Using format() on a str is not safe.'
+
+
+def test_safer_getpath__1():
+    """It applies the checks of `safer_getattr` to the attribute steps."""
+    ob = Item(a=[{'b': 'text'}])
+    assert safer_getpath(ob, 'aiia', ('a', 0, 'b', 'upper'))() == 'TEXT'
+    with pytest.raises(NotImplementedError):
+        safer_getpath(ob, 'aiia', ('a', 0, 'b', 'format'))
+    assert safer_getpath({'format': 1}, 'i', ('format',)) == 1
+
+
+def test_make_getattr_path__1():
+    """It uses the guard for each step."""
+    calls = []
+
+    def guard(ob, name):
+        calls.append(name)
+        return getattr(ob, name)
+
+    ob = Item(a=Item(b=Item(c=42)))
+    assert make_getattr_path(guard)(ob, ('a', 'b', 'c')) == 42
+    assert calls == ['a', 'b', 'c']
+
+
+def test_make_getpath__1():
+    """It uses the guard matching the kind of the step."""
+    calls = []
+
+    def getattr_(ob, name):
+        calls.append(('a', name))
+        return getattr(ob, name)
+
+    def getitem(ob, key):
+        calls.append(('i', key))
+        return ob[key]
+
+    ob = Item(a=[Item(b={'c': 42})])
+    getpath = make_getpath(getattr_, getitem)
+    assert getpath(ob, 'aiai', ('a', 0, 'b', 'c')) == 42
+    assert calls == [('a', 'a'), ('i', 0), ('a', 'b'), ('i', 'c')]
+
+
+def test_fuse_access_chains__5():
+    """It works with the default guards of `PreparedScript`."""
+    script = PreparedScript(
+        'result = ob.a[i].b.upper()', policy=FusingTransformer,
+        result_name='result')
+    assert '_getpath_' in script.template
+    assert script.run(ob=Item(a=[Item(b='x')]), i=0) == 'X'
+    script = PreparedScript('ob.a[i].b.format', mode='eval',
+                            policy=FusingTransformer)
+    with pytest.raises(NotImplementedError):
+        script.run(ob=Item(a=[Item(b='x')]), i=0)
+    script = PreparedScript('ob.a.b', mode='eval', policy=FusingTransformer)
+    assert script.template['_getattr_path_'] is safer_getattr_path
+    assert script.run(ob=Item(a=Item(b=42))) == 42
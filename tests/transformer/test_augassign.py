@@ -1,3 +1,6 @@
+from RestrictedPython import compile_restricted_exec
+from RestrictedPython.Guards import inplace_fast_types
+from RestrictedPython.transformer import RestrictingNodeTransformer
 from tests import c_exec
 from tests import e_exec
 
@@ -57,3 +60,78 @@ def test_RestrictingNodeTransformer__visit_AugAssign__5(c_exec):
     assert result.errors == (
         'Line 1: Augmented assignment of object items and slices is not '
         'allowed.',)
+
+
+class FastPathTransformer(RestrictingNodeTransformer):
+    """Transformer with the fast path for augmented assignments."""
+
+    inplace_fast_path = True
+
+
+def fast_path_exec(source, glb):
+    result = compile_restricted_exec(source, policy=FastPathTransformer)
+    assert result.errors == ()
+    glb['_inplace_fast_types_'] = inplace_fast_types
+    exec(result.code, glb)
+    return glb
+
+
+def test_RestrictingNodeTransformer__visit_AugAssign__6(mocker):
+    """It applies the operation directly for immutable targets."""
+    _inplacevar_ = mocker.stub()
+    glb = fast_path_exec(
+        "a += 2\n"
+        "b -= 2\n"
+        "c *= 3\n"
+        "d //= 2\n"
+        "e **= 2\n"
+        "f |= 4\n"
+        "t += 'x'\n",
+        {'_inplacevar_': _inplacevar_,
+         'a': 1, 'b': 1.5, 'c': 'ab', 'd': 7, 'e': 3, 'f': True, 't': 'x'})
+    assert (glb['a'], glb['b'], glb['c'], glb['d'], glb['e'], glb['f'],
+            glb['t']) == (3, -0.5, 'ababab', 3, 9, 5, 'xx')
+    _inplacevar_.assert_not_called()
+
+
+def test_RestrictingNodeTransformer__visit_AugAssign__7(mocker):
+    """It calls `_inplacevar_` for other targets."""
+    _inplacevar_ = mocker.stub()
+    _inplacevar_.side_effect = lambda op, val, expr: val + expr
+    values = []
+    glb = fast_path_exec(
+        "a += values\nb += 1", {
+            '_inplacevar_': _inplacevar_,
+            'values': [1],
+            'a': values,
+            'b': 1,
+        })
+    assert glb['a'] == [1]
+    assert values == []
+    _inplacevar_.assert_called_once_with('+=', values, [1])
+
+
+def test_RestrictingNodeTransformer__visit_AugAssign__8():
+    """It evaluates the value only once."""
+    calls = []
+
+    def value():
+        calls.append(None)
+        return 2
+
+    glb = fast_path_exec(
+        "a += value()\nb += value()", {
+            '_inplacevar_': lambda op, val, expr: val * expr,
+            'value': value,
+            'a': 1,
+            'b': [1],
+        })
+    assert glb['a'] == 3
+    assert glb['b'] == [1, 1]
+    assert len(calls) == 2
+
+
+def test_RestrictingNodeTransformer__visit_AugAssign__9():
+    """It does not use the fast path by default."""
+    result = compile_restricted_exec('a += 1')
+    assert result.names.guards == frozenset(['_inplacevar_'])
@@ -0,0 +1,126 @@
+from RestrictedPython import compile_restricted_exec
+from RestrictedPython.Guards import ignore_site
+from RestrictedPython.Guards import make_site_getattr
+from RestrictedPython.transformer import RestrictingNodeTransformer
+
+import pytest
+
+
+class CallSiteTransformer(RestrictingNodeTransformer):
+    """Transformer which passes call site IDs to the guards."""
+
+    call_site_ids = True
+
+
+def site_exec(source, glb):
+    result = compile_restricted_exec(source, policy=CallSiteTransformer)
+    assert result.errors == ()
+    exec(result.code, glb)
+    return result
+
+
+class Recorder(object):
+    """Guard recording its calls."""
+
+    def __init__(self, guard):
+        self.guard = guard
+        self.calls = []
+
+    def __call__(self, *args):
+        self.calls.append(args)
+        return self.guard(*args[:-1])
+
+
+SITES = """\
+a = ob.real
+b = ob.real
+c = items[0]
+d = [x for x in items]
+for y in items:
+    e = y.real
+"""
+
+
+def test_call_site_ids__1():
+    """It calls the site variants of the guards with unique site IDs."""
+    getattr_ = Recorder(getattr)
+    getitem = Recorder(lambda ob, index: ob[index])
+    getiter = Recorder(iter)
+    glb = {
+        '_getattr_site_': getattr_,
+        '_getitem_site_': getitem,
+        '_getiter_site_': getiter,
+        'ob': 1,
+        'items': [2, 3],
+    }
+    result = site_exec(SITES, glb)
+    assert glb['a'] == glb['b'] == 1
+    assert glb['c'] == 2
+    assert glb['d'] == [2, 3]
+    assert glb['e'] == 3
+    assert getattr_.calls == [
+        (1, 'real', 0), (1, 'real', 1), (2, 'real', 4), (3, 'real', 4)]
+    assert getitem.calls == [([2, 3], 0, 2)]
+    assert getiter.calls == [([2, 3], 3), ([2, 3], 5)]
+    assert result.names.guards == frozenset(
+        ['_getattr_site_', '_getitem_site_', '_getiter_site_'])
+
+
+def test_call_site_ids__2():
+    """It does not change the generated code by default."""
+    result = compile_restricted_exec(SITES)
+    assert result.names.guards == frozenset(
+        ['_getattr_', '_getitem_', '_getiter_'])
+
+
+def test_call_site_ids__3():
+    """It does not pass site IDs to the other guards."""
+    glb = {
+        '_getiter_': iter,
+        '_iter_unpack_sequence_': lambda it, spec, _getiter_: it,
+        '_write_': lambda ob: ob,
+        'items': [(1, 2)],
+        'ob': Recorder(None),
+    }
+    site_exec('for a, b in items: ob.calls = a + b', glb)
+    assert glb['ob'].calls == 3
+
+
+def test_make_site_getattr__1():
+    """It caches the allowed type per call site."""
+    calls = []
+
+    def policy(ob, name):
+        calls.append((type(ob), name))
+        return name != 'imag'
+
+    getattr_ = make_site_getattr(policy)
+    glb = {'_getattr_site_': getattr_, '_getiter_site_': ignore_site(iter),
+           'items': [1, 2, 3.0, 4.0], 'item': 1}
+    site_exec('result = [x.real for x in items]', glb)
+    assert glb['result'] == [1, 2, 3.0, 4.0]
+    assert calls == [(int, 'real'), (float, 'real')]
+    assert getattr_.sites == {0: (float, 'real')}
+    with pytest.raises(AttributeError) as err:
+        site_exec('item.imag', glb)
+    assert str(err.value) == (
+        'Access to "imag" of int objects is not allowed.')
+
+
+def test_make_site_getattr__2():
+    """It uses the policy of `safer_getattr` by default."""
+    getattr_ = make_site_getattr()
+    assert getattr_('abc', 'upper', 0)() == 'ABC'
+    with pytest.raises(AttributeError):
+        getattr_('abc', 'format', 1)
+    assert getattr_.sites == {0: (str, 'upper')}
+
+
+def test_make_site_getattr__3():
+    """It checks the name as well if shared by several scripts."""
+    getattr_ = make_site_getattr()
+    glb = {'_getattr_site_': getattr_}
+    site_exec('result = "x".upper', glb)
+    with pytest.raises(AttributeError):
+        site_exec('result = "{0.__class__}".format', glb)
+    assert getattr_.sites == {0: (str, 'upper')}
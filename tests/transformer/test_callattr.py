@@ -0,0 +1,132 @@
+from RestrictedPython import compile_restricted_exec
+from RestrictedPython import PreparedScript
+from RestrictedPython.counters import GuardCounters
+from RestrictedPython.Guards import make_callattr
+from RestrictedPython.Guards import safer_callattr
+from RestrictedPython.transformer import RestrictingNodeTransformer
+
+import pytest
+
+
+class CallAttrTransformer(RestrictingNodeTransformer):
+    """Transformer which calls methods using `_callattr_`."""
+
+    call_attributes = True
+
+
+class FusingCallAttrTransformer(CallAttrTransformer):
+    """Transformer which also fuses access chains."""
+
+    fuse_access_chains = True
+
+
+class Recorder(object):
+    """Guard recording its calls."""
+
+    def __init__(self, guard):
+        self.guard = guard
+        self.calls = []
+
+    def __call__(self, *args, **kw):
+        self.calls.append((args, kw))
+        return self.guard(*args, **kw)
+
+
+def run(source, policy=CallAttrTransformer, **glb):
+    result = compile_restricted_exec(source, policy=policy)
+    assert result.errors == ()
+    exec(result.code, glb)
+    return glb
+
+
+class Item(object):
+
+    def __init__(self, **kw):
+        self.__dict__.update(kw)
+
+    def method(self, *args, **kw):
+        return args, kw
+
+
+def test_call_attributes__1():
+    """It calls methods using `_callattr_`."""
+    callattr = Recorder(safer_callattr)
+    glb = run('result = ob.method(1, b=2)', _callattr_=callattr, ob=Item())
+    assert glb['result'] == ((1,), {'b': 2})
+    assert callattr.calls == [((glb['ob'], 'method', 1), {'b': 2})]
+
+
+def test_call_attributes__2():
+    """It only changes calls of attributes."""
+    callattr = Recorder(safer_callattr)
+    glb = run('result = [func(1), ob.func(2), ob.method()]',
+              _callattr_=callattr, _getattr_=getattr,
+              func=abs, ob=Item(func=abs))
+    assert glb['result'] == [1, 2, ((), {})]
+    assert [call[0][1] for call in callattr.calls] == ['func', 'method']
+
+
+def test_call_attributes__3():
+    """It does not change calls with `*args` or `**kwargs`."""
+    result = compile_restricted_exec(
+        'ob.method(*args, **kw)', policy=CallAttrTransformer)
+    assert result.names.guards == frozenset(['_apply_', '_getattr_'])
+
+
+def test_call_attributes__4():
+    """It is disabled by default."""
+    result = compile_restricted_exec('ob.method(1)')
+    assert result.names.guards == frozenset(['_getattr_'])
+
+
+def test_call_attributes__5():
+    """It splits the method name off a fused access chain."""
+    glb = run('result = [ob.a.b.method(1), ob.a[0].method(2),'
+              ' ob.a.method(3)]',
+              policy=FusingCallAttrTransformer,
+              _callattr_=Recorder(safer_callattr),
+              _getattr_=Recorder(lambda ob, name: Item()),
+              _getattr_path_=Recorder(lambda ob, names: Item()),
+              _getpath_=Recorder(lambda ob, kinds, keys: Item()),
+              ob=Item())
+    assert glb['result'] == [((1,), {}), ((2,), {}), ((3,), {})]
+    assert glb['_getattr_path_'].calls == [((glb['ob'], ('a', 'b')), {})]
+    assert glb['_getpath_'].calls == [((glb['ob'], 'ai', ('a', 0)), {})]
+    assert glb['_getattr_'].calls == [((glb['ob'], 'a'), {})]
+
+
+def test_safer_callattr__1():
+    """It applies the check of `safer_getattr`."""
+    assert safer_callattr('abc', 'upper') == 'ABC'
+    assert safer_callattr(Item(), 'method', 1, b=2) == ((1,), {'b': 2})
+    with pytest.raises(NotImplementedError) as err:
+        safer_callattr('{0}', 'format', 1)
+    assert str(err.value) == 'Using format() on a str is not safe.'
+
+
+def test_make_callattr__1():
+    """It uses the guard to get the method."""
+    getattr_ = Recorder(getattr)
+    assert make_callattr(getattr_)('abc', 'replace', 'b', 'x') == 'axc'
+    assert getattr_.calls == [(('abc', 'replace'), {})]
+
+
+def test_call_attributes__7():
+    """Methods can have keyword arguments named `object` or `name`."""
+    counted = GuardCounters().wrap(
+        'script.py', {'_callattr_': safer_callattr})['_callattr_']
+    for callattr in (safer_callattr, make_callattr(getattr), counted):
+        glb = run('data.update(name="x", object=1)\n'
+                  'result = ob.method(name=2)',
+                  _callattr_=callattr, data={}, ob=Item())
+        assert glb['data'] == {'name': 'x', 'object': 1}
+        assert glb['result'] == ((), {'name': 2})
+
+
+def test_call_attributes__6():
+    """It works with the default guards of `PreparedScript`."""
+    script = PreparedScript('"{0}".format(1)', mode='eval',
+                            policy=CallAttrTransformer)
+    assert script.template['_callattr_'] is safer_callattr
+    with pytest.raises(NotImplementedError):
+        script.run()
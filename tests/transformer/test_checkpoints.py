@@ -0,0 +1,104 @@
+from RestrictedPython import compile_restricted_exec
+from RestrictedPython._compat import IS_PY3
+from RestrictedPython.transformer import RestrictingNodeTransformer
+
+import ast
+import itertools
+
+
+class CheckpointTransformer(RestrictingNodeTransformer):
+    """Transformer which injects `_tick_()` checkpoints."""
+
+    step_checkpoints = True
+
+
+class Ticks(object):
+    """`_tick_` recording the line numbers of its callers."""
+
+    def __init__(self):
+        self.lines = []
+
+    def __call__(self):
+        import sys
+        self.lines.append(sys._getframe(1).f_lineno)
+
+
+def run(source, **glb):
+    result = compile_restricted_exec(source, policy=CheckpointTransformer)
+    assert result.errors == ()
+    ticks = glb['_tick_'] = Ticks()
+    glb.update(_getiter_=iter, _getattr_=getattr)
+    exec(result.code, glb)
+    return ticks.lines
+
+
+def test_step_checkpoints__1():
+    """It calls `_tick_` at the start of each loop iteration."""
+    assert run("""\
+n = 0
+while n < 3:
+    n = n + 1
+else:
+    n = 0
+for i in items:
+    pass
+""", items=[1, 2]) == [2, 2, 2, 6, 6]
+
+
+def test_step_checkpoints__2():
+    """It calls `_tick_` at the start of each function call."""
+    assert run("""\
+def count(n):
+    '''Docstring.'''
+    if n:
+        count(n - 1)
+count(2)
+""") == [1, 1, 1]
+
+
+def test_step_checkpoints__3():
+    """It keeps docstrings."""
+    result = compile_restricted_exec(
+        'def f():\n    "Doc."', policy=CheckpointTransformer)
+    assert result.names.guards == frozenset(['_tick_'])
+    glb = {}
+    exec(result.code, glb)
+    assert glb['f'].__doc__ == 'Doc.'
+
+
+def test_step_checkpoints__5():
+    """It calls `_tick_` at the start of each comprehension iteration."""
+    assert run("""squares = [x * x for x in items
+           if x > 1]
+""", items=[1, 2, 3]) == [1, 1, 1]
+    assert run("""pairs = {(x, y) for x in items for y in items}
+""", items=[1, 2]) == [1] * 6
+
+
+def test_step_checkpoints__6():
+    """It calls `_tick_` in dict comprehensions and generator expressions."""
+    glb = {'items': [1, 2, 3]}
+    assert run("""squares = {x: x * x for x in items if x % 2}
+total = sum(
+    x for x in items)
+""", sum=sum, **glb) == [1, 1, 1, 3, 3, 3]
+    assert glb == {'items': [1, 2, 3]}
+
+
+def test_step_checkpoints__7():
+    """It keeps all elements of comprehensions if `_tick_` returns a value."""
+    result = compile_restricted_exec(
+        'result = [x for x in [1, 2, 3]]', policy=CheckpointTransformer)
+    glb = {'_tick_': itertools.count().__next__ if IS_PY3 else
+           itertools.count().next, '_getiter_': iter}
+    exec(result.code, glb)
+    assert glb['result'] == [1, 2, 3]
+
+
+def test_step_checkpoints__4():
+    """It is disabled by default."""
+    policy = RestrictingNodeTransformer()
+    tree = policy.visit(ast.parse('while a:\n    pass'))
+    assert isinstance(tree.body[0].body[0], ast.Pass)
+    result = compile_restricted_exec('for i in a:\n    pass')
+    assert result.names.guards == frozenset(['_getiter_'])
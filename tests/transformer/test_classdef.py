@@ -4,6 +4,7 @@ from tests import c_exec
 from tests import e_exec
 
 import pytest
+import sys
 
 
 GOOD_CLASS = '''
@@ -197,3 +198,45 @@ def test_RestrictingNodeTransformer__visit_ClassDef__8(e_exec):
     e_exec(CONTAINER_TEST, restricted_globals)
     assert restricted_globals['result1'] is True
     assert restricted_globals['result2'] is True
+
+
+LINENO_TEST = """\
+a = 1
+
+class Test(object):
+    pass
+"""
+
+
+@pytest.mark.skipif(IS_PY2, reason="No metaclass keyword in Python 2")
+@pytest.mark.parametrize(*e_exec)
+def test_RestrictingNodeTransformer__visit_ClassDef__9(e_exec):
+    """It keeps the line number of the class definition."""
+    classes = []
+
+    def metaclass(name, bases, dict):
+        classes.append(sys._getframe(1).f_lineno)
+        return type(name, bases, dict)
+
+    restricted_globals = dict(__metaclass__=metaclass)
+    e_exec(LINENO_TEST, restricted_globals)
+    assert restricted_globals['Test'].__bases__ == (object,)
+    assert classes == [3]
+
+
+KEYWORD_TEST = """\
+class Test(Base, key='value'):
+    pass
+"""
+
+
+@pytest.mark.skipif(IS_PY2, reason="No class keywords in Python 2")
+@pytest.mark.parametrize(*e_exec)
+def test_RestrictingNodeTransformer__visit_ClassDef__10(e_exec):
+    """It only passes the `__metaclass__` as keyword argument."""
+    class Base(object):
+        pass
+
+    restricted_globals = dict(Base=Base, __metaclass__=type)
+    e_exec(KEYWORD_TEST, restricted_globals)
+    assert restricted_globals['Test'].__bases__ == (Base,)
@@ -14,3 +14,20 @@ def test_RestrictingNodeTransformer__generic_visit__1():
         'Line None: MyFancyNode statements are not allowed.']
     assert transformer.warnings == [
         'Line None: MyFancyNode statement is not known to RestrictedPython']
+
+
+def test_RestrictingNodeTransformer__reset__1():
+    """It prepares the instance for the next transformation."""
+    transformer = RestrictingNodeTransformer()
+    transformer.visit(ast.parse('_a = b'))
+    transformer.gen_tmp_name()
+    assert len(transformer.errors) == 1
+    assert transformer.used_names == {'b': True}
+    errors = []
+    transformer.reset(errors=errors)
+    assert transformer.errors is errors
+    assert transformer.warnings == []
+    assert transformer.used_names == {}
+    transformer.visit(ast.parse('a = b'))
+    assert errors == []
+    assert transformer.gen_tmp_name() == '_tmp0'
@@ -1,6 +1,11 @@
 from operator import getitem
+from RestrictedPython import compile_restricted_eval
+from RestrictedPython import compile_restricted_exec
+from RestrictedPython.transformer import RestrictingNodeTransformer
 from tests import e_eval
 
+import ast
+import marshal
 import pytest
 
 
@@ -21,3 +26,84 @@ def test_slice(e_eval):
     assert e_eval('[1, 2, 3, 4, 5][%d::%d]' % (low, stride), rglb) == [2, 5]
     assert e_eval('[1, 2, 3, 4, 5][:%d:%d]' % (high, stride), rglb) == [1, 4]
     assert e_eval('[1, 2, 3, 4, 5][%d:%d:%d]' % (low, high, stride), rglb) == [2]  # NOQA: E501
+
+
+CONSTANT_SLICES = """\
+def func(items, i):
+    return (items[1:3], items[-2:], items[::-1], items[:None],
+            items[i:3], [item * 2 for item in items[:2]],
+            (lambda: items[:-1])(), items[1:3])
+"""
+
+
+class ConstantSlicesPolicy(RestrictingNodeTransformer):
+
+    constant_slices = True
+
+
+def test_slice__constant_slices__1():
+    """It creates the slices with literal bounds once per module."""
+    result = compile_restricted_exec(
+        CONSTANT_SLICES, policy=ConstantSlicesPolicy)
+    glb = {
+        '__builtins__': {'slice': slice},
+        '_getitem_': getitem,
+        '_getiter_': iter,
+    }
+    exec(result.code, glb)
+    func = glb['func']
+    assert func([1, 2, 3, 4], 2) == (
+        [2, 3], [3, 4], [4, 3, 2, 1], [1, 2, 3, 4], [3], [2, 4],
+        [1, 2, 3], [2, 3])
+    assert glb['_slice0'] == slice(1, 3, None)
+    assert sorted(name for name in glb if name.startswith('_slice')) == [
+        '_slice0', '_slice1', '_slice2', '_slice3', '_slice4', '_slice5']
+    # 'slice' is only needed for the non constant bounds:
+    del glb['__builtins__']['slice']
+    with pytest.raises(NameError):
+        func([1, 2, 3, 4], 2)
+
+
+def test_slice__constant_slices__2():
+    """It keeps the code marshallable and hashable."""
+    code = compile_restricted_exec(
+        CONSTANT_SLICES, policy=ConstantSlicesPolicy).code
+    assert marshal.loads(marshal.dumps(code)) == code
+    hash(code)
+
+
+def test_slice__constant_slices__3(mocker):
+    """It creates constant extended slices."""
+    _getitem_ = mocker.stub()
+    _getitem_.side_effect = lambda ob, index: index
+    result = compile_restricted_exec(
+        'r1 = x[1:2, ::3, 4]\nr2 = x[1:2, a]', policy=ConstantSlicesPolicy)
+    glb = {'_getitem_': _getitem_, 'a': 'A', 'x': None}
+    exec(result.code, glb)
+    assert glb['r1'] == (slice(1, 2, None), slice(None, None, 3), 4)
+    assert glb['r2'] == (slice(1, 2, None), 'A')
+
+
+def test_slice__constant_slices__4():
+    """It is disabled by default and in expressions."""
+    result = compile_restricted_exec('y = x[1:2]')
+    assert 'slice' in result.code.co_names
+    result = compile_restricted_eval('x[1:2]', policy=ConstantSlicesPolicy)
+    assert 'slice' in result.code.co_names
+    tree = ast.parse('x[1:2]', mode='eval')
+    ConstantSlicesPolicy().visit(tree)
+    code = compile(tree, '<string>', 'eval')
+    assert 'slice' in code.co_names
+
+
+def test_slice__constant_slices__5():
+    """It leaves tuples of user code alone."""
+    result = compile_restricted_exec(
+        "z = ('_slice0', 1, 2, None)\ny = x[1:2]",
+        policy=ConstantSlicesPolicy)
+    glb = {'_getitem_': getitem, 'x': [1, 2]}
+    exec(result.code, glb)
+    assert glb['z'] == ('_slice0', 1, 2, None)
+    assert glb['y'] == [2]
+    assert result.names.assigned_globals == frozenset(['_slice0', 'y', 'z'])
+    assert result.names.guards == frozenset(['_getitem_'])